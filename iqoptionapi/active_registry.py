@@ -0,0 +1,151 @@
+"""Module for IQ Option active name <-> id lookups."""
+import json
+import logging
+import os
+import threading
+import time
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.version_control import api_version
+
+# bump when the layout of the cache file changes
+CACHE_VERSION = 1
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".iqoptionapi", "actives.json")
+
+
+class ActiveRegistry(object):
+    """Class for the forward and reverse index of ``constants.ACTIVES``.
+
+    The reverse dict is replaced as a whole, so the websocket thread reads
+    it without locking. It is rebuilt by :meth:`update`, and lazily when
+    ``constants.ACTIVES`` was reassigned or changed size behind its back,
+    or once for an id it lacks, in case a value was changed in place; the
+    ids still missing then are remembered until :meth:`update`,
+    :meth:`rebuild` or a reassigned or resized ``constants.ACTIVES``.
+
+    Next to the ids it keeps per active name the instrument types it is
+    traded as and its enabled/suspended flags, and can persist all of it
+    to a cache file, see :meth:`save` and :meth:`load`.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # (constants.ACTIVES the index was built from, its size, id -> name)
+        self.__index = (None, 0, {})
+        # ids found missing by get_name, see the class docstring
+        self.__missing = frozenset()
+        # name -> {"types": [...], "enabled": bool, "suspended": bool}
+        self.details = {}
+
+    def update(self, actives, details=None):
+        """Method to replace ``constants.ACTIVES`` and its reverse index.
+
+        :param dict actives: The new name -> active id dict.
+        :param dict details: (optional) The name -> {"type", "enabled",
+            "suspended"} of the actives seen by the caller, merged into
+            :attr:`details`.
+        """
+        with self.__lock:
+            if details:
+                merged = dict(self.details)
+                for name, detail in details.items():
+                    entry = dict(merged.get(name, {}))
+                    types = list(entry.get("types", []))
+                    if detail["type"] not in types:
+                        types.append(detail["type"])
+                    entry["types"] = types
+                    entry["enabled"] = detail["enabled"]
+                    entry["suspended"] = detail["suspended"]
+                    merged[name] = entry
+                self.details = merged
+            OP_code.ACTIVES = actives
+            self.__build(actives)
+
+    def rebuild(self):
+        """Method to rebuild the reverse index from ``constants.ACTIVES``."""
+        with self.__lock:
+            return self.__build(OP_code.ACTIVES)
+
+    def __build(self, actives):
+        items = list(actives.items())
+        names = {}
+        for name, active_id in items:
+            # the first name wins, as list.index() did
+            names.setdefault(active_id, name)
+        self.__index = (actives, len(items), names)
+        self.__missing = frozenset()
+        return names
+
+    def __names(self):
+        actives, size, names = self.__index
+        if actives is not OP_code.ACTIVES or size != len(actives):
+            names = self.rebuild()
+        return names
+
+    def get_name(self, active_id):
+        """Method to get the active name of an active id.
+
+        :raises KeyError: If the id is not in ``constants.ACTIVES``.
+        """
+        try:
+            return self.__names()[active_id]
+        except KeyError:
+            if active_id in self.__missing:
+                raise
+        with self.__lock:
+            missing = self.__missing
+            # a value of constants.ACTIVES may have been changed in place
+            names = self.__build(OP_code.ACTIVES)
+            if active_id not in names:
+                self.__missing = missing | {active_id}
+                raise KeyError(active_id)
+            return names[active_id]
+
+    def get_id(self, name):
+        """Method to get the active id of an active name.
+
+        :raises KeyError: If the name is not in ``constants.ACTIVES``.
+        """
+        return OP_code.ACTIVES[name]
+
+    def save(self, path=CACHE_FILE):
+        """Method to write ``constants.ACTIVES`` and :attr:`details` to a cache file."""
+        data = {
+            "version": CACHE_VERSION,
+            "api_version": api_version,
+            "saved_at": time.time(),
+            "actives": OP_code.ACTIVES,
+            "details": self.details,
+        }
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # write aside and rename, a reader never sees half a file
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(data, cache_file)
+        os.replace(temp_path, path)
+
+    def load(self, path=CACHE_FILE):
+        """Method to install the actives of a cache file written by :meth:`save`.
+
+        :returns: The age of the file content in seconds, or None if the
+            file is missing, unreadable or of another version.
+        """
+        try:
+            with open(path) as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logging.debug('actives cache ' + path + ' not loaded: ' + str(e))
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("api_version") != api_version:
+            return None
+        with self.__lock:
+            self.details = data["details"]
+            OP_code.ACTIVES = data["actives"]
+            self.__build(OP_code.ACTIVES)
+        return max(time.time() - data["saved_at"], 0)
+
+
+ACTIVE_REGISTRY = ActiveRegistry()
@@ -1,7 +1,6 @@
 """Module for IQ Option API."""
 
 import time
-import json
 import logging
 import threading
 import requests
@@ -23,6 +22,10 @@ from iqoptionapi.http.buyback import Buyback
 from iqoptionapi.http.changebalance import Changebalance
 from iqoptionapi.http.events import Events
 from iqoptionapi.ws.client import WebsocketClient
+from iqoptionapi.ws.codec import get_codec
+from iqoptionapi.ws.events import MessageEvents, WEBSOCKET_STATE
+from iqoptionapi.ws.inflight import InflightRequests, RequestIdAllocator
+from iqoptionapi.ws.writer import WebsocketWriter, get_priority
 from iqoptionapi.ws.chanels.get_balances import *
 
 from iqoptionapi.ws.chanels.ssid import Ssid
@@ -61,12 +64,15 @@ from iqoptionapi.ws.chanels.sell_digital_option import Sell_Digital_Option
 from iqoptionapi.ws.chanels.change_tpsl import Change_Tpsl
 from iqoptionapi.ws.chanels.change_auto_margin_call import ChangeAutoMarginCall
 from iqoptionapi.ws.chanels.buy_blitz_option import BuyBlitzOption
+from iqoptionapi.digital.quotes import QuoteBook
 
 from iqoptionapi.ws.objects.timesync import TimeSync
 from iqoptionapi.ws.objects.profile import Profile
 from iqoptionapi.ws.objects.candles import Candles
 from iqoptionapi.ws.objects.listinfodata import ListInfoData
 from iqoptionapi.ws.objects.betinfo import Game_betinfo_data
+from iqoptionapi.ws.objects.reference_data import ReferenceData
+from iqoptionapi.ws.subscriptions import STREAM_NAMES, SubscriptionManager
 import iqoptionapi.global_value as global_value
 from collections import defaultdict
 
@@ -131,7 +137,11 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
 
     subscribe_commission_changed_data = nested_dict(2, dict)
     real_time_candles = nested_dict(3, dict)
+    # (active, size) -> number of writes to real_time_candles[active][size]
+    real_time_candles_version = defaultdict(int)
     real_time_candles_maxdict_table = nested_dict(2, dict)
+    # CandleStore used instead of real_time_candles when set
+    candle_store = None
     candle_generated_check = nested_dict(2, dict)
     candle_generated_all_size_check = nested_dict(1, dict)
     # ---for api_game_getoptions_result
@@ -155,16 +165,24 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
     # ------------------
     digital_payout = None
 
-    def __init__(self, host, username, password, proxies=None):
+    def __init__(self, host, username, password, proxies=None, codec=None, max_in_flight=None,
+                 timeout=30):
         """
         :param str host: The hostname or ip address of a exnova server.
         :param str username: The username of a exnova server.
         :param str password: The password of a exnova server.
         :param dict proxies: (optional) The http request proxies.
+        :param codec: (optional) The websocket JSON codec, see
+            :func:`get_codec <iqoptionapi.ws.codec.get_codec>`.
+        :param int max_in_flight: (optional) The maximum number of requests
+            waiting for a response, further senders block until one is done.
+        :param timeout: (optional) The seconds :meth:`connect` waits for
+            each step of the websocket login.
         """
         self.https_url = "https://{host}/api".format(host=host)
         self.wss_url = "wss://{host}/echo/websocket".format(host=host)
         self.websocket_client = None
+        self.websocket_writer = None
         self.session = requests.Session()
         self.session.verify = False
         self.session.trust_env = False
@@ -173,12 +191,30 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         self.token_login2fa = None
         self.token_sms = None
         self.proxies = proxies
+        self.codec = get_codec(codec)
+        self.request_ids = RequestIdAllocator()
+        self.inflight = InflightRequests(max_in_flight)
+        self.message_events = MessageEvents()
+        # IQ_Option replaces them with its own, kept across reconnects
+        self.reference_data = ReferenceData()
+        # QuoteTable per (active, period) of instrument-quotes-generated
+        self.digital_quotes = QuoteBook()
+        self.timeout = timeout
         # is used to determine if a buyOrder was set  or failed. If
         # it is None, there had been no buy order yet or just send.
         # If it is false, the last failed
         # If it is true, the last buy order was successful
         self.buy_successful = None
         self.__active_account_type = None
+        # (name, handler, microservice_name) added on top of the built-in
+        # websocket handlers, kept here so they survive a reconnect
+        self.message_handlers = []
+        # message name -> False to drop the frame undecoded, True to always
+        # decode it; see WebsocketClient.should_decode
+        self.decode_overrides = {}
+        # stream name -> keys of its subscribeMessage msgs not unsubscribed
+        # on this connection, see WebsocketClient.should_decode
+        self.subscribed_streams = defaultdict(set)
 
     def prepare_http_url(self, resource):
         """Construct http url from resource url.
@@ -260,24 +296,76 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         """
         return self.websocket_client.wss
 
-    def send_websocket_request(self, name, msg, request_id="", no_force_send=True):
+    def send_websocket_request(self, name, msg, request_id="", on_error=None, priority=None):
         """Send websocket request to exnova server.
 
+        The request is queued for the writer thread and the method returns
+        without waiting for the write.
+
         :param str name: The websocket request name.
         :param dict msg: The websocket request msg.
+        :param on_error: (optional) The callable invoked as
+            ``on_error(exception)`` if the write fails.
+        :param int priority: (optional) The outbound lane, see
+            :mod:`iqoptionapi.ws.writer`; chosen from the name and msg if None.
         """
+        if priority is None:
+            priority = get_priority(name, msg)
+        if name == "subscribeMessage" and msg.get("name") in STREAM_NAMES:
+            self.subscribed_streams[msg["name"]].add(SubscriptionManager.key(msg))
+        elif name == "unsubscribeMessage" and msg.get("name") in STREAM_NAMES:
+            self.subscribed_streams[msg["name"]].discard(SubscriptionManager.key(msg))
+        data = self.codec.dumps(dict(name=name,
+                                     msg=msg, request_id=request_id))
+        self.websocket_writer.put(data, on_error, priority)
+
+    def send_request(self, name, msg, request_id="", priority=None):
+        """Send websocket request and get the future of its response.
 
-        logger = logging.getLogger(__name__)
+        :param str name: The websocket request name.
+        :param dict msg: The websocket request msg.
+        :param request_id: (optional) The request id, allocated if empty.
+        :param int priority: (optional) The outbound lane, see
+            :meth:`send_websocket_request`.
 
-        data = json.dumps(dict(name=name,
-                               msg=msg, request_id=request_id))
+        :returns: The :class:`concurrent.futures.Future` registered in
+            :attr:`inflight`, resolved by the handler of the response.
+        """
+        if request_id == "":
+            request_id = self.request_ids.allocate()
+        future = self.inflight.register(request_id)
+        try:
+            self.send_websocket_request(
+                name, msg, request_id=future.request_id,
+                on_error=lambda error: self.inflight.discard(future.request_id),
+                priority=priority)
+        except:
+            self.inflight.discard(future.request_id)
+            raise
+        return future
 
-        while (global_value.ssl_Mutual_exclusion or global_value.ssl_Mutual_exclusion_write) and no_force_send:
-            pass
-        global_value.ssl_Mutual_exclusion_write = True
-        self.websocket.send(data)
-        logger.debug(data)
-        global_value.ssl_Mutual_exclusion_write = False
+    def add_message_handler(self, name, handler, microservice_name=None):
+        """Register an extra handler for a websocket message name.
+
+        :param str name: The websocket message name.
+        :param handler: The callable invoked as ``handler(api, message)``.
+        :param str microservice_name: (optional) The message microserviceName filter.
+        """
+        self.message_handlers.append((name, handler, microservice_name))
+        if self.websocket_client is not None:
+            self.websocket_client.dispatcher.register(
+                name, handler, microservice_name)
+
+    def remove_message_handler(self, name, handler, microservice_name=None):
+        """Remove a handler added with :meth:`add_message_handler`."""
+        try:
+            self.message_handlers.remove((name, handler, microservice_name))
+        except ValueError:
+            return False
+        if self.websocket_client is not None:
+            self.websocket_client.dispatcher.unregister(
+                name, handler, microservice_name)
+        return True
 
     @property
     def logout(self):
@@ -372,8 +460,8 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         # sendResults True/False
         # {"name":"sendMessage","request_id":"142","msg":{"name":"reset-training-balance","version":"2.0"}}
 
-        self.send_websocket_request(name="sendMessage", msg={"name": "reset-training-balance",
-                                                             "version": "2.0"})
+        return self.send_request(name="sendMessage", msg={"name": "reset-training-balance",
+                                                          "version": "2.0"})
 
     @property
     def changebalance(self):
@@ -622,7 +710,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         return GetCandles(self)
 
     def get_api_option_init_all(self):
-        self.send_websocket_request(name="api_option_init_all", msg="")
+        return self.send_request(name="api_option_init_all", msg="")
 
     def get_api_option_init_all_v2(self):
 
@@ -630,7 +718,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
                "version": "3.0",
                "body": {}
                }
-        self.send_websocket_request(name="sendMessage", msg=msg)
+        return self.send_request(name="sendMessage", msg=msg)
 # -------------get information-------------
 
     @property
@@ -689,7 +777,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
                "version": "3.0",
                "body": {"filter_suspended": True}
               }
-        self.send_websocket_request(name="sendMessage", msg=msg)
+        return self.send_request(name="sendMessage", msg=msg)
 
     @property
     def get_strike_list(self):
@@ -787,24 +875,29 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         global_value.check_websocket_if_error = False
         global_value.websocket_error_reason = None
 
+        if self.websocket_writer is not None:
+            self.websocket_writer.stop()
         self.websocket_client = WebsocketClient(self)
+        self.websocket_writer = WebsocketWriter(self.websocket)
+        self.websocket_writer.start()
 
+        # skip_utf8_validation hands text frames to on_message as bytes for the codec
         self.websocket_thread = threading.Thread(target=self.websocket.run_forever, kwargs={'sslopt': {
-                                                 "check_hostname": False, "cert_reqs": ssl.CERT_NONE, "ca_certs": "cacert.pem"}})  # for fix pyinstall error: cafile, capath and cadata cannot be all omitted
+                                                 "check_hostname": False, "cert_reqs": ssl.CERT_NONE, "ca_certs": "cacert.pem"},  # for fix pyinstall error: cafile, capath and cadata cannot be all omitted
+                                                 'skip_utf8_validation': True})
         self.websocket_thread.daemon = True
         self.websocket_thread.start()
-        while True:
-            try:
-                if global_value.check_websocket_if_error:
-                    return False, global_value.websocket_error_reason
-                if global_value.check_websocket_if_connect == 0:
-                    return False, "Websocket connection closed."
-                elif global_value.check_websocket_if_connect == 1:
-                    return True, None
-            except:
-                pass
-
-            pass
+        self.message_events.wait_for(
+            WEBSOCKET_STATE,
+            lambda: global_value.check_websocket_if_error or global_value.check_websocket_if_connect is not None,
+            self.timeout)
+        if global_value.check_websocket_if_error:
+            return False, global_value.websocket_error_reason
+        if global_value.check_websocket_if_connect == 0:
+            return False, "Websocket connection closed."
+        elif global_value.check_websocket_if_connect == 1:
+            return True, None
+        return False, "Websocket connection late " + str(self.timeout) + " sec."
 
     # @tokensms.setter
     def setTokenSMS(self, response):
@@ -834,17 +927,13 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
     def send_ssid(self):
         self.profile.msg = None
         self.ssid(global_value.SSID)  # pylint: disable=not-callable
-        while self.profile.msg == None:
-            pass
-        if self.profile.msg == False:
+        self.message_events.wait_for("profile", lambda: self.profile.msg != None, self.timeout)
+        if self.profile.msg == None or self.profile.msg == False:
             return False
         else:
             return True
 
     def connect(self):
-
-        global_value.ssl_Mutual_exclusion = False
-        global_value.ssl_Mutual_exclusion_write = False
         """Method for connection to exnova API."""
         try:
             self.close()
@@ -887,12 +976,9 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
             self.session.cookies, {"ssid": global_value.SSID})
 
         self.timesync.server_timestamp = None
-        while True:
-            try:
-                if self.timesync.server_timestamp != None:
-                    break
-            except:
-                pass
+        if not self.message_events.wait_for(
+                "timeSync", lambda: self.timesync.synced, self.timeout):
+            return False, "timeSync late " + str(self.timeout) + " sec."
         return True, None
 
     def connect2fa(self, sms_code):
@@ -908,6 +994,8 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         return True, None
 
     def close(self):
+        self.inflight.cancel_all()
+        self.websocket_writer.stop()
         self.websocket.close()
         self.websocket_thread.join()
 
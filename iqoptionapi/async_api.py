@@ -0,0 +1,271 @@
+"""Module for IQ Option asyncio API."""
+import asyncio
+import logging
+
+import iqoptionapi.constants as OP_code
+import iqoptionapi.global_value as global_value
+from iqoptionapi.stable_api import IQ_Option
+
+
+class AsyncIQOption(object):
+    """Class for the asyncio client of IQ Option.
+
+    Requests are built by the same websocket chanels and answered by the
+    same received handlers as :class:`IQ_Option
+    <iqoptionapi.stable_api.IQ_Option>`; the futures they register are
+    awaited with :func:`asyncio.wrap_future` instead of blocking a thread,
+    so one event loop can wait for many responses at once. Only the login
+    in :meth:`connect` and :meth:`close` run in the default executor.
+    """
+
+    def __init__(self, email, password, active_account_type="PRACTICE", codec=None, timeout=30,
+                 max_concurrency=None):
+        """
+        :param str email: The account email.
+        :param str password: The account password.
+        :param codec: (optional) The websocket JSON codec, see
+            :func:`get_codec <iqoptionapi.ws.codec.get_codec>`.
+        :param timeout: (optional) The seconds to wait for a response.
+        :param int max_concurrency: (optional) The maximum number of
+            requests awaiting a response, None for no limit.
+        """
+        # max_in_flight is not passed on, it blocks the sender's thread
+        self.iq = IQ_Option(email, password, active_account_type,
+                            codec=codec, timeout=timeout)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.__semaphore = None
+        self.__loop = None
+        # option id -> asyncio futures of check_win_v4 callers
+        self.__closed_waiters = {}
+        self.iq.add_message_handler("socket-option-closed", self.__option_closed)
+
+    @property
+    def api(self):
+        """Property to get the :class:`IQOptionAPI <iqoptionapi.api.IQOptionAPI>`."""
+        return self.iq.api
+
+    async def __wait_response(self, future, name, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        response = asyncio.wrap_future(future)
+        try:
+            # shielded, cancelling the caller must not look like a closed connection
+            return await asyncio.wait_for(asyncio.shield(response), timeout)
+        except asyncio.TimeoutError:
+            self.api.inflight.discard(future.request_id)
+            logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+        except asyncio.CancelledError:
+            if not response.cancelled():
+                # the caller was cancelled, not the request
+                self.api.inflight.discard(future.request_id)
+                raise
+            logging.error('**warning** ' + name + ' cancelled, connection closed')
+        return None
+
+    async def __request(self, send, name, timeout=None):
+        """Call send() to get the future of a request and await its response."""
+        if self.max_concurrency is None:
+            return await self.__wait_response(send(), name, timeout)
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self.__semaphore:
+            return await self.__wait_response(send(), name, timeout)
+
+    async def __option_result(self, send, name):
+        option = await self.__request(send, name, 5)
+        if option == None:
+            return False, None
+        if "message" in option:
+            logging.error('**warning** ' + name + ' ' + str(option["message"]))
+            return False, option["message"]
+        return True, option.get("id")
+
+    async def __status_result(self, send, name):
+        result = await self.__request(send, name)
+        if result != None and result["status"] == 2000:
+            return True, result["msg"]
+        return False, None
+
+    # _________________________connection_____________________
+
+    async def connect(self, sms_code=None):
+        self.__loop = asyncio.get_running_loop()
+        return await self.__loop.run_in_executor(None, self.iq.connect, sms_code)
+
+    async def connect_2fa(self, sms_code):
+        return await self.connect(sms_code=sms_code)
+
+    def check_connect(self):
+        return self.iq.check_connect()
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.api.close)
+
+    def get_server_timestamp(self):
+        return self.iq.get_server_timestamp()
+
+    # _________________________account_____________________
+
+    async def get_balances(self):
+        return await self.__request(self.api.get_balances, "get_balances")
+
+    async def get_balance(self):
+        balances_raw = await self.get_balances()
+        if balances_raw is None:
+            # late or connection closed, logged by get_balances
+            return None
+        for balance in balances_raw["msg"]:
+            if balance["id"] == global_value.balance_id:
+                return balance["amount"]
+
+    async def reset_practice_balance(self):
+        return await self.__request(self.api.reset_training_balance, "reset_practice_balance")
+
+    # _________________________market data_____________________
+
+    async def get_candles(self, ACTIVES, interval, count, endtime):
+        if ACTIVES not in OP_code.ACTIVES:
+            logging.error('Asset {} not found on consts'.format(ACTIVES))
+            return None
+        return await self.__request(
+            lambda: self.api.getcandles(OP_code.ACTIVES[ACTIVES], interval, count, endtime),
+            "get_candles")
+
+    async def get_financial_information(self, activeId):
+        return await self.__request(
+            lambda: self.api.get_financial_information(activeId), "get_financial_information")
+
+    async def get_instruments(self, type):
+        # type="crypto"/"forex"/"cfd"
+        return await self.__request(
+            lambda: self.api.get_instruments(type), "get_instruments", 10)
+
+    async def get_all_init_v2(self):
+        return await self.__request(
+            self.api.get_api_option_init_all_v2, "get_all_init_v2", 30)
+
+    async def get_technical_indicators(self, ACTIVES):
+        return await self.__request(
+            lambda: self.api.get_Technical_indicators(OP_code.ACTIVES[ACTIVES]),
+            "get_technical_indicators")
+
+    # _________________________binary options_____________________
+
+    async def buy(self, price, ACTIVES, ACTION, expirations):
+        return await self.__option_result(
+            lambda: self.api.buyv3(
+                float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations)),
+            "buy")
+
+    async def buy_by_raw_expirations(self, price, active, direction, option, expired):
+        return await self.__option_result(
+            lambda: self.api.buyv3_by_raw_expired(
+                price, OP_code.ACTIVES[active], direction, option, expired),
+            "buy_by_raw_expirations")
+
+    async def sell_option(self, options_ids):
+        return await self.__request(lambda: self.api.sell_option(options_ids), "sell_option")
+
+    async def check_win_v4(self, id_number, timeout=None):
+        """Wait for the socket-option-closed message of a binary option.
+
+        :param timeout: (optional) The seconds to wait, None to wait until
+            the option closes.
+
+        :returns: The (win, profit) tuple of :meth:`IQ_Option.check_win_v4
+            <iqoptionapi.stable_api.IQ_Option.check_win_v4>`, (None, None)
+            on timeout.
+        """
+        self.__loop = asyncio.get_running_loop()
+        waiter = self.__loop.create_future()
+        self.__closed_waiters.setdefault(id_number, []).append(waiter)
+        try:
+            # the option may have closed before the waiter was added
+            self.__resolve_closed(id_number)
+            x = await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            logging.error('**warning** check_win_v4 late ' + str(timeout) + ' sec')
+            return None, None
+        finally:
+            waiters = self.__closed_waiters.get(id_number)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self.__closed_waiters[id_number]
+        return x['msg']['win'], (0 if x['msg']['win'] == 'equal' else float(x['msg']['sum']) * -1 if x['msg']['win'] == 'loose' else float(x['msg']['win_amount']) - float(x['msg']['sum']))
+
+    def __option_closed(self, api, message):
+        # websocket thread, runs after the built-in handler stored the message
+        if self.__loop is not None and self.__closed_waiters:
+            self.__loop.call_soon_threadsafe(self.__resolve_closed, message["msg"]["id"])
+
+    def __resolve_closed(self, id_number):
+        message = self.api.socket_option_closed.get(id_number)
+        if message is None:
+            return
+        for waiter in self.__closed_waiters.pop(id_number, ()):
+            if not waiter.done():
+                waiter.set_result(message)
+
+    # _________________________digital options_____________________
+
+    async def buy_digital_spot(self, active, amount, action, duration):
+        instrument_id = self.iq.get_digital_spot_instrument_id(active, action, duration)
+        if instrument_id is None:
+            logging.error('buy_digital_spot active error')
+            return -1, None
+        digital_order_id = await self.__request(
+            lambda: self.api.place_digital_option(instrument_id, amount), "buy_digital_spot")
+        if isinstance(digital_order_id, int):
+            return True, digital_order_id
+        else:
+            return False, digital_order_id
+
+    async def buy_digital(self, amount, instrument_id):
+        digital_order_id = await self.__request(
+            lambda: self.api.place_digital_option(instrument_id, amount), "buy_digital", 30)
+        if digital_order_id == None:
+            logging.error('buy_digital loss digital_option_placed_id')
+            return False, None
+        return True, digital_order_id
+
+    async def get_digital_position_by_position_id(self, position_id):
+        return await self.__request(
+            lambda: self.api.get_digital_position(position_id),
+            "get_digital_position_by_position_id")
+
+    # _________________________orders and positions_____________________
+
+    async def get_order(self, buy_order_id):
+        return await self.__status_result(lambda: self.api.get_order(buy_order_id), "get_order")
+
+    async def get_pending(self, instrument_type):
+        return await self.__status_result(
+            lambda: self.api.get_pending(instrument_type), "get_pending")
+
+    async def get_positions(self, instrument_type):
+        return await self.__status_result(
+            lambda: self.api.get_positions(instrument_type), "get_positions")
+
+    async def get_position(self, buy_order_id):
+        check, order_data = await self.get_order(buy_order_id)
+        if not check:
+            return False, None
+        return await self.__status_result(
+            lambda: self.api.get_position(order_data["position_id"]), "get_position")
+
+    async def get_position_history_v2(self, instrument_type, limit, offset, start, end):
+        return await self.__status_result(
+            lambda: self.api.get_position_history_v2(instrument_type, limit, offset, start, end),
+            "get_position_history_v2")
+
+    async def cancel_order(self, buy_order_id):
+        check, _ = await self.__status_result(
+            lambda: self.api.cancel_order(buy_order_id), "cancel_order")
+        return check
+
+    async def get_overnight_fee(self, instrument_type, active):
+        return await self.__status_result(
+            lambda: self.api.get_overnight_fee(instrument_type, OP_code.ACTIVES[active]),
+            "get_overnight_fee")
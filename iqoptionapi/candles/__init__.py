@@ -0,0 +1 @@
+"""IQ Option candle storage and downloads; the store needs numpy."""
@@ -0,0 +1,148 @@
+"""Module for IQ Option candle callbacks fired by the candle streams."""
+import concurrent.futures
+import logging
+import threading
+from collections import deque
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+
+
+class CandleSubscription(object):
+    """Class for one callback of :class:`CandleCallbacks`.
+
+    Its events run one at a time and in order. While the callback is busy,
+    further updates of the same live candle replace the queued one, so a
+    slow consumer sees the latest tick instead of falling behind; at most
+    ``max_queue`` events wait, the oldest are dropped beyond that.
+    """
+
+    def __init__(self, active, size, callback, on_close_only=False, max_queue=100):
+        self.active = str(active)
+        self.size = int(size)
+        self.callback = callback
+        self.on_close_only = on_close_only
+        self.dropped = 0
+        self.__queue = deque()
+        self.__max_queue = max_queue
+        self.__running = False
+        self.__lock = threading.Lock()
+
+    def put(self, candle, closed, executor):
+        """Method to queue an event, returns without waiting for the callback."""
+        with self.__lock:
+            queue = self.__queue
+            if queue and not closed and queue[-1][0]["from"] == candle["from"]:
+                # coalesce the ticks of the live candle
+                queue[-1] = (candle, queue[-1][1])
+            else:
+                if len(queue) >= self.__max_queue:
+                    queue.popleft()
+                    self.dropped += 1
+                queue.append((candle, closed))
+            if self.__running:
+                return
+            self.__running = True
+        executor.submit(self.__drain)
+
+    def __drain(self):
+        while True:
+            with self.__lock:
+                if not self.__queue:
+                    self.__running = False
+                    return
+                candle, closed = self.__queue.popleft()
+            try:
+                self.callback(self.active, self.size, candle, closed)
+            except Exception as e:
+                logging.error('**error** on_candle callback ' + repr(e))
+
+
+class CandleCallbacks(object):
+    """Class for the candle callbacks of many (active, size).
+
+    :meth:`on_message` runs on the websocket thread for every
+    ``candle-generated``/``candles-generated``; it only queues the events,
+    the callbacks run on a thread pool of ``max_workers`` threads.
+    """
+
+    def __init__(self, max_workers=4, max_queue=100):
+        self.max_queue = max_queue
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="candle-callback")
+        self.__lock = threading.Lock()
+        # (active, size) -> tuple of subscriptions, replaced on change
+        self.__subscriptions = {}
+        # (active, size) -> the last candle seen
+        self.__last = {}
+
+    def add(self, active, size, callback, on_close_only=False):
+        """Method to call ``callback(active, size, candle, closed)`` on candle updates.
+
+        ``closed`` is True on the first update of a new candle, the one
+        before it just closed. With ``on_close_only`` the callback only runs
+        then, with the closed candle instead of the new one.
+
+        :returns: The :class:`CandleSubscription`, to pass to :meth:`remove`.
+        """
+        subscription = CandleSubscription(active, size, callback, on_close_only, self.max_queue)
+        key = (subscription.active, subscription.size)
+        with self.__lock:
+            table = dict(self.__subscriptions)
+            table[key] = table.get(key, ()) + (subscription,)
+            self.__subscriptions = table
+        return subscription
+
+    def remove(self, subscription):
+        key = (subscription.active, subscription.size)
+        with self.__lock:
+            subscriptions = self.__subscriptions.get(key, ())
+            if subscription not in subscriptions:
+                return False
+            table = dict(self.__subscriptions)
+            table[key] = tuple(s for s in subscriptions if s is not subscription)
+            if not table[key]:
+                del table[key]
+                self.__last.pop(key, None)
+            self.__subscriptions = table
+        return True
+
+    def __len__(self):
+        return sum(len(subscriptions) for subscriptions in self.__subscriptions.values())
+
+    def update(self, active, size, candle):
+        """Method to fire the callbacks of an (active, size) for a candle update."""
+        key = (str(active), int(size))
+        subscriptions = self.__subscriptions.get(key)
+        if not subscriptions:
+            return
+        with self.__lock:
+            # remove() may have dropped the key meanwhile, do not add it back
+            subscriptions = self.__subscriptions.get(key)
+            if not subscriptions:
+                return
+            last = self.__last.get(key)
+            if last is not None and candle["from"] < last["from"]:
+                return
+            closed = last is not None and candle["from"] > last["from"]
+            self.__last[key] = candle
+        for subscription in subscriptions:
+            if not subscription.on_close_only:
+                subscription.put(candle, closed, self.__executor)
+            elif closed:
+                subscription.put(last, True, self.__executor)
+
+    def on_message(self, api, message):
+        """Method to fire the callbacks of a ``candle-generated`` or ``candles-generated`` message."""
+        # pylint: disable=unused-argument
+        if not self.__subscriptions:
+            return
+        msg = message["msg"]
+        active = ACTIVE_REGISTRY.get_name(msg["active_id"])
+        if message["name"] == "candle-generated":
+            self.update(active, msg["size"], msg)
+        else:
+            for size, candle in msg["candles"].items():
+                self.update(active, size, candle)
+
+    def shutdown(self, wait=True):
+        self.__executor.shutdown(wait)
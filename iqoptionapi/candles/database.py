@@ -0,0 +1,180 @@
+"""Module for IQ Option local candle database."""
+import os
+import sqlite3
+import threading
+import time
+
+DATABASE_FILE = os.path.join(os.path.expanduser("~"), ".iqoptionapi", "candles.sqlite3")
+
+# candle dict keys stored, "from" is the key with active and size
+FIELDS = ("from", "to", "id", "at", "open", "close", "min", "max", "volume")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    active TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    "from" INTEGER NOT NULL,
+    "to" INTEGER,
+    id INTEGER,
+    at INTEGER,
+    open REAL,
+    close REAL,
+    min REAL,
+    max REAL,
+    volume REAL,
+    PRIMARY KEY (active, size, "from")
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ranges (
+    active TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL,
+    PRIMARY KEY (active, size, start)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = ", ".join('"' + field + '"' for field in FIELDS)
+
+
+class CandleDatabase(object):
+    """Class for the SQLite file of downloaded candles.
+
+    Candles are stored per (active, size, from). Next to them it records the
+    ranges that were downloaded completely, so :meth:`gaps` knows what is
+    missing even where the market had no candles (weekends, closed
+    hours), and :meth:`sync` only asks the server for those gaps.
+    :meth:`query` never touches the network.
+    """
+
+    def __init__(self, path=DATABASE_FILE):
+        """
+        :param str path: (optional) The SQLite file, ``":memory:"`` for a
+            database that is not saved.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def ranges(self, active, size):
+        """Method to get the downloaded ranges of an (active, size).
+
+        :returns: The list of ``(start, end)``, the from of the first and
+            last candle of each range, oldest first.
+        """
+        with self.__lock:
+            return self.__connection.execute(
+                'SELECT start, "end" FROM ranges WHERE active = ? AND size = ? ORDER BY start',
+                (str(active), int(size))).fetchall()
+
+    def gaps(self, active, size, start, end):
+        """Method to get the parts of a range that were not downloaded yet.
+
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+
+        :returns: The list of ``(start, end)`` missing, oldest first.
+        """
+        size = int(size)
+        start = int(start) - int(start) % size
+        end = int(end) - int(end) % size
+        gaps = []
+        for range_start, range_end in self.ranges(active, size):
+            if range_end < start:
+                continue
+            if range_start > end:
+                break
+            if range_start > start:
+                gaps.append((start, range_start - size))
+            start = max(start, range_end + size)
+        if start <= end:
+            gaps.append((start, end))
+        return gaps
+
+    def add(self, active, size, candles, start=None, end=None):
+        """Method to store candles and mark a range as downloaded.
+
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param list candles: The candle dicts, replacing stored ones with
+            the same ``from``.
+        :param int start: (optional) The from of the first candle of the
+            range the candles cover completely.
+        :param int end: (optional) The from of the last candle of that range.
+        """
+        active = str(active)
+        size = int(size)
+        rows = [(active, size) + tuple(candle.get(field) for field in FIELDS)
+                for candle in candles]
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                'INSERT OR REPLACE INTO candles (active, size, ' + _COLUMNS + ') '
+                'VALUES (?, ?' + ', ?' * len(FIELDS) + ')', rows)
+            if start is not None and end is not None and start <= end:
+                self.__add_range(active, size, int(start), int(end))
+
+    def __add_range(self, active, size, start, end):
+        # merge with the ranges it overlaps or touches
+        overlapping = self.__connection.execute(
+            'SELECT start, "end" FROM ranges WHERE active = ? AND size = ? '
+            'AND start <= ? AND "end" >= ?',
+            (active, size, end + size, start - size)).fetchall()
+        for range_start, range_end in overlapping:
+            start = min(start, range_start)
+            end = max(end, range_end)
+        self.__connection.execute(
+            'DELETE FROM ranges WHERE active = ? AND size = ? AND start >= ? AND start <= ?',
+            (active, size, start, end))
+        self.__connection.execute(
+            'INSERT INTO ranges (active, size, start, "end") VALUES (?, ?, ?, ?)',
+            (active, size, start, end))
+
+    def query(self, active, size, start, end):
+        """Method to get the stored candles of a range, without the network.
+
+        :returns: The list of candle dicts, oldest first.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT ' + _COLUMNS + ' FROM candles WHERE active = ? AND size = ? '
+                'AND "from" >= ? AND "from" <= ? ORDER BY "from"',
+                (str(active), int(size), int(start) - int(start) % int(size), int(end))).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def sync(self, downloader, actives, size, start, end):
+        """Method to download the gaps of a range for many actives.
+
+        Only the candles that closed before now are marked as downloaded,
+        the running one is fetched again by the next sync.
+
+        :param downloader: The :class:`CandleDownloader
+            <iqoptionapi.candles.downloader.CandleDownloader>`.
+        :param list actives: The active names.
+        :param int size: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+
+        :returns: The number of candles downloaded.
+        """
+        size = int(size)
+        closed = int(time.time()) // size * size - size
+        ranges = [(active, gap_start, gap_end)
+                  for active in actives
+                  for gap_start, gap_end in self.gaps(active, size, start, end)]
+        count = 0
+        for active, chunk_start, chunk_end, candles in downloader.download_ranges(ranges, size):
+            if candles is None:
+                # given up, stays a gap
+                continue
+            self.add(active, size, candles, chunk_start, min(chunk_end, closed))
+            count += len(candles)
+        return count
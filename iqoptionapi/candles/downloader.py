@@ -0,0 +1,191 @@
+"""Module for IQ Option bulk historical candle downloads."""
+import concurrent.futures
+import logging
+import time
+from collections import deque
+
+import iqoptionapi.constants as OP_code
+
+# candles the server returns for one get-candles request at most
+MAX_CHUNK = 1000
+
+
+class _Chunk(object):
+    """Class for one get-candles request of a download."""
+
+    def __init__(self, active, start, end, count):
+        self.active = active
+        # the from of the first and last candle the chunk is responsible for
+        self.start = start
+        self.end = end
+        self.count = count
+        self.future = None
+        self.sent_at = 0
+        self.attempts = 0
+
+
+class CandleDownloader(object):
+    """Class for downloading long candle histories with pipelined requests.
+
+    A range is split into chunks of at most ``chunk_size`` candles, each
+    fetched by its own ``get-candles`` request. Up to ``max_pending``
+    requests are on the wire at once; their responses are matched by
+    request_id through :attr:`IQOptionAPI.inflight
+    <iqoptionapi.api.IQOptionAPI.inflight>`, so they may arrive in any
+    order. Every chunk only keeps the candles of its own time slice, which
+    drops the overlap of neighbouring responses, and the chunks of an
+    active are yielded oldest first as soon as they are complete.
+    """
+
+    def __init__(self, api, chunk_size=MAX_CHUNK, max_pending=16, timeout=30, retries=2):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param int chunk_size: (optional) The candles per request.
+        :param int max_pending: (optional) The requests awaiting a
+            response at once, over every active.
+        :param timeout: (optional) The seconds to wait for a response
+            before the request is sent again.
+        :param int retries: (optional) The times a late request is sent
+            again before its chunk is given up.
+        """
+        self.api = api
+        self.chunk_size = max(1, min(int(chunk_size), MAX_CHUNK))
+        self.max_pending = max(1, int(max_pending))
+        self.timeout = timeout
+        self.retries = retries
+
+    def chunks(self, active, size, start, end):
+        """Method to split a range into the chunks of its requests.
+
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+
+        :returns: The list of chunks, oldest first.
+        """
+        size = int(size)
+        start = int(start) - int(start) % size
+        end = int(end) - int(end) % size
+        chunks = []
+        span = self.chunk_size * size
+        while start <= end:
+            last = min(start + span - size, end)
+            chunks.append(_Chunk(active, start, last, (last - start) // size + 1))
+            start = last + size
+        return chunks
+
+    def download(self, active, size, start, end):
+        """Method to download the candles of one active.
+
+        :returns: The generator of candle lists, oldest first.
+        """
+        for _, candles in self.download_many([active], size, start, end):
+            yield candles
+
+    def download_many(self, actives, size, start, end):
+        """Method to download the candles of many actives concurrently.
+
+        The requests of all actives share the ``max_pending`` window and are
+        sent round robin, so every active makes progress at once.
+
+        :param list actives: The active names.
+        :param int size: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+
+        :returns: The generator of ``(active, candles)``; the candle lists
+            of one active come oldest first and never overlap.
+        """
+        for active, _, _, candles in self.download_chunks(actives, size, start, end):
+            if candles:
+                yield active, candles
+
+    def download_chunks(self, actives, size, start, end):
+        """Method to download like :meth:`download_many`, chunk by chunk.
+
+        :returns: The generator of ``(active, chunk_start, chunk_end,
+            candles)`` for every chunk, also those without candles;
+            ``candles`` is None when the chunk was given up.
+        """
+        return self.download_ranges([(active, start, end) for active in actives], size)
+
+    def download_ranges(self, ranges, size):
+        """Method to download several ranges at once, see :meth:`download_chunks`.
+
+        :param list ranges: The ``(active, start, end)`` tuples.
+        :param int size: The candle size in seconds.
+        """
+        todo = deque()
+        for index, (active, start, end) in enumerate(ranges):
+            if active not in OP_code.ACTIVES:
+                logging.error('Asset {} not found on consts'.format(active))
+                continue
+            chunks = self.chunks(active, size, start, end)
+            if chunks:
+                todo.append((index, deque(chunks)))
+        # range -> its sent chunks, in the order they are yielded
+        sent = {}
+        pending = 0
+        while todo or pending:
+            # round robin over the actives until the window is full
+            while todo and pending < self.max_pending:
+                index, queue = todo.popleft()
+                chunk = queue.popleft()
+                self.__send(chunk, size)
+                sent.setdefault(index, deque()).append(chunk)
+                pending += 1
+                if queue:
+                    todo.append((index, queue))
+            heads = [queue[0] for queue in sent.values() if queue]
+            concurrent.futures.wait([chunk.future for chunk in heads],
+                                    timeout=self.__next_timeout(heads),
+                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for queue in sent.values():
+                while queue:
+                    chunk = queue[0]
+                    if chunk.future.cancelled():
+                        logging.error('**warning** get_candles cancelled, connection closed')
+                        return
+                    if not chunk.future.done():
+                        if time.time() - chunk.sent_at < self.timeout:
+                            break
+                        self.api.inflight.discard(chunk.future.request_id)
+                        logging.error('**warning** get_candles late ' + str(self.timeout) + ' sec')
+                        if chunk.attempts <= self.retries:
+                            self.__send(chunk, size)
+                            break
+                        logging.error('**error** get_candles ' + str(chunk.active) + ' ' + str(chunk.start) +
+                                      '-' + str(chunk.end) + ' skipped')
+                        candles = None
+                    else:
+                        candles = chunk.future.result()
+                    queue.popleft()
+                    pending -= 1
+                    if candles is not None:
+                        candles = self.__slice(chunk, candles)
+                    yield chunk.active, chunk.start, chunk.end, candles
+
+    def __send(self, chunk, size):
+        chunk.attempts += 1
+        chunk.sent_at = time.time()
+        chunk.future = self.api.getcandles(
+            OP_code.ACTIVES[chunk.active], size, chunk.count, chunk.end)
+
+    def __next_timeout(self, heads):
+        # only the unfinished heads are timed out, a chunk behind one is
+        # checked once it is the head; a late one then gets resent at once
+        waiting = [chunk.sent_at for chunk in heads if not chunk.future.done()]
+        if not waiting:
+            return 0
+        return max(min(waiting) + self.timeout - time.time(), 0)
+
+    @staticmethod
+    def __slice(chunk, candles):
+        """Keep the candles of the chunk's own time slice, once each, in order."""
+        by_from = {}
+        for candle in candles:
+            if chunk.start <= candle["from"] <= chunk.end:
+                by_from[candle["from"]] = candle
+        return [by_from[from_] for from_ in sorted(by_from)]
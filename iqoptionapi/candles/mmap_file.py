@@ -0,0 +1,246 @@
+"""Module for IQ Option memory-mapped candle files.
+
+A candle file is a fixed-size header followed by fixed-size little-endian
+records, so any process can map it with :func:`numpy.memmap` and read the
+history while a :class:`CandleFileWriter` in another process appends to it::
+
+    header  HEADER_DTYPE, HEADER_SIZE bytes
+    records RECORD_DTYPE * capacity, the first ``count`` are valid
+"""
+import os
+import threading
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+from iqoptionapi.optional import np, check_numpy
+
+MAGIC = b"IQCANDLE"
+VERSION = 1
+HEADER_SIZE = 128
+
+CANDLE_DIR = os.path.join(os.path.expanduser("~"), ".iqoptionapi", "candles")
+
+if np is not None:
+    HEADER_DTYPE = np.dtype([
+        ("magic", "S8"),
+        ("version", "<u4"),
+        # candle size in seconds
+        ("size", "<u4"),
+        # records the file has room for
+        ("capacity", "<u8"),
+        # write cursor, records written so far
+        ("count", "<u8"),
+        ("active", "S64"),
+    ])
+    RECORD_DTYPE = np.dtype([
+        ("from", "<i8"),
+        ("to", "<i8"),
+        ("id", "<i8"),
+        ("at", "<i8"),
+        ("open", "<f8"),
+        ("close", "<f8"),
+        ("min", "<f8"),
+        ("max", "<f8"),
+        ("volume", "<f8"),
+    ])
+
+
+def candle_file_path(directory, active, size):
+    """Function to get the path of the candle file of an (active, size)."""
+    return os.path.join(directory, "{}-{}.candles".format(active, int(size)))
+
+
+def _read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise ValueError(path + " is not a candle file")
+    if header["version"][0] != VERSION:
+        raise ValueError(path + " has candle file version " + str(header["version"][0]))
+    return header[0]
+
+
+class CandleFileWriter(object):
+    """Class for appending the candles of one (active, size) to a candle file.
+
+    A candle with the ``from`` of the last record updates it in place, a
+    newer one is appended, an older one is ignored. The record is written
+    before the cursor, so readers never see an unwritten record; they may
+    see the live candle between two of its fields being updated. The file
+    doubles its capacity when it is full.
+    """
+
+    def __init__(self, path, active, size, capacity=100000):
+        """
+        :param str path: The candle file, created if missing.
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param int capacity: (optional) The records of a new file.
+        """
+        check_numpy("candle files")
+        self.path = path
+        self.active = str(active)
+        self.size = int(size)
+        self.__lock = threading.Lock()
+        if os.path.exists(path):
+            header = _read_header(path)
+            if header["active"].decode() != self.active or int(header["size"]) != self.size:
+                raise ValueError(path + " holds the candles of another active or size")
+            capacity = int(header["capacity"])
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["size"] = self.size
+            header["capacity"] = capacity
+            header["active"] = self.active.encode()
+            with open(path, "wb") as candle_file:
+                candle_file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+                candle_file.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        self.__map(capacity)
+
+    def __map(self, capacity):
+        self.__header = np.memmap(self.path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        self.__records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r+",
+                                   offset=HEADER_SIZE, shape=(capacity,))
+        self.capacity = capacity
+
+    def __grow(self):
+        capacity = self.capacity * 2
+        self.__records.flush()
+        with open(self.path, "r+b") as candle_file:
+            candle_file.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        self.__map(capacity)
+        # readers remap when they see the new capacity
+        self.__header["capacity"] = capacity
+
+    @property
+    def count(self):
+        return int(self.__header["count"][0])
+
+    def add(self, candle):
+        """Method to write a candle dict with at least ``from``."""
+        from_ = int(candle["from"])
+        with self.__lock:
+            count = self.count
+            if count and from_ <= self.__records["from"][count - 1]:
+                if from_ == self.__records["from"][count - 1]:
+                    self.__write(count - 1, candle)
+                return
+            if count == self.capacity:
+                self.__grow()
+            self.__write(count, candle)
+            self.__header["count"] = count + 1
+
+    def __write(self, index, candle):
+        for name in RECORD_DTYPE.names:
+            value = candle.get(name)
+            if value is not None:
+                self.__records[name][index] = value
+
+    def flush(self):
+        """Method to write the mapped pages to disk, readers see them without it."""
+        with self.__lock:
+            self.__records.flush()
+            self.__header.flush()
+
+    def close(self):
+        self.flush()
+        with self.__lock:
+            del self.__records
+            del self.__header
+
+
+class CandleFileReader(object):
+    """Class for reading a candle file written by :class:`CandleFileWriter`.
+
+    The records are a read-only :func:`numpy.memmap` of the file, shared by
+    every process mapping it; nothing is copied or decoded.
+    """
+
+    def __init__(self, path):
+        check_numpy("candle files")
+        self.path = path
+        header = _read_header(path)
+        self.active = header["active"].decode()
+        self.size = int(header["size"])
+        self.__header = np.memmap(path, dtype=HEADER_DTYPE, mode="r", shape=(1,))
+        self.__records = None
+        self.__capacity = 0
+
+    @property
+    def count(self):
+        """Property to get the write cursor, the number of records written."""
+        return int(self.__header["count"][0])
+
+    def records(self):
+        """Method to get the written records, oldest first.
+
+        :returns: The read-only structured array view of the file, e.g.
+            ``reader.records()["close"]``.
+        """
+        count = self.count
+        capacity = int(self.__header["capacity"][0])
+        if capacity != self.__capacity:
+            # the writer grew the file
+            self.__records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                                       offset=HEADER_SIZE, shape=(capacity,))
+            self.__capacity = capacity
+        return self.__records[:count]
+
+    def array(self, name):
+        """Method to get one field of the written records, see :meth:`records`."""
+        return self.records()[name]
+
+
+class CandleRecorder(object):
+    """Class for writing streamed candles to one candle file per (active, size).
+
+    Register :meth:`on_message` for ``candle-generated`` and
+    ``candles-generated``, see :meth:`IQ_Option.start_candle_recorder
+    <iqoptionapi.stable_api.IQ_Option.start_candle_recorder>`.
+    """
+
+    def __init__(self, directory=CANDLE_DIR, capacity=100000):
+        check_numpy("candle files")
+        self.directory = directory
+        self.capacity = capacity
+        self.__writers = {}
+        self.__lock = threading.Lock()
+
+    def writer(self, active, size):
+        """Method to get the writer of an (active, size), opened on first use."""
+        key = (str(active), int(size))
+        writer = self.__writers.get(key)
+        if writer is None:
+            with self.__lock:
+                writer = self.__writers.get(key)
+                if writer is None:
+                    writer = CandleFileWriter(candle_file_path(self.directory, active, size),
+                                              active, size, self.capacity)
+                    self.__writers[key] = writer
+        return writer
+
+    def add(self, active, size, candle):
+        self.writer(active, size).add(candle)
+
+    def on_message(self, api, message):
+        """Method to record a ``candle-generated`` or ``candles-generated`` message.
+
+        Runs after the built-in handler, which resolved the active name.
+        """
+        # pylint: disable=unused-argument
+        msg = message["msg"]
+        active = ACTIVE_REGISTRY.get_name(msg["active_id"])
+        if message["name"] == "candle-generated":
+            self.add(active, msg["size"], msg)
+        else:
+            for size, candle in msg["candles"].items():
+                self.add(active, size, candle)
+
+    def close(self):
+        with self.__lock:
+            for writer in self.__writers.values():
+                writer.close()
+            self.__writers = {}
@@ -0,0 +1,149 @@
+"""Module for building IQ Option candles of larger sizes from smaller ones."""
+import threading
+
+# the largest size aligned to multiples of itself since the epoch; the
+# server aligns weeks and months to the calendar, they are not built here
+MAX_SIZE = 86400
+
+
+def candle_start(from_, size):
+    """Function to get the from of the ``size`` candle holding a timestamp.
+
+    Candles are aligned to multiples of their size since the epoch, as the
+    server does for the sizes up to a day, see :data:`MAX_SIZE`.
+    """
+    return int(from_) - int(from_) % int(size)
+
+
+def _check_size(size):
+    if size > MAX_SIZE:
+        raise ValueError("candle size " + str(size) + " is over " + str(MAX_SIZE) +
+                         ", weeks and months are aligned to the calendar")
+
+
+def merge(candle, base):
+    """Function to extend a candle with the next base candle.
+
+    :param dict candle: The candle so far, None for an empty one.
+    :param dict base: The next base candle.
+
+    :returns: The new candle dict; the arguments are not modified.
+    """
+    if candle is None:
+        return {
+            "open": base["open"],
+            "close": base["close"],
+            "min": base["min"],
+            "max": base["max"],
+            "volume": base.get("volume", 0),
+            "at": base.get("at"),
+        }
+    return {
+        "open": candle["open"],
+        "close": base["close"],
+        "min": min(candle["min"], base["min"]),
+        "max": max(candle["max"], base["max"]),
+        "volume": candle["volume"] + base.get("volume", 0),
+        "at": base.get("at"),
+    }
+
+
+def resample(candles, size):
+    """Function to aggregate candles into candles of a larger size.
+
+    :param list candles: The candle dicts, oldest first.
+    :param int size: The size in seconds of the candles to build, a
+        multiple of the size of ``candles`` up to :data:`MAX_SIZE`.
+
+    :returns: The list of candle dicts, oldest first.
+
+    :raises ValueError: For a size over :data:`MAX_SIZE`.
+    """
+    size = int(size)
+    _check_size(size)
+    result = []
+    current = None
+    for base in candles:
+        from_ = candle_start(base["from"], size)
+        if current is not None and current["from"] == from_:
+            current = _sized(merge(current, base), from_, size)
+            result[-1] = current
+        else:
+            current = _sized(merge(None, base), from_, size)
+            result.append(current)
+    return result
+
+
+def _sized(candle, from_, size):
+    candle["from"] = from_
+    candle["to"] = from_ + size
+    candle["size"] = size
+    candle["id"] = from_ // size
+    return candle
+
+
+class _Bucket(object):
+    """Class for the candle of one size being built."""
+
+    def __init__(self, from_):
+        self.from_ = from_
+        # merge of the closed base candles of this candle
+        self.closed = None
+
+
+class CandleResampler(object):
+    """Class for building candles of several sizes from one base candle stream.
+
+    Feed every base candle, from history and then from ``candle-generated``,
+    to :meth:`add`; it returns the updated candle of every size in O(1)
+    per size. The live base candle is kept apart from the closed ones of
+    the same candle, so its repeated updates do not add up.
+    """
+
+    def __init__(self, base_size, sizes):
+        """
+        :param int base_size: The size in seconds of the fed candles.
+        :param list sizes: The sizes to build, multiples of ``base_size``
+            up to :data:`MAX_SIZE`.
+
+        :raises ValueError: For a size not a multiple of ``base_size`` or
+            over :data:`MAX_SIZE`.
+        """
+        self.base_size = int(base_size)
+        self.sizes = sorted(int(size) for size in sizes)
+        for size in self.sizes:
+            _check_size(size)
+            if size % self.base_size:
+                raise ValueError("candle size " + str(size) + " is not a multiple of " +
+                                 str(self.base_size))
+        self.__buckets = {}
+        self.__live = None
+        self.__lock = threading.Lock()
+
+    def add(self, base):
+        """Method to add or update a base candle.
+
+        :param dict base: The base candle, with ``from``, ``open``,
+            ``close``, ``min``, ``max`` and ``volume``.
+
+        :returns: The list of ``(size, candle)`` changed by it, empty for a
+            candle older than the live one.
+        """
+        from_ = int(base["from"])
+        with self.__lock:
+            live = self.__live
+            if live is not None and from_ < live["from"]:
+                return []
+            closing = live is not None and from_ > live["from"]
+            self.__live = base
+            updated = []
+            for size in self.sizes:
+                bucket_from = candle_start(from_, size)
+                bucket = self.__buckets.get(size)
+                if bucket is None or bucket.from_ != bucket_from:
+                    bucket = _Bucket(bucket_from)
+                    self.__buckets[size] = bucket
+                elif closing:
+                    bucket.closed = merge(bucket.closed, live)
+                updated.append((size, _sized(merge(bucket.closed, base), bucket_from, size)))
+            return updated
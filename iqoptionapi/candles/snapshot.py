@@ -0,0 +1,38 @@
+"""Module for IQ Option read-only snapshots of real-time candle windows."""
+from collections.abc import Mapping
+
+
+class CandleSnapshot(Mapping):
+    """Class for a consistent ``{from: candle}`` window of one (active, size).
+
+    It is a copy taken at one point of the stream, the websocket thread
+    never changes it. :attr:`version` grows with every write to the
+    window, equal versions mean equal content.
+    """
+
+    def __init__(self, candles, version):
+        self.__candles = candles
+        self.version = version
+
+    @classmethod
+    def from_arrays(cls, columns, version):
+        """Method to build a snapshot from the columns of a candle ring buffer."""
+        names = list(columns)
+        rows = zip(*(columns[name].tolist() for name in names))
+        candles = {}
+        for row in rows:
+            candle = dict(zip(names, row))
+            candles[candle["from"]] = candle
+        return cls(candles, version)
+
+    def __getitem__(self, from_):
+        return self.__candles[from_]
+
+    def __iter__(self):
+        return iter(self.__candles)
+
+    def __len__(self):
+        return len(self.__candles)
+
+    def __repr__(self):
+        return "CandleSnapshot(version=" + str(self.version) + ", " + repr(self.__candles) + ")"
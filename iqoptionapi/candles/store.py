@@ -0,0 +1,308 @@
+"""Module for IQ Option real-time candle store backed by NumPy ring buffers."""
+import threading
+import time
+from collections.abc import Mapping
+
+from iqoptionapi.optional import np, check_numpy
+
+# candle dict key -> column dtype, the keys of the candle-generated dicts
+COLUMNS = (
+    ("id", "int64"),
+    ("from", "int64"),
+    ("to", "int64"),
+    ("at", "int64"),
+    ("open", "float64"),
+    ("close", "float64"),
+    ("min", "float64"),
+    ("max", "float64"),
+    ("volume", "float64"),
+    ("ask", "float64"),
+    ("bid", "float64"),
+    ("active_id", "int64"),
+    ("size", "int64"),
+    ("phase", "U8"),
+)
+
+# the value of a key a candle lacks, e.g. ask and bid of get_candles history
+DEFAULTS = {"int64": 0, "float64": float("nan"), "U8": ""}
+
+
+def _column(dtype, length):
+    return np.full(length, DEFAULTS[dtype], dtype=dtype)
+
+
+class CandleRingBuffer(object):
+    """Class for the last ``capacity`` candles of one (active, size).
+
+    Every column is a preallocated array of twice the capacity where each
+    row is written at ``i`` and ``i + capacity``, so the window of stored
+    candles is always one contiguous slice and :meth:`array` returns it
+    without copying. Adding or updating the newest candle and evicting the
+    oldest one are O(1).
+
+    The buffer is written by the websocket thread; arrays returned by
+    :meth:`array` are views that change with it, :meth:`snapshot` returns
+    a consistent copy without blocking the writer.
+    """
+
+    def __init__(self, capacity):
+        check_numpy("the candle store")
+        self.capacity = int(capacity)
+        self.__columns = {name: _column(dtype, 2 * self.capacity) for name, dtype in COLUMNS}
+        self.__start = 0
+        self.__count = 0
+        self.__lock = threading.Lock()
+        # odd while a write is in progress, see snapshot()
+        self.__sequence = 0
+
+    def __len__(self):
+        return self.__count
+
+    def __write(self, row, candle):
+        mirror = row + self.capacity
+        for name, dtype in COLUMNS:
+            # every column, a reused row must not keep the evicted candle
+            value = candle.get(name)
+            if value is None:
+                value = DEFAULTS[dtype]
+            column = self.__columns[name]
+            column[row] = value
+            column[mirror] = value
+
+    def add(self, candle):
+        """Method to add a candle, or update the stored candle with the same ``from``.
+
+        :param dict candle: The candle with at least ``from``, as sent in
+            ``candle-generated``/``candles-generated`` or returned by
+            ``get_candles``.
+        """
+        with self.__lock:
+            self.__sequence += 1
+            try:
+                self.__add(candle)
+            finally:
+                self.__sequence += 1
+
+    def __add(self, candle):
+        from_ = int(candle["from"])
+        count = self.__count
+        if count:
+            last = (self.__start + count - 1) % self.capacity
+            last_from = self.__columns["from"][last]
+            if from_ == last_from:
+                self.__write(last, candle)
+                return
+            if from_ < last_from:
+                self.__insert(from_, candle)
+                return
+        if count < self.capacity:
+            self.__write((self.__start + count) % self.capacity, candle)
+            self.__count = count + 1
+        else:
+            # full, the new candle takes the row of the oldest one
+            self.__write(self.__start, candle)
+            self.__start = (self.__start + 1) % self.capacity
+
+    def __insert(self, from_, candle):
+        # out of order candle, e.g. history merged into a running stream
+        froms = self.__columns["from"][self.__start:self.__start + self.__count]
+        position = int(np.searchsorted(froms, from_))
+        if position < self.__count and froms[position] == from_:
+            self.__write((self.__start + position) % self.capacity, candle)
+            return
+        if position == 0 and self.__count == self.capacity:
+            # older than everything kept
+            return
+        ordered = {name: column[self.__start:self.__start + self.__count].copy()
+                   for name, column in self.__columns.items()}
+        if self.__count == self.capacity:
+            # drop the oldest one to make room
+            ordered = {name: values[1:] for name, values in ordered.items()}
+            position -= 1
+        count = len(ordered["from"]) + 1
+        for name, dtype in COLUMNS:
+            column = self.__columns[name]
+            values = ordered[name]
+            value = candle.get(name)
+            values = np.insert(values, position, DEFAULTS[dtype] if value is None else value)
+            column[:count] = values
+            column[self.capacity:self.capacity + count] = values
+        self.__start = 0
+        self.__count = count
+
+    def array(self, name):
+        """Method to get a column of the stored candles, oldest first.
+
+        :param str name: The column, one of ``id``, ``from``, ``to``,
+            ``at``, ``open``, ``close``, ``min``, ``max``, ``volume``,
+            ``ask``, ``bid``, ``active_id``, ``size``, ``phase``. A key the
+            candle lacked reads NaN, 0 or ``""``.
+
+        :returns: The read-only numpy view, not a copy.
+        """
+        view = self.__columns[name][self.__start:self.__start + self.__count]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def version(self):
+        """Property to get the number of writes so far."""
+        return self.__sequence // 2
+
+    def snapshot(self):
+        """Method to copy every column consistently, without locking the writer.
+
+        :returns: The ``(version, {column: numpy array})`` of the stored
+            candles, oldest first.
+        """
+        while True:
+            sequence = self.__sequence
+            if sequence % 2 == 0:
+                start, count = self.__start, self.__count
+                columns = {name: column[start:start + count].copy()
+                           for name, column in self.__columns.items()}
+                if self.__sequence == sequence:
+                    return sequence // 2, columns
+            # a write is in progress, let it finish
+            time.sleep(0)
+
+    def find(self, from_):
+        """Method to get the stored candle with a ``from`` as a dict, like :meth:`snapshot`.
+
+        :returns: The candle dict, None if no stored candle has that ``from``.
+        """
+        while True:
+            sequence = self.__sequence
+            if sequence % 2 == 0:
+                start, count, columns = self.__start, self.__count, self.__columns
+                froms = columns["from"][start:start + count]
+                position = int(np.searchsorted(froms, from_))
+                candle = None
+                if position < count and froms[position] == from_:
+                    row = start + position
+                    candle = {name: column[row].item() for name, column in columns.items()}
+                if self.__sequence == sequence:
+                    return candle
+            # a write is in progress, let it finish
+            time.sleep(0)
+
+    def arrays(self):
+        """Method to get every column, see :meth:`array`.
+
+        :returns: The dict of column name -> numpy view.
+        """
+        with self.__lock:
+            return {name: self.array(name) for name, _ in COLUMNS}
+
+    def candle(self, index):
+        """Method to get one stored candle as a dict.
+
+        :param int index: The position, 0 is the oldest, -1 the newest.
+        """
+        count = self.__count
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("candle index out of range")
+        row = self.__start + index
+        return {name: column[row].item() for name, column in self.__columns.items()}
+
+    def resize(self, capacity):
+        """Method to change the capacity, keeping the newest candles."""
+        with self.__lock:
+            self.__sequence += 1
+            try:
+                self.__resize(capacity)
+            finally:
+                self.__sequence += 1
+
+    def __resize(self, capacity):
+        keep = min(self.__count, int(capacity))
+        kept = {name: column[self.__start + self.__count - keep:self.__start + self.__count].copy()
+                for name, column in self.__columns.items()}
+        self.capacity = int(capacity)
+        self.__columns = {}
+        for name, dtype in COLUMNS:
+            column = _column(dtype, 2 * self.capacity)
+            column[:keep] = kept[name]
+            column[self.capacity:self.capacity + keep] = kept[name]
+            self.__columns[name] = column
+        self.__start = 0
+        self.__count = keep
+
+
+class CandleDictView(Mapping):
+    """Class for the ``{from: candle dict}`` view of a :class:`CandleRingBuffer`.
+
+    It stands in for the dicts of ``api.real_time_candles`` for callers
+    written against them; the candle dicts are built on access.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __getitem__(self, from_):
+        # one consistent read, an eviction between the search and the
+        # read would return the neighbouring candle
+        candle = self.buffer.find(from_)
+        if candle is None:
+            raise KeyError(from_)
+        return candle
+
+    def __iter__(self):
+        return iter(self.buffer.array("from").tolist())
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+class CandleStore(object):
+    """Class for the ring buffers of every streamed (active, size)."""
+
+    def __init__(self, default_capacity=1000):
+        check_numpy("the candle store")
+        self.default_capacity = default_capacity
+        self.__buffers = {}
+        self.__lock = threading.Lock()
+
+    def add(self, active, size, candle, capacity=None):
+        """Method to add or update a candle.
+
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param dict candle: The candle dict.
+        :param int capacity: (optional) The number of candles kept for this
+            (active, size), resizing its buffer if it changed.
+        """
+        self.buffer(active, size, capacity).add(candle)
+
+    def buffer(self, active, size, capacity=None):
+        """Method to get the ring buffer of an (active, size), created on first use."""
+        key = (str(active), int(size))
+        buffer = self.__buffers.get(key)
+        if buffer is None:
+            with self.__lock:
+                buffer = self.__buffers.get(key)
+                if buffer is None:
+                    buffer = CandleRingBuffer(capacity or self.default_capacity)
+                    self.__buffers[key] = buffer
+        elif capacity and capacity != buffer.capacity:
+            buffer.resize(capacity)
+        return buffer
+
+    def get(self, active, size):
+        """Method to get the ring buffer of an (active, size), None if never streamed."""
+        return self.__buffers.get((str(active), int(size)))
+
+    def sizes(self, active):
+        """Method to get the candle sizes stored for an active."""
+        return sorted(size for name, size in self.__buffers if name == str(active))
+
+    def dict_view(self, active, size):
+        """Method to get the ``{from: candle}`` view of an (active, size)."""
+        return CandleDictView(self.buffer(active, size))
+
+    def remove(self, active, size):
+        """Method to drop the candles of an (active, size)."""
+        with self.__lock:
+            self.__buffers.pop((str(active), int(size)), None)
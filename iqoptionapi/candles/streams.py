@@ -0,0 +1,118 @@
+"""Module for IQ Option candle streams started in bulk."""
+import concurrent.futures
+import threading
+import time
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+
+
+class StreamStart(object):
+    """Class for the handle of :meth:`IQ_Option.start_streams
+    <iqoptionapi.stable_api.IQ_Option.start_streams>`.
+
+    Every stream ``(active, size)``, size being a candle size or ``"all"``,
+    has a future resolved with True when its first candle arrives, or with
+    the exception that stopped it: ``ValueError`` for an unknown active or
+    size, ``RuntimeError`` when its history could not be downloaded,
+    ``TimeoutError`` when no candle came in time after subscribing.
+    """
+
+    def __init__(self, streams):
+        """
+        :param list streams: The ``(active, size)`` of the streams.
+        """
+        self.streams = list(dict.fromkeys(self.key(active, size) for active, size in streams))
+        self.__futures = {key: concurrent.futures.Future() for key in self.streams}
+        self.__lock = threading.Lock()
+        # key -> time of its subscription, while waiting for the first candle
+        self.__waiting = {}
+        self.__subscribed = []
+
+    @staticmethod
+    def key(active, size):
+        return str(active), size if size == "all" else int(size)
+
+    def future(self, active, size):
+        return self.__futures[self.key(active, size)]
+
+    def pending(self):
+        """Method to get the streams not started nor failed yet."""
+        return [key for key in self.streams if not self.__futures[key].done()]
+
+    def subscribed(self):
+        """Method to get the streams subscribed, to stop with :meth:`IQ_Option.stop_streams
+        <iqoptionapi.stable_api.IQ_Option.stop_streams>`."""
+        with self.__lock:
+            return list(self.__subscribed)
+
+    def done(self):
+        return all(future.done() for future in self.__futures.values())
+
+    def wait(self, timeout=None):
+        """Method to wait for every stream to start or fail.
+
+        :returns: True if every stream started, False if one failed or on timeout.
+        """
+        done, not_done = concurrent.futures.wait(list(self.__futures.values()), timeout)
+        return not not_done and not self.failures()
+
+    def started(self):
+        """Method to get the streams whose first candle arrived."""
+        return [key for key in self.streams if self.__futures[key].done() and
+                not self.__futures[key].exception()]
+
+    def failures(self):
+        """Method to get ``{(active, size): exception}`` of the failed streams."""
+        failures = {}
+        for key in self.streams:
+            future = self.__futures[key]
+            if future.done() and future.exception() is not None:
+                failures[key] = future.exception()
+        return failures
+
+    def set_subscribed(self, key):
+        with self.__lock:
+            self.__subscribed.append(key)
+            if not self.__futures[key].done():
+                self.__waiting[key] = time.time()
+
+    def fail(self, key, exception):
+        with self.__lock:
+            self.__waiting.pop(key, None)
+            if not self.__futures[key].done():
+                self.__futures[key].set_exception(exception)
+
+    def expire(self, timeout):
+        """Method to fail the streams waiting for their first candle for over ``timeout`` seconds.
+
+        :returns: The seconds until the next one expires, None if none waits.
+        """
+        now = time.time()
+        with self.__lock:
+            waiting = list(self.__waiting.items())
+        remaining = None
+        for key, subscribed_at in waiting:
+            left = subscribed_at + timeout - now
+            if left <= 0:
+                self.fail(key, TimeoutError(
+                    "first candle of " + str(key) + " late " + str(timeout) + " sec"))
+            elif remaining is None or left < remaining:
+                remaining = left
+        return remaining
+
+    def __start(self, key):
+        with self.__lock:
+            if self.__waiting.pop(key, None) is not None:
+                self.__futures[key].set_result(True)
+
+    def on_message(self, api, message):
+        """Method to start the streams of a ``candle-generated`` or ``candles-generated`` message."""
+        # pylint: disable=unused-argument
+        if not self.__waiting:
+            return
+        msg = message["msg"]
+        active = ACTIVE_REGISTRY.get_name(msg["active_id"])
+        if message["name"] == "candle-generated":
+            self.__start((active, int(msg["size"])))
+        else:
+            self.__start((active, "all"))
@@ -0,0 +1 @@
+"""IQ Option digital option quotes kept up to date from the websocket."""
@@ -0,0 +1,235 @@
+"""Module for the indexed quotes of IQ Option digital options.
+
+``instrument-quotes-generated`` carries the bid and ask of every
+instrument of one (active, expiration period). :class:`QuoteBook` keeps one
+:class:`QuoteTable` per (active, period), updated in place on every
+message, so reading a quote is a dict lookup instead of a scan of the raw
+``quotes`` list.
+"""
+import bisect
+import re
+from collections.abc import Mapping
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+
+# doUSDJPY-OTC201811111204PT1MC11350481, doEURUSD201911040628PT1MPSPT
+SYMBOL = re.compile(
+    r"^do(?P<active>.+?)(?P<expiration>\d{12})PT(?P<duration>\d+)M(?P<side>[CP])(?P<strike>SPT|\d+)$")
+
+
+def parse_symbol(symbol):
+    """Function to split a digital instrument id.
+
+    :returns: The tuple ``(active, expiration, duration, side, strike)``,
+        side being ``"call"`` or ``"put"`` and strike the digits of the id
+        or ``"SPT"`` for the spot instrument; None if it is not a digital id.
+    """
+    match = SYMBOL.match(symbol)
+    if match is None:
+        return None
+    return (match.group("active"), match.group("expiration"), int(match.group("duration")),
+            "call" if match.group("side") == "C" else "put", match.group("strike"))
+
+
+def profit_percent(ask):
+    # FROM IQ OPTION SOURCE CODE
+    if ask is None:
+        return None
+    ask = float(ask)
+    return ((100 - ask) * 100) / ask
+
+
+class QuoteTable(object):
+    """Class for the quotes of one (active, period) expiration.
+
+    Every instrument id is a row of the ``bids``, ``asks`` and ``profits``
+    columns, found through ``index``; an update rewrites the rows it
+    carries. The strikes, sorted ascending with the call and put id of
+    each, come from ``get-strike-list`` through :meth:`set_strikes`.
+
+    A table only lives for one expiration, :class:`QuoteBook` starts a new
+    one when the expiration moves on.
+    """
+
+    def __init__(self, active, period, expiration):
+        self.active = active
+        self.period = period
+        self.expiration = expiration
+        # changes on every update
+        self.version = 0
+        # instrument id -> row
+        self.index = {}
+        self.symbols = []
+        self.bids = []
+        self.asks = []
+        self.profits = []
+        # rows of the spot instruments, in quote order
+        self.spot = []
+        # (strikes, call ids, put ids), replaced as a whole
+        self.__strikes = ((), (), ())
+        self.__strike_list = None
+        self.__strike_list_key = None
+        self.profit_view = ProfitView(self)
+
+    def update(self, quotes):
+        """Method to apply the ``quotes`` of an ``instrument-quotes-generated`` msg."""
+        for data in quotes:
+            bid = data["price"].get("bid")
+            ask = data["price"].get("ask")
+            profit = profit_percent(ask)
+            for symbol in data["symbols"]:
+                row = self.index.get(symbol)
+                if row is None:
+                    self.symbols.append(symbol)
+                    self.bids.append(bid)
+                    self.asks.append(ask)
+                    self.profits.append(profit)
+                    row = len(self.symbols) - 1
+                    if symbol.endswith("SPT"):
+                        self.spot.append(row)
+                    # indexed last, a reader never finds a row not filled yet
+                    self.index[symbol] = row
+                else:
+                    self.bids[row] = bid
+                    self.asks[row] = ask
+                    self.profits[row] = profit
+        self.version += 1
+
+    def __len__(self):
+        return len(self.index)
+
+    def bid(self, instrument_id):
+        row = self.index.get(instrument_id)
+        return None if row is None else self.bids[row]
+
+    def ask(self, instrument_id):
+        row = self.index.get(instrument_id)
+        return None if row is None else self.asks[row]
+
+    def profit(self, instrument_id):
+        row = self.index.get(instrument_id)
+        return None if row is None else self.profits[row]
+
+    def quote(self, instrument_id):
+        """Method to get ``{"bid", "ask", "profit"}`` of an instrument id, None if not quoted."""
+        row = self.index.get(instrument_id)
+        if row is None:
+            return None
+        return {"bid": self.bids[row], "ask": self.asks[row], "profit": self.profits[row]}
+
+    def spot_profit(self):
+        """Method to get the profit of the first spot instrument, None without one."""
+        if not self.spot:
+            return None
+        return self.profits[self.spot[0]]
+
+    @property
+    def strikes(self):
+        return self.__strikes[0]
+
+    def set_strikes(self, strikes):
+        """Method to set the strikes of this expiration.
+
+        :param list strikes: The ``strike`` list of a ``get-strike-list``
+            response.
+        """
+        rows = sorted((float(data["value"]) * 10e-7, data["call"]["id"], data["put"]["id"])
+                      for data in strikes)
+        self.__strikes = tuple(tuple(column) for column in zip(*rows)) if rows else ((), (), ())
+
+    def nearest(self, price):
+        """Method to find the strike nearest to a price, by binary search.
+
+        :returns: The tuple ``(strike, call id, put id)``, None before
+            :meth:`set_strikes`.
+        """
+        strikes, calls, puts = self.__strikes
+        if not strikes:
+            return None
+        i = bisect.bisect_left(strikes, price)
+        if i == len(strikes) or (i > 0 and price - strikes[i - 1] <= strikes[i] - price):
+            i -= 1
+        return strikes[i], calls[i], puts[i]
+
+    def strike_list(self):
+        """Method to get the ``{strike: {"call": {"profit", "id"}, "put": {...}}}`` of the strikes quoted.
+
+        The strike keys are formatted ``"%.6f"``. The dict is built again
+        only after an update or a :meth:`set_strikes`, treat it as read-only.
+        """
+        strikes = self.__strikes
+        version = self.version
+        key = self.__strike_list_key
+        if key is not None and key[0] == version and key[1] is strikes:
+            return self.__strike_list
+        ans = {}
+        for strike, call, put in zip(*strikes):
+            call_row = self.index.get(call)
+            put_row = self.index.get(put)
+            if call_row is None or put_row is None:
+                continue
+            ans["%.6f" % strike] = {
+                "call": {"profit": self.profits[call_row], "id": call},
+                "put": {"profit": self.profits[put_row], "id": put},
+            }
+        self.__strike_list = ans
+        self.__strike_list_key = (version, strikes)
+        return ans
+
+
+class ProfitView(Mapping):
+    """Class for the ``{instrument id: profit}`` mapping of a :class:`QuoteTable`.
+
+    It is the value of ``api.instrument_quites_generated_data[active][period]``,
+    once per table: it follows every later update of the table, and holds
+    the instruments of all the messages of the expiration, not only the
+    last one.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, instrument_id):
+        row = self.table.index.get(instrument_id)
+        if row is None:
+            raise KeyError(instrument_id)
+        return self.table.profits[row]
+
+    def __iter__(self):
+        # a copy, the websocket thread adds instruments meanwhile
+        return iter(list(self.table.index))
+
+    def __len__(self):
+        return len(self.table.index)
+
+
+class QuoteBook(object):
+    """Class for the :class:`QuoteTable` of every (active, period) quoted."""
+
+    def __init__(self):
+        # (active, period) -> QuoteTable, replaced when the expiration moves on
+        self.__tables = {}
+
+    def get(self, active, period):
+        """Method to get the table of an active and period in seconds, None if not quoted yet."""
+        return self.__tables.get((str(active), int(period)))
+
+    def remove(self, active, period):
+        return self.__tables.pop((str(active), int(period)), None) is not None
+
+    def update(self, message):
+        """Method to apply an ``instrument-quotes-generated`` message.
+
+        :returns: The updated table.
+        """
+        msg = message["msg"]
+        key = (str(ACTIVE_REGISTRY.get_name(msg["active"])), int(msg["expiration"]["period"]))
+        expiration = msg["expiration"]["timestamp"]
+        table = self.__tables.get(key)
+        if table is None or table.expiration != expiration:
+            table = QuoteTable(key[0], key[1], expiration)
+            table.update(msg["quotes"])
+            self.__tables[key] = table
+        else:
+            table.update(msg["quotes"])
+        return table
@@ -0,0 +1,295 @@
+"""Module for the sell-back values of every open IQ Option digital spot position.
+
+:class:`DigitalPortfolio` keeps the open positions of ``position-changed``
+grouped by (active, period) in arrays, and on every
+``instrument-quotes-generated`` of a group values all its positions in one
+numpy pass with the interpolation of
+:meth:`IQ_Option.get_digital_spot_profit_after_sale
+<iqoptionapi.stable_api.IQ_Option.get_digital_spot_profit_after_sale>`.
+"""
+import concurrent.futures
+import logging
+import threading
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+from iqoptionapi.digital.quotes import parse_symbol
+from iqoptionapi.optional import np, check_numpy
+
+
+def sell_back_values(f, f2, strike, lower, upper, call, count, amount, rate):
+    """Function to get the sell-back value of digital spot positions.
+
+    Every parameter is an array with one value per position.
+
+    :param f: The bid of the lower instrument.
+    :param f2: The bid of the upper instrument.
+    :param strike: The strike of the position.
+    :param lower: The strike of the lower instrument.
+    :param upper: The strike of the upper instrument.
+    :param call: True for a call, False for a put.
+    :param count: The instrument count of the position.
+    :param amount: The amount the position cost.
+    :param rate: The currency rate.
+
+    :returns: The array of the profit if sold now, NaN without a bid.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        width = upper - lower
+        outside = (lower > strike) | (strike > upper)
+        k = np.where(call, upper - strike, strike - upper) / np.abs(width)
+        # between the lower and upper instrument, the same for a call and a put
+        inside = f + ((strike - lower) / width) * (f2 - f)
+        interpolate = (lower != strike) & ~np.isnan(f) & ~np.isnan(f2)
+        price = np.where(interpolate, np.where(outside, f2 + k * np.abs(f2 - f), inside), f) / rate
+        return price * count - amount
+
+
+class _Position(object):
+    """Class for one open digital spot position of :class:`DigitalPortfolio`."""
+
+    def __init__(self, position_id, message):
+        msg = message["msg"]
+        raw_event = msg["raw_event"]
+        extra_data = raw_event["extra_data"]
+        self.id = position_id
+        self.active = str(raw_event["instrument_underlying"])
+        self.period = parse_symbol(msg["instrument_id"])[2] * 60
+        self.call = parse_symbol(msg["instrument_id"])[3] == "call"
+        self.strike = raw_event["instrument_strike_value"] / 1000000.0
+        self.lower = extra_data["lower_instrument_strike"] / 1000000.0
+        self.upper = extra_data["upper_instrument_strike"] / 1000000.0
+        self.lower_id = extra_data["lower_instrument_id"]
+        self.upper_id = extra_data["upper_instrument_id"]
+        self.count = raw_event["count"]
+        self.amount = max(raw_event["buy_amount"], raw_event["sell_amount"])
+        self.rate = raw_event["currency_rate"]
+
+
+class _Group(object):
+    """Class for the position arrays of one (active, period), rebuilt when a position opens or closes."""
+
+    def __init__(self, positions, previous=None):
+        self.ids = [position.id for position in positions]
+        self.lower_ids = [position.lower_id for position in positions]
+        self.upper_ids = [position.upper_id for position in positions]
+        for name in ("strike", "lower", "upper", "count", "amount", "rate"):
+            setattr(self, name, np.array([getattr(position, name) for position in positions],
+                                         dtype="float64"))
+        self.call = np.array([position.call for position in positions], dtype=bool)
+        # the last bids seen, used while an instrument has none
+        self.f = np.full(len(positions), np.nan)
+        self.f2 = np.full(len(positions), np.nan)
+        self.values = np.full(len(positions), np.nan)
+        if previous is not None:
+            # keep the last bids and values of the positions still open
+            rows = {position_id: i for i, position_id in enumerate(previous.ids)}
+            for i, position_id in enumerate(self.ids):
+                row = rows.get(position_id)
+                if row is not None:
+                    self.f[i] = previous.f[row]
+                    self.f2[i] = previous.f2[row]
+                    self.values[i] = previous.values[row]
+        # the table the rows below index
+        self.table = None
+        self.lower_rows = None
+        self.upper_rows = None
+
+
+class _Threshold(object):
+    def __init__(self, callback, above, below, position_id):
+        self.callback = callback
+        self.above = above
+        self.below = below
+        self.position_id = position_id
+
+
+class DigitalPortfolio(object):
+    """Class for the live sell-back values of the open digital spot positions.
+
+    :meth:`on_position` and :meth:`on_quotes` run on the websocket thread
+    for ``position-changed`` and ``instrument-quotes-generated``; reading
+    :meth:`values` takes no lock. Threshold callbacks run on a thread of
+    their own, in order, never on the websocket thread.
+    """
+
+    def __init__(self, quotes, subscriptions=None):
+        """
+        :param quotes: The :class:`QuoteBook <iqoptionapi.digital.quotes.QuoteBook>`
+            of the quotes.
+        :param subscriptions: (optional) A callable ``subscriptions(active,
+            period, subscribe)`` to subscribe the quotes of a group while it
+            has positions.
+        """
+        check_numpy("the digital portfolio")
+        self.quotes = quotes
+        self.subscriptions = subscriptions
+        self.__lock = threading.Lock()
+        # position id -> _Position
+        self.__positions = {}
+        # (active, period) -> _Group, None before the first one
+        self.__groups = {}
+        # the groups to rebuild, their positions changed
+        self.__changed = set()
+        # position id -> last value, replaced on change
+        self.__values = {}
+        self.__thresholds = ()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="digital-valuation")
+
+    def values(self):
+        """Method to get ``{position id: profit if sold now}``, None without a bid yet."""
+        return self.__values
+
+    def value(self, position_id):
+        return self.__values.get(position_id)
+
+    def positions(self):
+        """Method to get the ids of the open positions valued."""
+        return list(self.__positions)
+
+    def add_threshold(self, callback, above=None, below=None, position_id=None):
+        """Method to call ``callback(position_id, value)`` when a value crosses a threshold.
+
+        It fires when the value reaches ``above`` from below it, or
+        ``below`` from above it, also on the first value of a position
+        already past it.
+
+        :param position_id: (optional) The position to watch, every one by default.
+
+        :returns: The threshold, to pass to :meth:`remove_threshold`.
+        """
+        threshold = _Threshold(callback, above, below, position_id)
+        with self.__lock:
+            self.__thresholds = self.__thresholds + (threshold,)
+        return threshold
+
+    def remove_threshold(self, threshold):
+        with self.__lock:
+            if threshold not in self.__thresholds:
+                return False
+            self.__thresholds = tuple(t for t in self.__thresholds if t is not threshold)
+        return True
+
+    def add(self, position_id, message):
+        """Method to add or update a position from its ``position-changed`` message."""
+        msg = message["msg"]
+        if msg.get("status") != "open":
+            self.remove(position_id)
+            return
+        try:
+            position = _Position(position_id, message)
+        except (KeyError, TypeError):
+            # not a spot position, it has no lower and upper instrument
+            return
+        key = (position.active, position.period)
+        with self.__lock:
+            new_group = key not in self.__groups
+            self.__positions[position_id] = position
+            self.__groups.setdefault(key, None)
+            self.__changed.add(key)
+        if new_group and self.subscriptions is not None:
+            self.subscriptions(position.active, position.period, True)
+        self.update(*key)
+
+    def remove(self, position_id):
+        with self.__lock:
+            position = self.__positions.pop(position_id, None)
+            if position is None:
+                return False
+            key = (position.active, position.period)
+            empty = not any((p.active, p.period) == key for p in self.__positions.values())
+            if empty:
+                del self.__groups[key]
+                self.__changed.discard(key)
+            else:
+                self.__changed.add(key)
+            values = dict(self.__values)
+            values.pop(position_id, None)
+            self.__values = values
+        if empty and self.subscriptions is not None:
+            self.subscriptions(key[0], key[1], False)
+        return True
+
+    def __group(self, key):
+        if key not in self.__changed:
+            return self.__groups[key]
+        with self.__lock:
+            group = _Group([p for p in self.__positions.values() if (p.active, p.period) == key],
+                           self.__groups.get(key))
+            self.__groups[key] = group
+            self.__changed.discard(key)
+        return group
+
+    def update(self, active, period):
+        """Method to value the positions of an (active, period) with its latest quotes."""
+        if (active, period) not in self.__groups:
+            return
+        table = self.quotes.get(active, period)
+        group = self.__group((active, period))
+        if table is None or not group.ids:
+            return
+        if group.table is not table:
+            group.table = table
+            group.lower_rows = np.array([table.index.get(i, -1) for i in group.lower_ids])
+            group.upper_rows = np.array([table.index.get(i, -1) for i in group.upper_ids])
+        elif (group.lower_rows < 0).any() or (group.upper_rows < 0).any():
+            # instruments quoted since
+            group.lower_rows = np.array([table.index.get(i, -1) for i in group.lower_ids])
+            group.upper_rows = np.array([table.index.get(i, -1) for i in group.upper_ids])
+        # a trailing nan row stands for the instruments without a quote
+        bids = np.array(table.bids[:len(table.index)] + [None], dtype="float64")
+        f = bids[group.lower_rows]
+        f2 = bids[group.upper_rows]
+        group.f = np.where(np.isnan(f), group.f, f)
+        group.f2 = np.where(np.isnan(f2), group.f2, f2)
+        previous = group.values
+        group.values = sell_back_values(group.f, group.f2, group.strike, group.lower, group.upper,
+                                        group.call, group.count, group.amount, group.rate)
+        with self.__lock:
+            values = dict(self.__values)
+            for position_id, value in zip(group.ids, group.values.tolist()):
+                values[position_id] = None if value != value else value
+            self.__values = values
+        self.__fire(group, previous)
+
+    def __fire(self, group, previous):
+        for threshold in self.__thresholds:
+            crossed = np.zeros(len(group.ids), dtype=bool)
+            with np.errstate(invalid="ignore"):
+                if threshold.above is not None:
+                    crossed |= (group.values >= threshold.above) & ~(previous >= threshold.above)
+                if threshold.below is not None:
+                    crossed |= (group.values <= threshold.below) & ~(previous <= threshold.below)
+            for i in np.flatnonzero(crossed):
+                position_id = group.ids[i]
+                if threshold.position_id is None or threshold.position_id == position_id:
+                    self.__executor.submit(self.__call, threshold.callback, position_id,
+                                           float(group.values[i]))
+
+    @staticmethod
+    def __call(callback, position_id, value):
+        try:
+            callback(position_id, value)
+        except Exception as e:
+            logging.error('**error** digital portfolio threshold callback ' + repr(e))
+
+    def on_position(self, api, message):
+        """Method to add, update or remove a position from a ``position-changed`` message."""
+        # pylint: disable=unused-argument
+        msg = message["msg"]
+        if msg.get("source") != "digital-options":
+            return
+        self.add(int(msg["raw_event"]["order_ids"][0]), message)
+
+    def on_quotes(self, api, message):
+        """Method to value the positions of an ``instrument-quotes-generated`` message."""
+        # pylint: disable=unused-argument
+        if not self.__groups:
+            return
+        msg = message["msg"]
+        self.update(str(ACTIVE_REGISTRY.get_name(msg["active"])), int(msg["expiration"]["period"]))
+
+    def shutdown(self, wait=True):
+        """Method to drop every position, releasing their quotes, and stop the callback thread."""
+        for position_id in self.positions():
+            self.remove(position_id)
+        self.__executor.shutdown(wait)
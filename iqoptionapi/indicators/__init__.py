@@ -0,0 +1 @@
+"""IQ Option technical indicators computed locally from candles."""
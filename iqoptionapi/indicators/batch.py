@@ -0,0 +1,326 @@
+"""Module for IQ Option technical indicators computed over whole candle arrays.
+
+The functions take numpy arrays of one series, shape ``(n,)``, or of many
+series of the same length, shape ``(series, n)``, and return arrays of the
+same shape with NaN where :mod:`streaming <iqoptionapi.indicators.streaming>`
+returns None. Definitions and seeding are those of the streaming
+indicators, and :func:`resume` hands a computed history over to one of
+them, so a backtest and the live stream give the same values.
+"""
+from iqoptionapi.indicators.streaming import (
+    INDICATORS, IndicatorEngine, SMA, EMA, RSI, MACD, BollingerBands, ATR, Stochastic)
+from iqoptionapi.optional import np, check_numpy
+
+if np is not None:
+    from numpy.lib.stride_tricks import sliding_window_view
+
+# candle dict key -> array dtype of candles_to_arrays
+FIELDS = (
+    ("from", "int64"),
+    ("open", "float64"),
+    ("close", "float64"),
+    ("min", "float64"),
+    ("max", "float64"),
+    ("volume", "float64"),
+)
+
+# the largest growth of one block of the blocked EMA, keeps it accurate
+_BLOCK_GROWTH = 1e8
+
+
+def candles_to_arrays(candles):
+    """Function to turn a list of candle dicts, e.g. of get_candles, into arrays.
+
+    :returns: The dict of field -> numpy array, in the order of ``candles``.
+    """
+    check_numpy("batch indicators")
+    return {name: np.fromiter((candle.get(name, 0) for candle in candles), dtype=dtype,
+                              count=len(candles))
+            for name, dtype in FIELDS}
+
+
+def _nan(x):
+    return np.full(x.shape, np.nan)
+
+
+def _ewm(x, period, alpha):
+    """Exponential average seeded with the mean of the first ``period`` values."""
+    x = np.asarray(x, dtype="float64")
+    out = _nan(x)
+    n = x.shape[-1]
+    if n < period:
+        return out
+    y = x[..., :period].mean(axis=-1)
+    out[..., period - 1] = y
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[..., period:] = x[..., period:]
+        return out
+    # y[k] = decay**k * (y[0] + alpha * sum(x[j] / decay**j, j = 1..k)) on
+    # blocks short enough for decay**-k to stay small
+    block = max(1, int(np.log(_BLOCK_GROWTH) / -np.log(decay)))
+    for start in range(period, n, block):
+        segment = x[..., start:start + block]
+        powers = decay ** np.arange(1, segment.shape[-1] + 1)
+        values = powers * (y[..., None] + alpha * np.cumsum(segment / powers, axis=-1))
+        out[..., start:start + block] = values
+        y = values[..., -1]
+    return out
+
+
+def _window(x, period):
+    return sliding_window_view(np.asarray(x, dtype="float64"), period, axis=-1)
+
+
+def sma(close, period=20):
+    close = np.asarray(close, dtype="float64")
+    out = _nan(close)
+    if close.shape[-1] >= period:
+        out[..., period - 1:] = _window(close, period).mean(axis=-1)
+    return out
+
+
+def ema(close, period=20):
+    return _ewm(close, period, 2.0 / (period + 1))
+
+
+def rma(x, period=14):
+    """Function to get Wilder's moving average."""
+    return _ewm(x, period, 1.0 / period)
+
+
+def rsi(close, period=14):
+    close = np.asarray(close, dtype="float64")
+    out = _nan(close)
+    change = np.diff(close, axis=-1)
+    gain = rma(np.maximum(change, 0.0), period)
+    loss = rma(np.maximum(-change, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[..., 1:] = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    out[..., 1:][np.isnan(gain)] = np.nan
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    close = np.asarray(close, dtype="float64")
+    line = ema(close, fast) - ema(close, slow)
+    start = max(fast, slow) - 1
+    signal_line = _nan(close)
+    signal_line[..., start:] = ema(line[..., start:], signal)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def bollinger(close, period=20, deviations=2.0):
+    close = np.asarray(close, dtype="float64")
+    middle = sma(close, period)
+    deviation = _nan(close)
+    if close.shape[-1] >= period:
+        deviation[..., period - 1:] = _window(close, period).std(axis=-1)
+    return {"middle": middle,
+            "upper": middle + deviations * deviation,
+            "lower": middle - deviations * deviation}
+
+
+def true_range(high, low, close):
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    close = np.asarray(close, dtype="float64")
+    previous = close[..., :-1]
+    out = high - low
+    out[..., 1:] = np.maximum(high[..., 1:], previous) - np.minimum(low[..., 1:], previous)
+    return out
+
+
+def atr(high, low, close, period=14):
+    return rma(true_range(high, low, close), period)
+
+
+def stochastic(high, low, close, k_period=14, d_period=3):
+    close = np.asarray(close, dtype="float64")
+    k = _nan(close)
+    if close.shape[-1] >= k_period:
+        highest = _window(high, k_period).max(axis=-1)
+        lowest = _window(low, k_period).min(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k[..., k_period - 1:] = np.where(
+                highest == lowest, 50.0,
+                100.0 * (close[..., k_period - 1:] - lowest) / (highest - lowest))
+    d = _nan(close)
+    d[..., k_period - 1:] = sma(k[..., k_period - 1:], d_period)
+    return {"k": k, "d": d}
+
+
+def _arguments(columns, name):
+    if name in ("atr", "stochastic"):
+        return columns["max"], columns["min"], columns["close"]
+    return (columns["close"],)
+
+
+# indicator name -> batch function, the names of streaming.INDICATORS
+FUNCTIONS = {
+    "sma": sma,
+    "ema": ema,
+    "rsi": rsi,
+    "macd": macd,
+    "bollinger": bollinger,
+    "atr": atr,
+    "stochastic": stochastic,
+}
+
+
+def _specs(specs):
+    for spec in specs:
+        if isinstance(spec, str):
+            yield spec, {}
+        else:
+            yield spec[0], dict(spec[1])
+
+
+def compute(columns, specs):
+    """Function to compute several indicators over candle arrays.
+
+    :param columns: The dict of :func:`candles_to_arrays`, its arrays may
+        also be 2D with one series of equal length per row; or a list of
+        candle dicts.
+    :param list specs: The indicator names, or ``(name, params)`` pairs,
+        e.g. ``["rsi", ("ema", {"period": 50})]``.
+
+    :returns: The dict of :meth:`IndicatorEngine.key
+        <iqoptionapi.indicators.streaming.IndicatorEngine.key>` -> array,
+        or dict of arrays for macd, bollinger and stochastic.
+    """
+    check_numpy("batch indicators")
+    if not isinstance(columns, dict):
+        columns = candles_to_arrays(columns)
+    results = {}
+    for name, params in _specs(specs):
+        results[IndicatorEngine.key(name, params)] = FUNCTIONS[name](
+            *_arguments(columns, name), **params)
+    return results
+
+
+def compute_many(candles_by_active, specs):
+    """Function to compute indicators for many actives at once.
+
+    Actives with the same number of candles are stacked into 2D arrays and
+    computed together.
+
+    :param dict candles_by_active: The active -> candle dict list (or
+        :func:`candles_to_arrays` dict).
+    :param list specs: See :func:`compute`.
+
+    :returns: The dict of active -> the result of :func:`compute`.
+    """
+    check_numpy("batch indicators")
+    groups = {}
+    for active, candles in candles_by_active.items():
+        columns = candles if isinstance(candles, dict) else candles_to_arrays(candles)
+        groups.setdefault(len(columns["close"]), []).append((active, columns))
+    results = {}
+    for members in groups.values():
+        stacked = {name: np.stack([columns[name] for _, columns in members])
+                   for name, _ in FIELDS}
+        computed = compute(stacked, specs)
+        for row, (active, _) in enumerate(members):
+            results[active] = {
+                key: ({field: values[row] for field, values in value.items()}
+                      if isinstance(value, dict) else value[row])
+                for key, value in computed.items()}
+    return results
+
+
+def _last(values):
+    return values[-1] if len(values) else None
+
+
+def _load_sma(indicator, columns, params):
+    indicator._sma.load(columns["close"])
+
+
+def _load_ema(indicator, columns, params):
+    close = columns["close"]
+    indicator._ema.load(close, _last(ema(close, **params)))
+
+
+def _load_rsi(indicator, columns, params):
+    close = columns["close"]
+    if not len(close):
+        return
+    period = params.get("period", 14)
+    change = np.diff(close)
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+    indicator._gain.load(gain, _last(rma(gain, period)))
+    indicator._loss.load(loss, _last(rma(loss, period)))
+    indicator._close = float(close[-1])
+
+
+def _load_macd(indicator, columns, params):
+    close = columns["close"]
+    fast = params.get("fast", 12)
+    slow = params.get("slow", 26)
+    signal = params.get("signal", 9)
+    indicator._fast.load(close, _last(ema(close, fast)))
+    indicator._slow.load(close, _last(ema(close, slow)))
+    line = (ema(close, fast) - ema(close, slow))[max(fast, slow) - 1:]
+    indicator._signal.load(line, _last(ema(line, signal)))
+
+
+def _load_bollinger(indicator, columns, params):
+    indicator._deviation.load(columns["close"])
+
+
+def _load_atr(indicator, columns, params):
+    close = columns["close"]
+    if not len(close):
+        return
+    ranges = true_range(columns["max"], columns["min"], close)
+    indicator._range.load(ranges, _last(rma(ranges, params.get("period", 14))))
+    indicator._close = float(close[-1])
+
+
+def _load_stochastic(indicator, columns, params):
+    k_period = params.get("k_period", 14)
+    indicator._high.load(columns["max"])
+    indicator._low.load(columns["min"])
+    k = stochastic(columns["max"], columns["min"], columns["close"], **params)["k"]
+    indicator._d.load(k[k_period - 1:])
+
+
+_LOADERS = {
+    SMA: _load_sma,
+    EMA: _load_ema,
+    RSI: _load_rsi,
+    MACD: _load_macd,
+    BollingerBands: _load_bollinger,
+    ATR: _load_atr,
+    Stochastic: _load_stochastic,
+}
+
+
+def resume(name, candles, **params):
+    """Function to get a streaming indicator that continues after candles.
+
+    Its state is computed with the batch functions instead of feeding the
+    candles one by one. The last candle is kept as the live one, so an
+    update of it from the stream replaces it instead of being counted twice.
+
+    :param str name: The indicator name.
+    :param candles: The candle dict list, oldest first, or the dict of
+        :func:`candles_to_arrays`.
+    :param params: The indicator parameters.
+
+    :returns: The :class:`Indicator
+        <iqoptionapi.indicators.streaming.Indicator>`, to be fed with
+        :meth:`update <iqoptionapi.indicators.streaming.Indicator.update>`
+        or added to an engine.
+    """
+    check_numpy("batch indicators")
+    columns = candles if isinstance(candles, dict) else candles_to_arrays(candles)
+    indicator = INDICATORS[name](**params)
+    count = len(columns["close"])
+    if count:
+        committed = {field: values[:count - 1] for field, values in columns.items()}
+        _LOADERS[type(indicator)](indicator, committed, params)
+        indicator.update({field: values[count - 1].item() for field, values in columns.items()})
+    return indicator
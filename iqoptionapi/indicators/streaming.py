@@ -0,0 +1,448 @@
+"""Module for IQ Option technical indicators updated candle by candle.
+
+Every indicator keeps the state of the closed candles and computes its
+value for the live candle from that state, so each of the many updates of
+the live candle costs O(1) and a candle only enters the state once, when
+the next one starts.
+"""
+import math
+import threading
+from collections import deque
+
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
+
+
+class _Sma(object):
+    """Class for the simple moving average of a number stream."""
+
+    def __init__(self, period):
+        self.period = period
+        # the last period - 1 values pushed
+        self.values = deque()
+        self.total = 0.0
+
+    def peek(self, x):
+        if len(self.values) < self.period - 1:
+            return None
+        return (self.total + x) / self.period
+
+    def push(self, x):
+        self.values.append(x)
+        self.total += x
+        if len(self.values) > self.period - 1:
+            self.total -= self.values.popleft()
+
+    def load(self, xs):
+        """Method to set the state reached after pushing every value of xs."""
+        self.values = deque(float(x) for x in xs[max(len(xs) - (self.period - 1), 0):])
+        self.total = sum(self.values)
+
+
+class _Ema(object):
+    """Class for the exponential moving average, seeded with the SMA."""
+
+    def __init__(self, period, alpha=None):
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.seed = _Sma(period)
+        self.value = None
+
+    def peek(self, x):
+        if self.value is None:
+            return self.seed.peek(x)
+        return self.value + self.alpha * (x - self.value)
+
+    def push(self, x):
+        value = self.peek(x)
+        if self.value is None:
+            self.seed.push(x)
+        self.value = value
+
+    def load(self, xs, value):
+        """Method to set the state reached after pushing xs, ``value`` being the last average."""
+        if len(xs) < self.seed.period:
+            self.seed.load(xs)
+            self.value = None
+        else:
+            self.value = float(value)
+
+
+class _Rma(_Ema):
+    """Class for Wilder's moving average used by RSI and ATR."""
+
+    def __init__(self, period):
+        super(_Rma, self).__init__(period, 1.0 / period)
+
+
+class _Deviation(object):
+    """Class for the rolling population standard deviation."""
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque()
+        self.total = 0.0
+        self.squares = 0.0
+
+    def peek(self, x):
+        if len(self.values) < self.period - 1:
+            return None
+        mean = (self.total + x) / self.period
+        variance = (self.squares + x * x) / self.period - mean * mean
+        return mean, math.sqrt(max(variance, 0.0))
+
+    def push(self, x):
+        self.values.append(x)
+        self.total += x
+        self.squares += x * x
+        if len(self.values) > self.period - 1:
+            old = self.values.popleft()
+            self.total -= old
+            self.squares -= old * old
+
+    def load(self, xs):
+        self.values = deque(float(x) for x in xs[max(len(xs) - (self.period - 1), 0):])
+        self.total = sum(self.values)
+        self.squares = sum(x * x for x in self.values)
+
+
+class _Extreme(object):
+    """Class for the rolling maximum (or minimum) with a monotonic deque."""
+
+    def __init__(self, period, compare):
+        self.period = period
+        self.compare = compare
+        # (index, value) of the last period - 1 values that can still win
+        self.window = deque()
+        self.index = 0
+
+    def peek(self, x):
+        if self.index < self.period - 1:
+            return None
+        if self.window and self.compare(self.window[0][1], x):
+            return self.window[0][1]
+        return x
+
+    def push(self, x):
+        while self.window and not self.compare(self.window[-1][1], x):
+            self.window.pop()
+        self.window.append((self.index, x))
+        self.index += 1
+        if self.window[0][0] <= self.index - self.period:
+            self.window.popleft()
+
+    def load(self, xs):
+        start = max(len(xs) - (self.period - 1), 0)
+        self.window = deque()
+        self.index = start
+        for x in xs[start:]:
+            self.push(float(x))
+
+
+class Indicator(object):
+    """Class for the base of the candle indicators.
+
+    :meth:`update` takes the candles of one (active, size) in time order,
+    the live candle as often as it changes. :attr:`value` is the value for
+    the last candle given, None while there are too few candles.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.__live = None
+
+    def update(self, candle):
+        """Method to add a candle or update the live one.
+
+        :param dict candle: The candle with ``from``, ``open``, ``close``,
+            ``min``, ``max``.
+
+        :returns: The new value.
+        """
+        live = self.__live
+        if live is not None:
+            if candle["from"] < live["from"]:
+                return self.value
+            if candle["from"] > live["from"]:
+                self._push(live)
+        self.__live = candle
+        self.value = self._peek(candle)
+        return self.value
+
+    def _peek(self, candle):
+        raise NotImplementedError
+
+    def _push(self, candle):
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    def __init__(self, period=20):
+        super(SMA, self).__init__()
+        self._sma = _Sma(period)
+
+    def _peek(self, candle):
+        return self._sma.peek(candle["close"])
+
+    def _push(self, candle):
+        self._sma.push(candle["close"])
+
+
+class EMA(Indicator):
+    def __init__(self, period=20):
+        super(EMA, self).__init__()
+        self._ema = _Ema(period)
+
+    def _peek(self, candle):
+        return self._ema.peek(candle["close"])
+
+    def _push(self, candle):
+        self._ema.push(candle["close"])
+
+
+class RSI(Indicator):
+    """Class for Wilder's relative strength index, 0 to 100."""
+
+    def __init__(self, period=14):
+        super(RSI, self).__init__()
+        self._gain = _Rma(period)
+        self._loss = _Rma(period)
+        self._close = None
+
+    def _peek(self, candle):
+        if self._close is None:
+            return None
+        change = candle["close"] - self._close
+        gain = self._gain.peek(max(change, 0.0))
+        loss = self._loss.peek(max(-change, 0.0))
+        if gain is None:
+            return None
+        if loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def _push(self, candle):
+        if self._close is not None:
+            change = candle["close"] - self._close
+            self._gain.push(max(change, 0.0))
+            self._loss.push(max(-change, 0.0))
+        self._close = candle["close"]
+
+
+class MACD(Indicator):
+    """Class for the MACD, the value is a dict of macd, signal and histogram."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        super(MACD, self).__init__()
+        self._fast = _Ema(fast)
+        self._slow = _Ema(slow)
+        self._signal = _Ema(signal)
+
+    def __line(self, close):
+        fast = self._fast.peek(close)
+        slow = self._slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        return fast - slow
+
+    def _peek(self, candle):
+        macd = self.__line(candle["close"])
+        if macd is None:
+            return None
+        signal = self._signal.peek(macd)
+        return {
+            "macd": macd,
+            "signal": signal,
+            "histogram": None if signal is None else macd - signal,
+        }
+
+    def _push(self, candle):
+        macd = self.__line(candle["close"])
+        self._fast.push(candle["close"])
+        self._slow.push(candle["close"])
+        if macd is not None:
+            self._signal.push(macd)
+
+
+class BollingerBands(Indicator):
+    """Class for the Bollinger bands, the value is a dict of middle, upper and lower."""
+
+    def __init__(self, period=20, deviations=2.0):
+        super(BollingerBands, self).__init__()
+        self.deviations = deviations
+        self._deviation = _Deviation(period)
+
+    def _peek(self, candle):
+        band = self._deviation.peek(candle["close"])
+        if band is None:
+            return None
+        mean, deviation = band
+        return {
+            "middle": mean,
+            "upper": mean + self.deviations * deviation,
+            "lower": mean - self.deviations * deviation,
+        }
+
+    def _push(self, candle):
+        self._deviation.push(candle["close"])
+
+
+class ATR(Indicator):
+    """Class for Wilder's average true range."""
+
+    def __init__(self, period=14):
+        super(ATR, self).__init__()
+        self._range = _Rma(period)
+        self._close = None
+
+    def __true_range(self, candle):
+        if self._close is None:
+            return candle["max"] - candle["min"]
+        return max(candle["max"], self._close) - min(candle["min"], self._close)
+
+    def _peek(self, candle):
+        return self._range.peek(self.__true_range(candle))
+
+    def _push(self, candle):
+        self._range.push(self.__true_range(candle))
+        self._close = candle["close"]
+
+
+class Stochastic(Indicator):
+    """Class for the stochastic oscillator, the value is a dict of k and d."""
+
+    def __init__(self, k_period=14, d_period=3):
+        super(Stochastic, self).__init__()
+        self._high = _Extreme(k_period, lambda a, b: a >= b)
+        self._low = _Extreme(k_period, lambda a, b: a <= b)
+        self._d = _Sma(d_period)
+
+    def __k(self, candle):
+        high = self._high.peek(candle["max"])
+        low = self._low.peek(candle["min"])
+        if high is None:
+            return None
+        if high == low:
+            return 50.0
+        return 100.0 * (candle["close"] - low) / (high - low)
+
+    def _peek(self, candle):
+        k = self.__k(candle)
+        if k is None:
+            return None
+        return {"k": k, "d": self._d.peek(k)}
+
+    def _push(self, candle):
+        k = self.__k(candle)
+        self._high.push(candle["max"])
+        self._low.push(candle["min"])
+        if k is not None:
+            self._d.push(k)
+
+
+# indicator name -> class, the names of IndicatorEngine
+INDICATORS = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "macd": MACD,
+    "bollinger": BollingerBands,
+    "atr": ATR,
+    "stochastic": Stochastic,
+}
+
+
+class IndicatorEngine(object):
+    """Class for the indicators of many (active, size) fed by the candle stream.
+
+    Indicators are keyed by ``(active, size, name, params)``. The websocket
+    thread updates them from ``candle-generated``/``candles-generated``
+    through :meth:`on_message`; :meth:`get` reads their last value without
+    locking. The table is replaced on change, never modified in place.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # (active, size) -> {(name, params): indicator}
+        self.__indicators = {}
+
+    @staticmethod
+    def key(name, params):
+        return name, tuple(sorted(params.items()))
+
+    def add(self, active, size, name, candles=(), indicator=None, **params):
+        """Method to add an indicator, or get the one already added.
+
+        :param str active: The active name.
+        :param int size: The candle size in seconds.
+        :param str name: The indicator, a key of :data:`INDICATORS`.
+        :param list candles: (optional) The candles to warm it up with,
+            oldest first.
+        :param indicator: (optional) The indicator already warmed up, e.g.
+            by :func:`resume <iqoptionapi.indicators.batch.resume>`, used
+            instead of ``candles``.
+        :param params: The parameters of the indicator class.
+
+        :returns: The indicator.
+        """
+        stream = (str(active), int(size))
+        key = self.key(name, params)
+        added = self.__indicators.get(stream, {}).get(key)
+        if added is not None:
+            return added
+        if indicator is None:
+            indicator = INDICATORS[name](**params)
+            for candle in candles:
+                indicator.update(candle)
+        with self.__lock:
+            indicators = dict(self.__indicators.get(stream, {}))
+            indicator = indicators.setdefault(key, indicator)
+            table = dict(self.__indicators)
+            table[stream] = indicators
+            self.__indicators = table
+        return indicator
+
+    def remove(self, active, size, name, **params):
+        stream = (str(active), int(size))
+        with self.__lock:
+            indicators = dict(self.__indicators.get(stream, {}))
+            if indicators.pop(self.key(name, params), None) is None:
+                return False
+            table = dict(self.__indicators)
+            if indicators:
+                table[stream] = indicators
+            else:
+                del table[stream]
+            self.__indicators = table
+        return True
+
+    def get(self, active, size, name, **params):
+        """Method to get the value of an indicator, None if it was not added."""
+        indicator = self.__indicators.get((str(active), int(size)), {}).get(self.key(name, params))
+        if indicator is None:
+            return None
+        return indicator.value
+
+    def values(self, active, size):
+        """Method to get ``{(name, params): value}`` of an (active, size)."""
+        return {key: indicator.value
+                for key, indicator in self.__indicators.get((str(active), int(size)), {}).items()}
+
+    def update(self, active, size, candle):
+        """Method to feed a candle of an (active, size) to its indicators."""
+        indicators = self.__indicators.get((str(active), int(size)))
+        if indicators:
+            for indicator in indicators.values():
+                indicator.update(candle)
+
+    def on_message(self, api, message):
+        """Method to feed a ``candle-generated`` or ``candles-generated`` message."""
+        # pylint: disable=unused-argument
+        msg = message["msg"]
+        if not self.__indicators:
+            return
+        active = ACTIVE_REGISTRY.get_name(msg["active_id"])
+        if message["name"] == "candle-generated":
+            self.update(active, msg["size"], msg)
+        else:
+            # the built-in handler already filled in close
+            for size, candle in msg["candles"].items():
+                self.update(active, size, candle)
@@ -0,0 +1,20 @@
+"""Module for the optional dependencies of IQ Option API.
+
+numpy is only needed by the candle store and files, the batch indicators
+and the digital portfolio; ``pip install iqoptionapi[numpy]`` adds it.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def check_numpy(feature):
+    """Function to fail early when numpy is missing.
+
+    :param str feature: The feature needing numpy, named in the error.
+
+    :raises ImportError: If numpy is not installed.
+    """
+    if np is None:
+        raise ImportError("numpy is required for " + feature + ", pip install numpy")
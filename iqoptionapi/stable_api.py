@@ -1,19 +1,35 @@
 # python
 from iqoptionapi.api import IQOptionAPI
+from iqoptionapi.active_registry import ACTIVE_REGISTRY, CACHE_FILE
 import iqoptionapi.constants as OP_code
 import iqoptionapi.country_id as Country
 import threading
 import time
+import concurrent.futures
 import json
 import logging
 import operator
 import iqoptionapi.global_value as global_value
 from collections import defaultdict
 from collections import deque
+from iqoptionapi.ws.codec import get_codec
+from iqoptionapi.ws import subscriptions
+from iqoptionapi.ws.objects.reference_data import ReferenceData
+from iqoptionapi.candles.store import CandleStore
+from iqoptionapi.candles.downloader import CandleDownloader
+from iqoptionapi.candles.database import CandleDatabase
+from iqoptionapi.candles.mmap_file import CandleRecorder, CANDLE_DIR
+from iqoptionapi.candles.resample import CandleResampler
+from iqoptionapi.candles.callbacks import CandleCallbacks
+from iqoptionapi.candles.snapshot import CandleSnapshot
+from iqoptionapi.candles.streams import StreamStart
+from iqoptionapi.indicators.streaming import IndicatorEngine
+from iqoptionapi.digital.quotes import QuoteBook
+from iqoptionapi.digital.valuation import DigitalPortfolio
+import iqoptionapi.indicators.batch as batch_indicators
 from iqoptionapi.expiration import get_expiration_time, get_remaning_time
 from iqoptionapi.version_control import api_version
 from datetime import datetime, timedelta
-from random import randint
 
 
 def nested_dict(n, type):
@@ -26,21 +42,48 @@ def nested_dict(n, type):
 class IQ_Option:
     __version__ = api_version
 
-    def __init__(self, email, password, active_account_type="PRACTICE"):
+    def __init__(self, email, password, active_account_type="PRACTICE", codec=None, timeout=30,
+                 max_in_flight=None, reference_data_ttl=300, candle_store=False):
         self.size = [1, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800,
                      3600, 7200, 14400, 28800, 43200, 86400, 604800, 2592000]
         self.email = email
         self.password = password
         self.suspend = 0.5
+        # seconds to wait for the response of a websocket request
+        self.timeout = timeout
+        # requests waiting for a response before senders block, None = no limit
+        self.max_in_flight = max_in_flight
+        # seconds the init payloads behind get_all_init/get_all_profit are reused
+        self.reference_data_ttl = reference_data_ttl
+        # the cached init payloads of this account, kept across reconnects
+        self.reference_data = ReferenceData()
+        # the digital quote tables of this account, kept across reconnects
+        self.digital_quotes = QuoteBook()
+        # keep streamed candles in numpy ring buffers instead of nested dicts
+        self.candle_store = CandleStore() if candle_store else None
+        # CandleDatabase of get_candles_range, opened on first use
+        self.candle_database = None
+        self.candle_recorder = None
+        # ACTIVE -> CandleResampler of start_candles_stream_resampled
+        self.candle_resamplers = {}
+        # IndicatorEngine of add_indicator, fed by the candle streams
+        self.indicator_engine = None
+        # CandleCallbacks of on_candle
+        self.candle_callbacks = None
+        # DigitalPortfolio of start_digital_portfolio
+        self.digital_portfolio = None
+        # (ACTIVE, size) -> last CandleSnapshot of get_realtime_candles
+        self.__candle_snapshots = {}
         self.thread = None
-        self.subscribe_candle = []
-        self.subscribe_candle_all_size = []
-        self.subscribe_mood = []
+        # the streams subscribed by this client, sent again on reconnect
+        self.subscriptions = subscriptions.SubscriptionManager()
         self.subscribe_indicators = []
+        self.message_handlers = []
+        self.decode_overrides = {}
+        # "json" (default), "orjson", "ujson", "msgspec" or "auto"
+        self.codec = get_codec(codec)
         # for digit
         self.get_digital_spot_profit_after_sale_data = nested_dict(2, int)
-        self.get_realtime_strike_list_temp_data = {}
-        self.get_realtime_strike_list_temp_expiration = 0
         self.SESSION_HEADER = {
             "User-Agent": r"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/66.0.3359.139 Safari/537.36"}
         self.SESSION_COOKIE = {}
@@ -51,28 +94,47 @@ class IQ_Option:
 
     # --------------------------------------------------------------------------
 
+    def __wait_response(self, future, name, timeout=None):
+        """Wait for the future of a request sent with send_request.
+
+        :returns: The value the response handler resolved the future with,
+            None on timeout or disconnect.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.api.inflight.discard(future.request_id)
+            logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+        except concurrent.futures.CancelledError:
+            logging.error('**warning** ' + name + ' cancelled, connection closed')
+        return None
+
+    def __wait_event(self, topic, predicate, name, timeout=None):
+        """Sleep until predicate() is true, re-checked on every topic message.
+
+        :returns: True, or False after logging a warning on timeout.
+        """
+        if self.api.message_events.wait_for(topic, predicate, timeout):
+            return True
+        logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+        return False
+
     def get_server_timestamp(self):
         return self.api.timesync.server_timestamp
 
     def re_subscribe_stream(self):
-        try:
-            for ac in self.subscribe_candle:
-                sp = ac.split(",")
-                self.start_candles_one_stream(sp[0], sp[1])
-        except:
-            pass
-        # -----------------
-        try:
-            for ac in self.subscribe_candle_all_size:
-                self.start_candles_all_size_stream(ac)
-        except:
-            pass
-        # -------------reconnect subscribe_mood
-        try:
-            for ac in self.subscribe_mood:
-                self.start_mood_stream(ac)
-        except:
-            pass
+        self.subscriptions.resubscribe(self.api)
+
+    def get_subscriptions(self):
+        """Get the streams subscribed, see :class:`SubscriptionManager
+        <iqoptionapi.ws.subscriptions.SubscriptionManager>`.
+
+        :returns: The list of ``(msg, consumers)``, ``msg`` being the msg of
+            the subscribeMessage.
+        """
+        return self.subscriptions.streams()
 
     def set_session(self, header, cookie):
         self.SESSION_HEADER = header
@@ -86,7 +148,14 @@ class IQ_Option:
             # logging.error('**warning** self.api.close() fail')
 
         self.api = IQOptionAPI(
-            "iqoption.com", self.email, self.password)
+            "iqoption.com", self.email, self.password, codec=self.codec,
+            max_in_flight=self.max_in_flight, timeout=self.timeout)
+        for name, handler, microservice_name in self.message_handlers:
+            self.api.add_message_handler(name, handler, microservice_name)
+        self.api.decode_overrides = self.decode_overrides
+        self.api.candle_store = self.candle_store
+        self.api.reference_data = self.reference_data
+        self.api.digital_quotes = self.digital_quotes
         check = None
 
         # 2FA--
@@ -107,14 +176,15 @@ class IQ_Option:
             self.re_subscribe_stream()
 
             # ---------for async get name: "position-changed", microserviceName
-            while global_value.balance_id == None:
-                pass
+            if not self.__wait_event("profile", lambda: global_value.balance_id != None,
+                                     "balance_id", self.timeout):
+                return False, "balance_id late " + str(self.timeout) + " sec"
 
             self.position_change_all(
                 "subscribeMessage", global_value.balance_id)
 
             self.order_changed_all("subscribeMessage")
-            self.api.setOptions(1, True)
+            self.api.setOptions(self.api.request_ids.allocate(), True)
 
             """
             self.api.subscribe_position_changed(
@@ -165,6 +235,58 @@ class IQ_Option:
             return True
         # wait for timestamp getting
 
+    # _________________________message handlers_____________________
+    def add_message_handler(self, name, handler, microservice_name=None):
+        """Register handler(api, message) for the websocket message name.
+
+        The handler is kept across reconnects and runs after the built-in
+        handler for the same name.
+        """
+        self.message_handlers.append((name, handler, microservice_name))
+        try:
+            self.api.add_message_handler(name, handler, microservice_name)
+        except AttributeError:
+            # not connected yet, connect() will register it
+            pass
+
+    def remove_message_handler(self, name, handler, microservice_name=None):
+        try:
+            self.message_handlers.remove((name, handler, microservice_name))
+        except ValueError:
+            return False
+        try:
+            self.api.remove_message_handler(name, handler, microservice_name)
+        except AttributeError:
+            pass
+        return True
+
+    def set_message_decode(self, name, decode=None):
+        """Switch the skip-decode filter for one websocket message name.
+
+        False drops the frames before JSON decoding, True always decodes
+        them, None restores the default (decode only if a handler exists).
+        """
+        if decode is None:
+            self.decode_overrides.pop(name, None)
+        else:
+            self.decode_overrides[name] = bool(decode)
+
+    def get_skipped_frames(self):
+        """Return (total, {name: count}) of frames dropped before decoding."""
+        try:
+            client = self.api.websocket_client
+            return client.skipped_frames, dict(client.skipped_frames_by_name)
+        except AttributeError:
+            return 0, {}
+
+    def get_inflight_requests(self):
+        """Return {request_id: age in seconds} of the requests waiting for a response."""
+        return self.api.inflight.ages()
+
+    def get_send_stats(self):
+        """Return the queue depth, counters and send latency of the websocket writer."""
+        return self.api.websocket_writer.stats()
+
     # _________________________UPDATE ACTIVES OPCODE_____________________
     def get_all_ACTIVES_OPCODE(self):
         return OP_code.ACTIVES
@@ -177,7 +299,33 @@ class IQ_Option:
         dicc = {}
         for lis in sorted(OP_code.ACTIVES.items(), key=operator.itemgetter(1)):
             dicc[lis[0]] = lis[1]
-        OP_code.ACTIVES = dicc
+        ACTIVE_REGISTRY.update(dicc)
+
+    def load_ACTIVES_OPCODE(self, cache_file=CACHE_FILE, ttl=86400):
+        """Fill constants.ACTIVES from the cache file instead of the server.
+
+        A missing or outdated file is rebuilt with update_ACTIVES_OPCODE
+        before returning; a file older than ttl seconds is used right away
+        and refreshed in a background thread.
+
+        :returns: The age in seconds of the loaded data.
+        """
+        age = ACTIVE_REGISTRY.load(cache_file)
+        if age is None:
+            self.__refresh_ACTIVES_cache(cache_file)
+            return 0
+        if age > ttl:
+            refresh = threading.Thread(target=self.__refresh_ACTIVES_cache, args=(cache_file,))
+            refresh.daemon = True
+            refresh.start()
+        return age
+
+    def __refresh_ACTIVES_cache(self, cache_file):
+        self.update_ACTIVES_OPCODE()
+        try:
+            ACTIVE_REGISTRY.save(cache_file)
+        except OSError as e:
+            logging.error('**warning** actives cache not saved: ' + str(e))
 
     def get_name_by_activeId(self, activeId):
         info = self.get_financial_information(activeId)
@@ -187,42 +335,38 @@ class IQ_Option:
             return None
 
     def get_financial_information(self, activeId):
-        self.api.financial_information = None
-        self.api.get_financial_information(activeId)
-        while self.api.financial_information == None:
-            pass
-        return self.api.financial_information
+        return self.__wait_response(
+            self.api.get_financial_information(activeId), "get_financial_information")
 
     def get_leader_board(self, country, from_position, to_position, near_traders_count, user_country_id=0, near_traders_country_count=0, top_country_count=0, top_count=0, top_type=2):
-        self.api.leaderboard_deals_client = None
-
         country_id = Country.ID[country]
-        self.api.Get_Leader_Board(country_id, user_country_id, from_position, to_position,
-                                  near_traders_country_count, near_traders_count, top_country_count, top_count, top_type)
-
-        while self.api.leaderboard_deals_client == None:
-            pass
-        return self.api.leaderboard_deals_client
+        future = self.api.Get_Leader_Board(country_id, user_country_id, from_position, to_position,
+                                           near_traders_country_count, near_traders_count, top_country_count, top_count, top_type)
+        return self.__wait_response(future, "get_leader_board")
 
     def get_instruments(self, type):
         # type="crypto"/"forex"/"cfd"
         time.sleep(self.suspend)
-        self.api.instruments = None
-        while self.api.instruments == None:
+        instruments = None
+        while instruments == None:
             try:
-                self.api.get_instruments(type)
-                start = time.time()
-                while self.api.instruments == None and time.time() - start < 10:
-                    pass
+                instruments = self.__wait_response(
+                    self.api.get_instruments(type), "get_instruments", 10)
             except:
                 logging.error('**error** api.get_instruments need reconnect')
                 self.connect()
-        return self.api.instruments
+        return instruments
 
     def instruments_input_to_ACTIVES(self, type):
         instruments = self.get_instruments(type)
+        actives = dict(OP_code.ACTIVES)
+        details = {}
         for ins in instruments["instruments"]:
-            OP_code.ACTIVES[ins["id"]] = ins["active_id"]
+            actives[ins["id"]] = ins["active_id"]
+            details[ins["id"]] = {"type": type,
+                                  "enabled": ins.get("enabled", True),
+                                  "suspended": ins.get("is_suspended", False)}
+        ACTIVE_REGISTRY.update(actives, details)
 
     def instruments_input_all_in_ACTIVES(self):
         self.instruments_input_to_ACTIVES("crypto")
@@ -231,53 +375,49 @@ class IQ_Option:
 
     def get_ALL_Binary_ACTIVES_OPCODE(self):
         init_info = self.get_all_init()
+        actives = dict(OP_code.ACTIVES)
         for dirr in (["binary", "turbo"]):
+            details = {}
             for i in init_info["result"][dirr]["actives"]:
-                OP_code.ACTIVES[(init_info["result"][dirr]
-                                 ["actives"][i]["name"]).split(".")[1]] = int(i)
+                active = init_info["result"][dirr]["actives"][i]
+                name = active["name"].split(".")[1]
+                actives[name] = int(i)
+                details[name] = {"type": dirr,
+                                 "enabled": active.get("enabled", True),
+                                 "suspended": active.get("is_suspended", False)}
+            ACTIVE_REGISTRY.update(dict(actives), details)
 
     # _________________________self.api.get_api_option_init_all() wss______________________
     def get_all_init(self):
+        init_info = self.reference_data.get_init_all(self.reference_data_ttl)
+        if init_info is not None:
+            return init_info
 
         while True:
-            self.api.api_option_init_all_result = None
             while True:
                 try:
-                    self.api.get_api_option_init_all()
+                    future = self.api.get_api_option_init_all()
                     break
                 except:
                     logging.error('**error** get_all_init need reconnect')
                     self.connect()
                     time.sleep(5)
-            start = time.time()
-            while True:
-                if time.time() - start > 30:
-                    logging.error('**warning** get_all_init late 30 sec')
-                    break
-                try:
-                    if self.api.api_option_init_all_result != None:
-                        break
-                except:
-                    pass
+            init_info = self.__wait_response(future, "get_all_init", 30)
             try:
-                if self.api.api_option_init_all_result["isSuccessful"] == True:
-                    return self.api.api_option_init_all_result
+                if init_info["isSuccessful"] == True:
+                    return init_info
             except:
                 pass
 
     def get_all_init_v2(self):
-        self.api.api_option_init_all_result_v2 = None
-
+        init_info = self.reference_data.get_initialization_data(self.reference_data_ttl)
+        if init_info is not None:
+            return init_info
         if self.check_connect() == False:
             self.connect()
 
-        self.api.get_api_option_init_all_v2()
-        start_t = time.time()
-        while self.api.api_option_init_all_result_v2 == None:
-            if time.time() - start_t >= 30:
-                logging.error('**warning** get_all_init_v2 late 30 sec')
-                return None
-        return self.api.api_option_init_all_result_v2
+        return self.__wait_response(
+            self.api.get_api_option_init_all_v2(), "get_all_init_v2", 30)
 
         # return OP_code.ACTIVES
 
@@ -303,8 +443,10 @@ class IQ_Option:
 
     def __get_digital_open(self):
         # for digital options
-        digital_data = self.get_digital_underlying_list_data()["underlying"]
-        for digital in digital_data:
+        digital_data = self.get_digital_underlying_list_data()
+        if digital_data is None:
+            return
+        for digital in digital_data["underlying"]:
             name = digital["underlying"]
             schedule = digital["schedule"]
             self.OPEN_TIME["digital"][name]["open"] = False
@@ -343,9 +485,16 @@ class IQ_Option:
 
     # --------for binary option detail
 
+    def invalidate_reference_data(self):
+        """Drop the cached init payloads, the next get_all_init fetches them again."""
+        self.reference_data.invalidate()
+
     def get_binary_option_detail(self):
+        return self.reference_data.table("detail", self.__binary_option_detail, self.get_all_init())
+
+    @staticmethod
+    def __binary_option_detail(init_info):
         detail = nested_dict(2, dict)
-        init_info = self.get_all_init()
         for actives in init_info["result"]["turbo"]["actives"]:
             name = init_info["result"]["turbo"]["actives"][actives]["name"]
             name = name[name.index(".") + 1:len(name)]
@@ -355,11 +504,15 @@ class IQ_Option:
             name = init_info["result"]["binary"]["actives"][actives]["name"]
             name = name[name.index(".") + 1:len(name)]
             detail[name]["binary"] = init_info["result"]["binary"]["actives"][actives]
-        return detail
+        # plain dicts, a lookup of a missing name must not add it to the cache
+        return {name: dict(types) for name, types in detail.items()}
 
     def get_all_profit(self):
+        return self.reference_data.table("profit", self.__all_profit, self.get_all_init())
+
+    @staticmethod
+    def __all_profit(init_info):
         all_profit = nested_dict(2, dict)
-        init_info = self.get_all_init()
         for actives in init_info["result"]["turbo"]["actives"]:
             name = init_info["result"]["turbo"]["actives"][actives]["name"]
             name = name[name.index(".") + 1:len(name)]
@@ -375,15 +528,15 @@ class IQ_Option:
                 100.0 -
                 init_info["result"]["binary"]["actives"][actives]["option"]["profit"][
                     "commission"]) / 100.0
-        return all_profit
+        return {name: dict(types) for name, types in all_profit.items()}
 
     # ----------------------------------------
 
     # ______________________________________self.api.getprofile() https________________________________
 
-    def get_profile_ansyc(self):
-        while self.api.profile.msg == None:
-            pass
+    def get_profile_ansyc(self, timeout=None):
+        self.__wait_event("profile", lambda: self.api.profile.msg != None,
+                          "get_profile_ansyc", timeout or self.timeout)
         return self.api.profile.msg
 
     """def get_profile(self):
@@ -401,6 +554,9 @@ class IQ_Option:
 
     def get_currency(self):
         balances_raw = self.get_balances()
+        if balances_raw is None:
+            # late or connection closed, logged by get_balances
+            return None
         for balance in balances_raw["msg"]:
             if balance["id"] == global_value.balance_id:
                 return balance["currency"]
@@ -424,20 +580,22 @@ class IQ_Option:
     def get_balance(self):
 
         balances_raw = self.get_balances()
+        if balances_raw is None:
+            # late or connection closed, logged by get_balances
+            return None
         for balance in balances_raw["msg"]:
             if balance["id"] == global_value.balance_id:
                 return balance["amount"]
 
     def get_balances(self):
-        self.api.balances_raw = None
-        self.api.get_balances()
-        while self.api.balances_raw == None:
-            pass
-        return self.api.balances_raw
+        return self.__wait_response(self.api.get_balances(), "get_balances")
 
     def get_balance_mode(self):
         # self.api.profile.balance_type=None
         profile = self.get_profile_ansyc()
+        if profile is None:
+            # the profile is late, logged by get_profile_ansyc
+            return None
         for balance in profile.get("balances"):
             if balance["id"] == global_value.balance_id:
                 if balance["type"] == 1:
@@ -449,11 +607,8 @@ class IQ_Option:
                     return "TOURNAMENT"
 
     def reset_practice_balance(self):
-        self.api.training_balance_reset_request = None
-        self.api.reset_training_balance()
-        while self.api.training_balance_reset_request == None:
-            pass
-        return self.api.training_balance_reset_request
+        return self.__wait_response(
+            self.api.reset_training_balance(), "reset_practice_balance")
 
     def position_change_all(self, Main_Name, user_balance_id):
         instrument_type = ["cfd", "forex", "crypto",
@@ -483,7 +638,11 @@ class IQ_Option:
         practice_id = None
         tournament_id = None
 
-        for balance in self.get_profile_ansyc()["balances"]:
+        profile = self.get_profile_ansyc()
+        if profile is None:
+            logging.error('**error** change_balance no profile, balance not changed')
+            return False
+        for balance in profile["balances"]:
             if balance["type"] == 1:
                 real_id = balance["id"]
             if balance["type"] == 4:
@@ -510,23 +669,69 @@ class IQ_Option:
     # ________________________self.api.getcandles() wss________________________
 
     def get_candles(self, ACTIVES, interval, count, endtime):
-        self.api.candles.candles_data = None
+        candles = None
         while True:
             try:
                 if ACTIVES not in OP_code.ACTIVES:
                     print('Asset {} not found on consts'.format(ACTIVES))
                     break
-                self.api.getcandles(
-                    OP_code.ACTIVES[ACTIVES], interval, count, endtime)
-                while self.check_connect and self.api.candles.candles_data == None:
-                    pass
-                if self.api.candles.candles_data != None:
+                candles = self.__wait_response(self.api.getcandles(
+                    OP_code.ACTIVES[ACTIVES], interval, count, endtime), "get_candles")
+                if candles != None:
                     break
             except:
                 logging.error('**error** get_candles need reconnect')
                 self.connect()
 
-        return self.api.candles.candles_data
+        return candles
+
+    def download_candles(self, ACTIVES, interval, start, end, chunk_size=1000, max_pending=16):
+        """Download the candles of a long range with pipelined requests.
+
+        :param ACTIVES: The active name, or a list of names filled concurrently.
+        :param int interval: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+        :param int chunk_size: (optional) The candles per request.
+        :param int max_pending: (optional) The requests awaiting a response at once.
+
+        :returns: The generator of candle lists, oldest first, for one
+            active; of ``(active, candles)`` for a list of actives.
+        """
+        downloader = CandleDownloader(self.api, chunk_size=chunk_size,
+                                      max_pending=max_pending, timeout=self.timeout)
+        if isinstance(ACTIVES, str):
+            return downloader.download(ACTIVES, interval, start, end)
+        return downloader.download_many(ACTIVES, interval, start, end)
+
+    def get_candles_range(self, ACTIVES, interval, start, end, database=None, max_pending=16):
+        """Get the candles of a range from the local candle database.
+
+        Only the parts of the range missing in the database are downloaded
+        and stored; a range downloaded before is returned without a request.
+
+        :param ACTIVES: The active name, or a list of names.
+        :param int interval: The candle size in seconds.
+        :param int start: The timestamp of the first candle.
+        :param int end: The timestamp of the last candle.
+        :param database: (optional) The :class:`CandleDatabase
+            <iqoptionapi.candles.database.CandleDatabase>`, by default the
+            one in ``~/.iqoptionapi/candles.sqlite3``.
+        :param int max_pending: (optional) The requests awaiting a response at once.
+
+        :returns: The list of candles, oldest first, for one active; a dict
+            of active -> candles for a list of actives.
+        """
+        if database is None:
+            if self.candle_database is None:
+                self.candle_database = CandleDatabase()
+            database = self.candle_database
+        actives = [ACTIVES] if isinstance(ACTIVES, str) else list(ACTIVES)
+        downloader = CandleDownloader(self.api, max_pending=max_pending, timeout=self.timeout)
+        database.sync(downloader, actives, interval, start, end)
+        if isinstance(ACTIVES, str):
+            return database.query(ACTIVES, interval, start, end)
+        return {active: database.query(active, interval, start, end) for active in actives}
 
     #######################################################
     # ______________________________________________________
@@ -559,17 +764,246 @@ class IQ_Option:
             logging.error(
                 '**error** start_candles_stream please input right size')
 
+    def start_streams(self, streams, maxdict, timeout=20, max_pending=16):
+        """Start many candle streams at once without waiting for them.
+
+        The same as start_candles_stream for every stream, but the history
+        of all of them is downloaded with pipelined requests and every
+        stream is subscribed as soon as its own history is in, on a
+        background thread; the streams a response completes are
+        acquired together and sent with one flush.
+
+        :param list streams: The ``(ACTIVE, size)`` of the streams, size
+            being a candle size or ``"all"``.
+        :param int maxdict: The candles kept per stream.
+        :param timeout: (optional) The seconds a stream may wait for its
+            first candle after subscribing.
+        :param int max_pending: (optional) The history requests awaiting a
+            response at once.
+
+        :returns: The :class:`StreamStart <iqoptionapi.candles.streams.StreamStart>`,
+            whose futures complete on the first candle of each stream.
+        """
+        handle = StreamStart(streams)
+        for key in handle.streams:
+            ACTIVE, size = key
+            if ACTIVE not in OP_code.ACTIVES:
+                handle.fail(key, ValueError("unknown active " + ACTIVE))
+            elif size != "all" and size not in self.size:
+                handle.fail(key, ValueError("unknown candle size " + str(size)))
+        self.add_message_handler("candle-generated", handle.on_message)
+        self.add_message_handler("candles-generated", handle.on_message)
+        thread = threading.Thread(target=self.__start_streams,
+                                  args=(handle, maxdict, timeout, max_pending),
+                                  name="start-streams")
+        thread.daemon = True
+        thread.start()
+        return handle
+
+    def stop_streams(self, streams):
+        """Stop the streams of start_streams.
+
+        :param streams: The :class:`StreamStart <iqoptionapi.candles.streams.StreamStart>`,
+            or the list of ``(ACTIVE, size)``.
+        """
+        if isinstance(streams, StreamStart):
+            streams = streams.subscribed()
+        for ACTIVE, size in streams:
+            self.stop_candles_stream(ACTIVE, size)
+
+    def __start_streams(self, handle, maxdict, timeout, max_pending):
+        try:
+            self.__warm_up_streams(handle, maxdict, timeout, max_pending)
+            subscribed = handle.subscribed()
+            for key in handle.pending():
+                if key not in subscribed:
+                    # the download stopped early, e.g. on disconnect
+                    handle.fail(key, RuntimeError("history of " + str(key) + " not downloaded"))
+            remaining = handle.expire(timeout)
+            while remaining is not None:
+                concurrent.futures.wait([handle.future(*key) for key in handle.pending()],
+                                        remaining, concurrent.futures.FIRST_COMPLETED)
+                remaining = handle.expire(timeout)
+        except Exception as e:
+            for key in handle.pending():
+                handle.fail(key, e)
+        finally:
+            self.remove_message_handler("candle-generated", handle.on_message)
+            self.remove_message_handler("candles-generated", handle.on_message)
+
+    def __warm_up_streams(self, handle, maxdict, timeout, max_pending):
+        end = self.api.timesync.server_timestamp
+        downloader = CandleDownloader(self.api, max_pending=max_pending, timeout=self.timeout)
+        # size -> ACTIVE -> the streams waiting for that history
+        needed = defaultdict(lambda: defaultdict(list))
+        # stream -> its histories not downloaded yet
+        missing = {}
+        for key in handle.pending():
+            ACTIVE, size = key
+            sizes = self.size if size == "all" else [size]
+            for s in sizes:
+                self.api.real_time_candles_maxdict_table[ACTIVE][s] = maxdict
+                needed[s][ACTIVE].append(key)
+            missing[key] = len(sizes)
+        for size, actives in needed.items():
+            start = end - (maxdict - 1) * size
+            chunks = {ACTIVE: len(downloader.chunks(ACTIVE, size, start, end)) for ACTIVE in actives}
+            ranges = [(ACTIVE, start, end) for ACTIVE in actives]
+            for ACTIVE, _, _, candles in downloader.download_ranges(ranges, size):
+                if candles is None:
+                    for key in actives[ACTIVE]:
+                        handle.fail(key, RuntimeError(
+                            "history of " + ACTIVE + " " + str(size) + " not downloaded"))
+                else:
+                    self.__add_history(ACTIVE, size, candles, maxdict)
+                chunks[ACTIVE] -= 1
+                if chunks[ACTIVE]:
+                    continue
+                ready = []
+                for key in actives[ACTIVE]:
+                    missing[key] -= 1
+                    if not missing[key] and not handle.future(*key).done():
+                        self.subscriptions.acquire(self.__stream_message(*key))
+                        ready.append(key)
+                if ready:
+                    self.subscriptions.flush()
+                for key in ready:
+                    handle.set_subscribed(key)
+                handle.expire(timeout)
+
+    @staticmethod
+    def __stream_message(ACTIVE, size):
+        if size == "all":
+            return subscriptions.candles_generated(OP_code.ACTIVES[ACTIVE])
+        return subscriptions.candle_generated(OP_code.ACTIVES[ACTIVE], size)
+
+    def start_candles_stream_resampled(self, ACTIVE, sizes, maxdict, base_size=None):
+        """Stream candles of several sizes built locally from one base size.
+
+        Subscribes only to the ``base_size`` candles and fetches their
+        history once, covering ``maxdict`` candles of the largest size;
+        every other size, also ones the server has no stream for such as
+        180, is aggregated from them. Read them with get_realtime_candles.
+
+        :param str ACTIVE: The active name.
+        :param list sizes: The candle sizes in seconds; the built ones up
+            to a day, weeks and months follow the calendar.
+        :param int maxdict: The candles kept per size.
+        :param int base_size: (optional) The streamed size, by default the
+            largest server size dividing every size.
+
+        :returns: True if the base stream started, False otherwise.
+        """
+        if base_size is None:
+            base_size = max((s for s in self.size if all(size % s == 0 for size in sizes)),
+                            default=None)
+        if base_size not in self.size:
+            logging.error(
+                '**error** start_candles_stream_resampled please input right size')
+            return False
+        try:
+            resampler = CandleResampler(base_size, [size for size in sizes if size != base_size])
+        except ValueError as e:
+            logging.error('**error** start_candles_stream_resampled ' + str(e))
+            return False
+        for size in [base_size] + resampler.sizes:
+            self.api.real_time_candles_maxdict_table[ACTIVE][size] = maxdict
+        end = self.api.timesync.server_timestamp
+        start = end - maxdict * max([base_size] + resampler.sizes)
+        downloader = CandleDownloader(self.api, timeout=self.timeout)
+        for candles in downloader.download(ACTIVE, base_size, start, end):
+            for candle in candles:
+                self.__add_realtime_candle(ACTIVE, base_size, candle, maxdict)
+                for size, built in resampler.add(candle):
+                    self.__add_realtime_candle(ACTIVE, size, built, maxdict)
+        if not self.candle_resamplers:
+            self.add_message_handler("candle-generated", self.__resampled_candle)
+        self.candle_resamplers[ACTIVE] = resampler
+        if self.start_candles_one_stream(ACTIVE, base_size):
+            return True
+        # the base stream is released already, drop the resampler only
+        self.candle_resamplers.pop(ACTIVE, None)
+        if not self.candle_resamplers:
+            self.remove_message_handler("candle-generated", self.__resampled_candle)
+        return False
+
+    def stop_candles_stream_resampled(self, ACTIVE):
+        resampler = self.candle_resamplers.pop(ACTIVE, None)
+        if resampler is None:
+            return
+        if not self.candle_resamplers:
+            self.remove_message_handler("candle-generated", self.__resampled_candle)
+        self.stop_candles_one_stream(ACTIVE, resampler.base_size)
+
+    def __resampled_candle(self, api, message):
+        # websocket thread, after the built-in handler stored the base candle
+        ACTIVE = ACTIVE_REGISTRY.get_name(message["msg"]["active_id"])
+        resampler = self.candle_resamplers.get(ACTIVE)
+        if resampler is None or int(message["msg"]["size"]) != resampler.base_size:
+            return
+        for size, candle in resampler.add(message["msg"]):
+            self.__add_realtime_candle(
+                ACTIVE, size, candle, api.real_time_candles_maxdict_table[ACTIVE][size])
+            if self.candle_callbacks is not None:
+                self.candle_callbacks.update(ACTIVE, size, candle)
+
+    def __add_realtime_candle(self, ACTIVE, size, candle, maxdict):
+        if self.candle_store is not None:
+            self.candle_store.add(ACTIVE, size, candle, maxdict)
+        else:
+            self.api.websocket_client.dict_queue_add(
+                self.api.real_time_candles, maxdict, ACTIVE, size, candle["from"], candle)
+        if self.indicator_engine is not None:
+            self.indicator_engine.update(ACTIVE, size, candle)
+
+    def __is_candle_size(self, ACTIVE, size):
+        resampler = self.candle_resamplers.get(ACTIVE)
+        return size in self.size or (resampler is not None and size in resampler.sizes)
+
+    def __candle_snapshot(self, ACTIVE, size):
+        key = (str(ACTIVE), int(size))
+        snapshot = self.__candle_snapshots.get(key)
+        if self.candle_store is not None:
+            buffer = self.candle_store.buffer(ACTIVE, size)
+            if snapshot is not None and snapshot.version == buffer.version:
+                return snapshot
+            version, columns = buffer.snapshot()
+            snapshot = CandleSnapshot.from_arrays(columns, version)
+        else:
+            # read the version first, the copy is at least that new
+            version = self.api.real_time_candles_version[key]
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            # dict.copy() runs without releasing the GIL, the websocket
+            # thread cannot change the dict in the middle of it
+            snapshot = CandleSnapshot(self.api.real_time_candles[key[0]][key[1]].copy(), version)
+        self.__candle_snapshots[key] = snapshot
+        return snapshot
+
     def get_realtime_candles(self, ACTIVE, size):
+        """Return a read-only snapshot of the streamed candles.
+
+        The :class:`CandleSnapshot <iqoptionapi.candles.snapshot.CandleSnapshot>`
+        is a ``{from: candle}`` mapping the websocket thread never changes;
+        call again for newer candles. Its ``version`` only changes when the
+        candles did, an unchanged window is returned without copying.
+
+        :returns: The snapshot, for size="all" a dict of size -> snapshot.
+        """
         if size == "all":
             try:
-                return self.api.real_time_candles[ACTIVE]
+                if self.candle_store is not None:
+                    sizes = self.candle_store.sizes(ACTIVE)
+                else:
+                    sizes = list(self.api.real_time_candles[ACTIVE])
+                return {s: self.__candle_snapshot(ACTIVE, s) for s in sizes}
             except:
                 logging.error(
                     '**error** get_realtime_candles() size="all" can not get candle')
                 return False
-        elif size in self.size:
+        elif self.__is_candle_size(ACTIVE, size):
             try:
-                return self.api.real_time_candles[ACTIVE][size]
+                return self.__candle_snapshot(ACTIVE, size)
             except:
                 logging.error(
                     '**error** get_realtime_candles() size=' + str(size) + ' can not get candle')
@@ -578,9 +1012,107 @@ class IQ_Option:
             logging.error(
                 '**error** get_realtime_candles() please input right "size"')
 
+    def start_candle_recorder(self, directory=CANDLE_DIR, capacity=100000):
+        """Write the streamed candles to memory-mapped candle files.
+
+        Every (active, size) of start_candles_stream gets its file
+        ``<directory>/<active>-<size>.candles``, which other processes read
+        with :class:`CandleFileReader
+        <iqoptionapi.candles.mmap_file.CandleFileReader>`.
+        """
+        if self.candle_recorder is not None:
+            return self.candle_recorder
+        self.candle_recorder = CandleRecorder(directory, capacity)
+        self.add_message_handler("candle-generated", self.candle_recorder.on_message)
+        self.add_message_handler("candles-generated", self.candle_recorder.on_message)
+        return self.candle_recorder
+
+    def stop_candle_recorder(self):
+        if self.candle_recorder is None:
+            return
+        self.remove_message_handler("candle-generated", self.candle_recorder.on_message)
+        self.remove_message_handler("candles-generated", self.candle_recorder.on_message)
+        self.candle_recorder.close()
+        self.candle_recorder = None
+
+    def on_candle(self, ACTIVE, size, callback, on_close_only=False):
+        """Call ``callback(active, size, candle, closed)`` on every candle update.
+
+        Fired by the candle streams (start_candles_stream, also the sizes of
+        start_candles_stream_resampled) instead of polling
+        get_realtime_candles. ``closed`` is True on the first update of a
+        new candle; with ``on_close_only`` the callback only runs then, with
+        the candle that closed. Callbacks run on a small thread pool, one
+        at a time per subscription, never on the websocket thread.
+
+        :returns: The :class:`CandleSubscription
+            <iqoptionapi.candles.callbacks.CandleSubscription>`.
+        """
+        if self.candle_callbacks is None:
+            self.candle_callbacks = CandleCallbacks()
+            self.add_message_handler("candle-generated", self.candle_callbacks.on_message)
+            self.add_message_handler("candles-generated", self.candle_callbacks.on_message)
+        return self.candle_callbacks.add(ACTIVE, size, callback, on_close_only)
+
+    def remove_candle_callback(self, subscription):
+        if self.candle_callbacks is None:
+            return False
+        return self.candle_callbacks.remove(subscription)
+
+    def add_indicator(self, ACTIVE, size, name, **params):
+        """Compute an indicator locally from the real-time candles.
+
+        The indicator is warmed up with the candles already streamed, so
+        start the candle stream first, and updated on every candle message.
+
+        :param str ACTIVE: The active name.
+        :param int size: The candle size in seconds.
+        :param str name: One of ``sma``, ``ema``, ``rsi``, ``macd``,
+            ``bollinger``, ``atr``, ``stochastic``.
+        :param params: The indicator parameters, e.g. ``period=14``.
+
+        :returns: The :class:`Indicator
+            <iqoptionapi.indicators.streaming.Indicator>`.
+        """
+        if self.indicator_engine is None:
+            self.indicator_engine = IndicatorEngine()
+            self.add_message_handler("candle-generated", self.indicator_engine.on_message)
+            self.add_message_handler("candles-generated", self.indicator_engine.on_message)
+        candles = self.get_realtime_candles(ACTIVE, size) or {}
+        candles = [candles[from_] for from_ in sorted(candles)]
+        indicator = None
+        if candles and batch_indicators.np is not None:
+            # warm up with the vectorized functions instead of candle by candle
+            indicator = batch_indicators.resume(name, candles, **params)
+        return self.indicator_engine.add(
+            ACTIVE, size, name, candles, indicator=indicator, **params)
+
+    def get_indicator(self, ACTIVE, size, name, **params):
+        """Return the last value of an indicator of add_indicator, None before enough candles."""
+        if self.indicator_engine is None:
+            return None
+        return self.indicator_engine.get(ACTIVE, size, name, **params)
+
+    def remove_indicator(self, ACTIVE, size, name, **params):
+        if self.indicator_engine is None:
+            return False
+        return self.indicator_engine.remove(ACTIVE, size, name, **params)
+
     def get_all_realtime_candles(self):
         return self.api.real_time_candles
 
+    def get_realtime_candles_arrays(self, ACTIVE, size):
+        """Return {column: numpy array} of the streamed candles, oldest first.
+
+        Needs IQ_Option(candle_store=True). The arrays are read-only views of
+        the ring buffer and change with the stream; the buffer's snapshot()
+        returns consistent copies.
+        """
+        buffer = self.candle_store.get(ACTIVE, size)
+        if buffer is None:
+            return None
+        return buffer.arrays()
+
     ################################################
     # ---------REAL TIME CANDLE Subset Function---------
     ################################################
@@ -589,84 +1121,72 @@ class IQ_Option:
     def full_realtime_get_candle(self, ACTIVE, size, maxdict):
         candles = self.get_candles(
             ACTIVE, size, maxdict, self.api.timesync.server_timestamp)
+        self.__add_history(ACTIVE, size, candles, maxdict)
+
+    def __add_history(self, ACTIVE, size, candles, maxdict):
+        if self.indicator_engine is not None:
+            for can in candles:
+                self.indicator_engine.update(ACTIVE, size, can)
+        if self.candle_store is not None:
+            for can in candles:
+                self.candle_store.add(ACTIVE, size, can, maxdict)
+            return
         for can in candles:
             self.api.real_time_candles[str(
                 ACTIVE)][int(size)][can["from"]] = can
+        self.api.real_time_candles_version[(str(ACTIVE), int(size))] += 1
 
     # ------------------------Subscribe ONE SIZE-----------------------
     def start_candles_one_stream(self, ACTIVE, size):
-        if (str(ACTIVE + "," + str(size)) in self.subscribe_candle) == False:
-            self.subscribe_candle.append((ACTIVE + "," + str(size)))
-        start = time.time()
-        self.api.candle_generated_check[str(ACTIVE)][int(size)] = {}
-        while True:
-            if time.time() - start > 20:
-                logging.error(
-                    '**error** start_candles_one_stream late for 20 sec')
-                return False
-            try:
-                if self.api.candle_generated_check[str(ACTIVE)][int(size)] == True:
-                    return True
-            except:
-                pass
-            try:
+        """Subscribe the candle-generated stream and wait for its first candle.
 
-                self.api.subscribe(OP_code.ACTIVES[ACTIVE], size)
-            except:
-                logging.error('**error** start_candles_stream reconnect')
-                self.connect()
-            time.sleep(1)
+        The subscribeMessage is sent right away. Every call returning True
+        must be paired with a :meth:`stop_candles_one_stream`, the stream is
+        only unsubscribed when the last consumer stops; on False it was
+        released already.
+        """
+        if self.subscriptions.acquire(
+                subscriptions.candle_generated(OP_code.ACTIVES[ACTIVE], size)) == 1:
+            self.api.candle_generated_check[str(ACTIVE)][int(size)] = {}
+            self.subscriptions.flush()
+        if self.__wait_event(
+                "candle-generated",
+                lambda: self.api.candle_generated_check[str(ACTIVE)][int(size)] == True,
+                "start_candles_one_stream " + str(ACTIVE), 20):
+            return True
+        self.stop_candles_one_stream(ACTIVE, size)
+        return False
 
     def stop_candles_one_stream(self, ACTIVE, size):
-        if ((ACTIVE + "," + str(size)) in self.subscribe_candle) == True:
-            self.subscribe_candle.remove(ACTIVE + "," + str(size))
-        while True:
-            try:
-                if self.api.candle_generated_check[str(ACTIVE)][int(size)] == {}:
-                    return True
-            except:
-                pass
+        if self.subscriptions.release(
+                subscriptions.candle_generated(OP_code.ACTIVES[ACTIVE], size)) == 0:
             self.api.candle_generated_check[str(ACTIVE)][int(size)] = {}
-            self.api.unsubscribe(OP_code.ACTIVES[ACTIVE], size)
-            time.sleep(self.suspend * 10)
+        return True
 
     # ------------------------Subscribe ALL SIZE-----------------------
 
     def start_candles_all_size_stream(self, ACTIVE):
-        self.api.candle_generated_all_size_check[str(ACTIVE)] = {}
-        if (str(ACTIVE) in self.subscribe_candle_all_size) == False:
-            self.subscribe_candle_all_size.append(str(ACTIVE))
-        start = time.time()
-        while True:
-            if time.time() - start > 20:
-                logging.error('**error** fail ' + ACTIVE +
-                              ' start_candles_all_size_stream late for 10 sec')
-                return False
-            try:
-                if self.api.candle_generated_all_size_check[str(ACTIVE)] == True:
-                    return True
-            except:
-                pass
-            try:
-                self.api.subscribe_all_size(OP_code.ACTIVES[ACTIVE])
-            except:
-                logging.error(
-                    '**error** start_candles_all_size_stream reconnect')
-                self.connect()
-            time.sleep(1)
+        """Subscribe the candles-generated stream and wait for its first candles.
+
+        Paired with :meth:`stop_candles_all_size_stream` like
+        :meth:`start_candles_one_stream`.
+        """
+        if self.subscriptions.acquire(
+                subscriptions.candles_generated(OP_code.ACTIVES[ACTIVE])) == 1:
+            self.api.candle_generated_all_size_check[str(ACTIVE)] = {}
+            self.subscriptions.flush()
+        if self.__wait_event(
+                "candles-generated",
+                lambda: self.api.candle_generated_all_size_check[str(ACTIVE)] == True,
+                "start_candles_all_size_stream " + str(ACTIVE), 20):
+            return True
+        self.stop_candles_all_size_stream(ACTIVE)
+        return False
 
     def stop_candles_all_size_stream(self, ACTIVE):
-        if (str(ACTIVE) in self.subscribe_candle_all_size) == True:
-            self.subscribe_candle_all_size.remove(str(ACTIVE))
-        while True:
-            try:
-                if self.api.candle_generated_all_size_check[str(ACTIVE)] == {}:
-                    break
-            except:
-                pass
+        if self.subscriptions.release(
+                subscriptions.candles_generated(OP_code.ACTIVES[ACTIVE])) == 0:
             self.api.candle_generated_all_size_check[str(ACTIVE)] = {}
-            self.api.unsubscribe_all_size(OP_code.ACTIVES[ACTIVE])
-            time.sleep(self.suspend * 10)
 
     # ------------------------top_assets_updated---------------------------------------------
 
@@ -699,22 +1219,24 @@ class IQ_Option:
     # -----------------traders_mood----------------------
 
     def start_mood_stream(self, ACTIVES, instrument="turbo-option"):
-        if ACTIVES in self.subscribe_mood == False:
-            self.subscribe_mood.append(ACTIVES)
+        """Subscribe the traders-mood-changed stream and wait for its first mood.
 
-        while True:
-            self.api.subscribe_Traders_mood(
-                OP_code.ACTIVES[ACTIVES], instrument)
-            try:
-                self.api.traders_mood[OP_code.ACTIVES[ACTIVES]]
-                break
-            except:
-                time.sleep(5)
+        Paired with :meth:`stop_mood_stream` like :meth:`start_candles_one_stream`.
+        """
+        self.subscriptions.acquire(
+            subscriptions.traders_mood_changed(OP_code.ACTIVES[ACTIVES], instrument))
+        self.subscriptions.flush()
+        if self.__wait_event(
+                "traders-mood-changed",
+                lambda: OP_code.ACTIVES[ACTIVES] in self.api.traders_mood,
+                "start_mood_stream " + str(ACTIVES), self.timeout):
+            return True
+        self.stop_mood_stream(ACTIVES, instrument)
+        return False
 
     def stop_mood_stream(self, ACTIVES, instrument="turbo-option"):
-        if ACTIVES in self.subscribe_mood == True:
-            del self.subscribe_mood[ACTIVES]
-        self.api.unsubscribe_Traders_mood(OP_code.ACTIVES[ACTIVES], instrument)
+        self.subscriptions.release(
+            subscriptions.traders_mood_changed(OP_code.ACTIVES[ACTIVES], instrument))
 
     def get_traders_mood(self, ACTIVES):
         # return highter %
@@ -729,33 +1251,31 @@ class IQ_Option:
     # -----------------technical_indicators----------------------
 
     def get_technical_indicators(self, ACTIVES):
-        request_id = self.api.get_Technical_indicators(
+        future = self.api.get_Technical_indicators(
             OP_code.ACTIVES[ACTIVES])
-        while self.api.technical_indicators.get(request_id) == None:
-            pass
-        return self.api.technical_indicators[request_id]
+        return self.__wait_response(future, "get_technical_indicators")
 
 ##############################################################################################
 
 
 ##############################################################################################
 
-    def check_binary_order(self, order_id):
-        while order_id not in self.api.order_binary:
-            pass
+    def check_binary_order(self, order_id, timeout=None):
+        if not self.__wait_event("option-closed", lambda: order_id in self.api.order_binary,
+                                 "check_binary_order", timeout):
+            return None
         your_order = self.api.order_binary[order_id]
         del self.api.order_binary[order_id]
         return your_order
 
-    def check_win(self, id_number):
+    def check_win(self, id_number, timeout=None):
         # 'win':win money 'equal':no win no loose   'loose':loose money
-        while True:
-            try:
-                listinfodata_dict = self.api.listinfodata.get(id_number)
-                if listinfodata_dict["game_state"] == 1:
-                    break
-            except:
-                pass
+        def closed():
+            listinfodata_dict = self.api.listinfodata.listinfodata_dict.get(id_number)
+            return listinfodata_dict != None and listinfodata_dict["game_state"] == 1
+        if not self.__wait_event("listInfoData", closed, "check_win", timeout):
+            return None
+        listinfodata_dict = self.api.listinfodata.get(id_number)
         self.api.listinfodata.delete(id_number)
         return listinfodata_dict["win"]
 
@@ -775,19 +1295,20 @@ class IQ_Option:
         # Function by kkagill ( https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/196 | https://github.com/kkagill )
         # Function only work with Options!
 
-    def check_win_v4(self, id_number):
-        while True:
-            try:
-                if self.api.socket_option_closed[id_number] != None:
-                    break
-            except:
-                pass
+    def check_win_v4(self, id_number, timeout=None):
+        if not self.__wait_event("socket-option-closed",
+                                 lambda: self.api.socket_option_closed.get(id_number) != None,
+                                 "check_win_v4", timeout):
+            return None, None
         x = self.api.socket_option_closed[id_number]
         return x['msg']['win'], (0 if x['msg']['win'] == 'equal' else float(x['msg']['sum']) * -1 if x['msg']['win'] == 'loose' else float(x['msg']['win_amount']) - float(x['msg']['sum']))
 
     def check_win_v3(self, id_number):
         while True:
             result = self.get_optioninfo_v2(10)
+            if result is None:
+                # late, logged by get_optioninfo_v2; ask again
+                continue
             if result['msg']['closed_options'][0]['id'][0] == id_number and result['msg']['closed_options'][0]['id'][0] != None:
                 return result['msg']['closed_options'][0]['win'], (result['msg']['closed_options'][0]['win_amount'] - result['msg']['closed_options'][0]['amount'] if result['msg']['closed_options'][0]['win'] != 'equal' else 0)
                 break
@@ -799,39 +1320,32 @@ class IQ_Option:
         # INPUT:int
         while True:
             self.api.game_betinfo.isSuccessful = None
-            start = time.time()
             try:
                 self.api.get_betinfo(id_number)
             except:
                 logging.error(
                     '**error** def get_betinfo  self.api.get_betinfo reconnect')
                 self.connect()
-            while self.api.game_betinfo.isSuccessful == None:
-                if time.time() - start > 10:
-                    logging.error(
-                        '**error** get_betinfo time out need reconnect')
-                    self.connect()
-                    self.api.get_betinfo(id_number)
-                    time.sleep(self.suspend * 10)
-            if self.api.game_betinfo.isSuccessful == True:
-                return self.api.game_betinfo.isSuccessful, self.api.game_betinfo.dict
-            else:
-                return self.api.game_betinfo.isSuccessful, None
-            time.sleep(self.suspend * 10)
+            if self.api.message_events.wait_for(
+                    "api_game_betinfo_result",
+                    lambda: self.api.game_betinfo.isSuccessful != None, 10):
+                break
+            logging.error(
+                '**error** get_betinfo time out need reconnect')
+            self.connect()
+        if self.api.game_betinfo.isSuccessful == True:
+            return self.api.game_betinfo.isSuccessful, self.api.game_betinfo.dict
+        else:
+            return self.api.game_betinfo.isSuccessful, None
 
     def get_optioninfo(self, limit):
-        self.api.api_game_getoptions_result = None
-        self.api.get_options(limit)
-        while self.api.api_game_getoptions_result == None:
-            pass
-
-        return self.api.api_game_getoptions_result
+        return self.__wait_response(self.api.get_options(limit), "get_optioninfo")
 
     def get_optioninfo_v2(self, limit):
         self.api.get_options_v2_data = None
         self.api.get_options_v2(limit, "binary,turbo")
-        while self.api.get_options_v2_data == None:
-            pass
+        self.__wait_event("options", lambda: self.api.get_options_v2_data != None,
+                          "get_optioninfo_v2", self.timeout)
 
         return self.api.get_options_v2_data
 
@@ -840,18 +1354,16 @@ class IQ_Option:
     # __________________FOR OPTION____________________________
 
     def buy_multi(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
         if len(price) == len(ACTIVES) == len(ACTION) == len(expirations):
             buy_len = len(price)
+            futures = []
             for idx in range(buy_len):
-                self.api.buyv3(
-                    price[idx], OP_code.ACTIVES[ACTIVES[idx]], ACTION[idx], expirations[idx], idx)
-            while len(self.api.buy_multi_option) < buy_len:
-                pass
+                futures.append(self.api.buyv3(
+                    price[idx], OP_code.ACTIVES[ACTIVES[idx]], ACTION[idx], expirations[idx]))
             buy_id = []
-            for key in sorted(self.api.buy_multi_option.keys()):
+            for future in futures:
                 try:
-                    value = self.api.buy_multi_option[str(key)]
+                    value = self.__wait_response(future, "buy_multi")
                     buy_id.append(value["id"])
                 except:
                     buy_id.append(None)
@@ -867,173 +1379,140 @@ class IQ_Option:
         logging.error('get_remaning(self,duration) ERROR duration')
         return "ERROR duration"
 
-    def buy_by_raw_expirations(self, price, active, direction, option, expired):
+    def __option_result(self, future, name):
+        # "option" response of binary-options.open-option: {"id":...} or {"message":...}
+        option = self.__wait_response(future, name, 5)
+        if option == None:
+            return False, None
+        if "message" in option:
+            logging.error('**warning** ' + name + ' ' + str(option["message"]))
+            return False, option["message"]
+        return True, option.get("id")
 
-        self.api.buy_multi_option = {}
+    def buy_by_raw_expirations(self, price, active, direction, option, expired):
         self.api.buy_successful = None
-        req_id = "buyraw"
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
-        self.api.buyv3_by_raw_expired(
-            price, OP_code.ACTIVES[active], direction, option, expired, request_id=req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    logging.error(
-                        '**warning** buy' + str(self.api.buy_multi_option[req_id]["message"]))
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
+        future = self.api.buyv3_by_raw_expired(
+            price, OP_code.ACTIVES[active], direction, option, expired)
+        return self.__option_result(future, "buy_by_raw_expirations")
 
     def buy(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
         self.api.buy_successful = None
-        # req_id = "buy"
-        req_id = str(randint(0, 10000))
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
-        self.api.buyv3(
-            float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations), req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
+        future = self.api.buyv3(
+            float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations))
+        return self.__option_result(future, "buy")
 
     def sell_option(self, options_ids):
-        self.api.sell_option(options_ids)
-        self.api.sold_options_respond = None
-        while self.api.sold_options_respond == None:
-            pass
-        return self.api.sold_options_respond
+        return self.__wait_response(self.api.sell_option(options_ids), "sell_option")
 
     def sell_digital_option(self, options_ids):
-        self.api.sell_digital_option(options_ids)
         self.api.sold_digital_options_respond = None
-        while self.api.sold_digital_options_respond == None:
-            pass
+        self.api.sell_digital_option(options_ids)
+        self.__wait_event("position-closed",
+                          lambda: self.api.sold_digital_options_respond != None,
+                          "sell_digital_option", self.timeout)
         return self.api.sold_digital_options_respond
 # __________________for Digital___________________
 
     def get_digital_underlying_list_data(self):
-        self.api.underlying_list_data = None
-        self.api.get_digital_underlying()
-        start_t = time.time()
-        while self.api.underlying_list_data == None:
-            if time.time() - start_t >= 30:
-                logging.error(
-                    '**warning** get_digital_underlying_list_data late 30 sec')
-                return None
-
-        return self.api.underlying_list_data
+        return self.__wait_response(
+            self.api.get_digital_underlying(), "get_digital_underlying_list_data", 30)
 
     def get_strike_list(self, ACTIVES, duration):
-        self.api.strike_list = None
-        self.api.get_strike_list(ACTIVES, duration)
+        raw_data = self.__wait_response(
+            self.api.get_strike_list(ACTIVES, duration), "get_strike_list")
         ans = {}
-        while self.api.strike_list == None:
-            pass
         try:
-            for data in self.api.strike_list["msg"]["strike"]:
+            for data in raw_data["msg"]["strike"]:
                 temp = {}
                 temp["call"] = data["call"]["id"]
                 temp["put"] = data["put"]["id"]
                 ans[("%.6f" % (float(data["value"]) * 10e-7))] = temp
         except:
             logging.error('**error** get_strike_list read problem...')
-            return self.api.strike_list, None
-        return self.api.strike_list, ans
+            return raw_data, None
+        return raw_data, ans
 
     def subscribe_strike_list(self, ACTIVE, expiration_period):
-        self.api.subscribe_instrument_quites_generated(
-            ACTIVE, expiration_period)
+        self.subscriptions.acquire(subscriptions.instrument_quotes_generated(
+            OP_code.ACTIVES[ACTIVE], expiration_period))
+        self.subscriptions.flush()
 
     def unsubscribe_strike_list(self, ACTIVE, expiration_period):
-        del self.api.instrument_quites_generated_data[ACTIVE]
-        self.api.unsubscribe_instrument_quites_generated(
-            ACTIVE, expiration_period)
-
-    def get_instrument_quites_generated_data(self, ACTIVE, duration):
-        while self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60] == {}:
-            pass
+        if self.subscriptions.release(subscriptions.instrument_quotes_generated(
+                OP_code.ACTIVES[ACTIVE], expiration_period)) == 0:
+            self.api.instrument_quites_generated_data.pop(ACTIVE, None)
+            self.api.digital_quotes.remove(ACTIVE, expiration_period * 60)
+
+    def get_instrument_quites_generated_data(self, ACTIVE, duration, timeout=None):
+        self.__wait_event("instrument-quotes-generated",
+                          lambda: self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60] != {},
+                          "get_instrument_quites_generated_data", timeout or self.timeout)
         return self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60]
 
-    def get_realtime_strike_list(self, ACTIVE, duration):
-        while True:
-            if not self.api.instrument_quites_generated_data[ACTIVE][duration * 60]:
-                pass
-            else:
-                break
-        """
-        strike_list dict: price:{call:id,put:id}
-        """
-        ans = {}
-        now_timestamp = self.api.instrument_quites_generated_timestamp[ACTIVE][duration * 60]
+    def get_strike_table(self, ACTIVE, duration, timeout=None):
+        """Get the live quotes of a digital active, see subscribe_strike_list.
 
-        while ans == {}:
-            if self.get_realtime_strike_list_temp_data == {} or now_timestamp != self.get_realtime_strike_list_temp_expiration:
-                raw_data, strike_list = self.get_strike_list(ACTIVE, duration)
-                self.get_realtime_strike_list_temp_expiration = raw_data["msg"]["expiration"]
-                self.get_realtime_strike_list_temp_data = strike_list
-            else:
-                strike_list = self.get_realtime_strike_list_temp_data
+        The strikes of the current expiration are fetched with
+        get_strike_list the first time, so :meth:`QuoteTable.nearest
+        <iqoptionapi.digital.quotes.QuoteTable.nearest>` and
+        :meth:`QuoteTable.strike_list <iqoptionapi.digital.quotes.QuoteTable.strike_list>`
+        work.
 
-            profit = self.api.instrument_quites_generated_data[ACTIVE][duration * 60]
-            for price_key in strike_list:
-                try:
-                    side_data = {}
-                    for side_key in strike_list[price_key]:
-                        detail_data = {}
-                        profit_d = profit[strike_list[price_key][side_key]]
-                        detail_data["profit"] = profit_d
-                        detail_data["id"] = strike_list[price_key][side_key]
-                        side_data[side_key] = detail_data
-                    ans[price_key] = side_data
-                except:
-                    pass
+        :param str ACTIVE: The active name.
+        :param int duration: The expiration period in minutes.
 
-        return ans
+        :returns: The :class:`QuoteTable <iqoptionapi.digital.quotes.QuoteTable>`,
+            None if no quote came in time.
+        """
+        period = duration * 60
+        if not self.__wait_event("instrument-quotes-generated",
+                                 lambda: self.api.digital_quotes.get(ACTIVE, period) is not None,
+                                 "get_strike_table", timeout or self.timeout):
+            return None
+        table = self.api.digital_quotes.get(ACTIVE, period)
+        if not table.strikes:
+            raw_data, strike_list = self.get_strike_list(ACTIVE, duration)
+            if strike_list is None:
+                return table
+            expiration = raw_data["msg"]["expiration"]
+            if expiration != table.expiration:
+                # the strikes of the next expiration, wait for its quotes
+                if not self.__wait_event(
+                        "instrument-quotes-generated",
+                        # None once unsubscribe_strike_list removed the table
+                        lambda: getattr(self.api.digital_quotes.get(ACTIVE, period),
+                                        "expiration", None) == expiration,
+                        "get_strike_table", timeout or self.timeout):
+                    return self.api.digital_quotes.get(ACTIVE, period)
+                table = self.api.digital_quotes.get(ACTIVE, period)
+                if table is None:
+                    return None
+            table.set_strikes(raw_data["msg"]["strike"])
+        return table
+
+    def get_realtime_strike_list(self, ACTIVE, duration, timeout=None):
+        """
+        strike_list dict: price:{call:{profit,id},put:{profit,id}}
+        """
+        table = self.get_strike_table(ACTIVE, duration, timeout)
+        if table is None:
+            return {}
+        return table.strike_list()
 
     def get_digital_current_profit(self, ACTIVE, duration):
-        profit = self.api.instrument_quites_generated_data[ACTIVE][duration * 60]
-        for key in profit:
-            if key.find("SPT") != -1:
-                return profit[key]
-        return False
+        table = self.api.digital_quotes.get(ACTIVE, duration * 60)
+        if table is None or table.spot_profit() is None:
+            return False
+        return table.spot_profit()
 
     # thank thiagottjv
     # https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/65#issuecomment-513998357
 
-    def buy_digital_spot(self, active, amount, action, duration):
+    def get_digital_spot_instrument_id(self, active, action, duration):
+        """Return the instrument id of a digital spot option, None for a bad action.
+
+        e.g. doEURUSD201907191250PT5MPSPT
+        """
         # Expiration time need to be formatted like this: YYYYMMDDHHII
         # And need to be on GMT time
 
@@ -1044,9 +1523,7 @@ class IQ_Option:
         elif action == 'call':
             action = 'C'
         else:
-            logging.error('buy_digital_spot active error')
-            return -1, None
-        # doEURUSD201907191250PT5MPSPT
+            return None
         timestamp = int(self.api.timesync.server_timestamp)
         if duration == 1:
             exp, _ = get_expiration_time(timestamp, duration)
@@ -1061,15 +1538,18 @@ class IQ_Option:
 
         dateFormated = str(datetime.utcfromtimestamp(
             exp).strftime("%Y%m%d%H%M"))
-        instrument_id = "do" + active + dateFormated + \
-                        "PT" + str(duration) + "M" + action + "SPT"
-        # self.api.digital_option_placed_id = None
+        return "do" + active + dateFormated + \
+               "PT" + str(duration) + "M" + action + "SPT"
 
-        request_id = self.api.place_digital_option(instrument_id, amount)
+    def buy_digital_spot(self, active, amount, action, duration):
+        instrument_id = self.get_digital_spot_instrument_id(active, action, duration)
+        if instrument_id is None:
+            logging.error('buy_digital_spot active error')
+            return -1, None
+        # self.api.digital_option_placed_id = None
 
-        while self.api.digital_option_placed_id.get(request_id) == None:
-            pass
-        digital_order_id = self.api.digital_option_placed_id.get(request_id)
+        digital_order_id = self.__wait_response(
+            self.api.place_digital_option(instrument_id, amount), "buy_digital_spot")
         if isinstance(digital_order_id, int):
             return True, digital_order_id
         else:
@@ -1083,21 +1563,17 @@ class IQ_Option:
         #     return False, self.api.digital_option_placed_id
 
     def get_digital_spot_profit_after_sale(self, position_id):
-        def get_instrument_id_to_bid(data, instrument_id):
-            for row in data["msg"]["quotes"]:
-                if row["symbols"][0] == instrument_id:
-                    return row["price"]["bid"]
+        if not self.__wait_event("position-changed",
+                                 lambda: self.get_async_order(position_id)["position-changed"] != {},
+                                 "get_digital_spot_profit_after_sale", self.timeout):
             return None
-
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
         # ___________________/*position*/_________________
         position = self.get_async_order(position_id)["position-changed"]["msg"]
         # doEURUSD201911040628PT1MPSPT
         # z mean check if call or not
-        if position["instrument_id"].find("MPSPT"):
+        if position["instrument_id"].find("MPSPT") != -1:
             z = False
-        elif position["instrument_id"].find("MCSPT"):
+        elif position["instrument_id"].find("MCSPT") != -1:
             z = True
         else:
             logging.error(
@@ -1123,12 +1599,12 @@ class IQ_Option:
         getRate = position['raw_event']["currency_rate"]
 
         # ___________________/*position*/_________________
-        instrument_quites_generated_data = self.get_instrument_quites_generated_data(
-            ACTIVES, duration)
+        self.__wait_event("instrument-quotes-generated",
+                          lambda: self.api.digital_quotes.get(ACTIVES, duration * 60) is not None,
+                          "get_digital_spot_profit_after_sale", self.timeout)
+        table = self.api.digital_quotes.get(ACTIVES, duration * 60)
 
-
-        f_tmp = get_instrument_id_to_bid(
-            instrument_quites_generated_data, aVar)
+        f_tmp = None if table is None else table.bid(aVar)
         # f is bidprice of lower_instrument_id ,f2 is bidprice of upper_instrument_id
         if f_tmp != None:
             self.get_digital_spot_profit_after_sale_data[position_id]["f"] = f_tmp
@@ -1136,8 +1612,7 @@ class IQ_Option:
         else:
             f = self.get_digital_spot_profit_after_sale_data[position_id]["f"]
 
-        f2_tmp = get_instrument_id_to_bid(
-            instrument_quites_generated_data, aVar2)
+        f2_tmp = None if table is None else table.bid(aVar2)
         if f2_tmp != None:
             self.get_digital_spot_profit_after_sale_data[position_id]["f2"] = f2_tmp
             f2 = f2_tmp
@@ -1155,15 +1630,11 @@ class IQ_Option:
                     instrumentStrikeValue = (instrumentStrikeValue - spotUpperInstrumentStrike) / abs(
                         spotUpperInstrumentStrike - spotLowerInstrumentStrike)
                     f = abs(f2 - f)
-
-            elif z:
+                f = f2 + (instrumentStrikeValue * f)
+            else:
+                # between the lower and upper instrument, the same for a call and a put
                 f += ((instrumentStrikeValue - spotLowerInstrumentStrike) /
                       (spotUpperInstrumentStrike - spotLowerInstrumentStrike)) * (f2 - f)
-            else:
-                instrumentStrikeValue = (spotUpperInstrumentStrike - instrumentStrikeValue) / (
-                    spotUpperInstrumentStrike - spotLowerInstrumentStrike)
-                f -= f2
-            f = f2 + (instrumentStrikeValue * f)
 
         if z2:
             pass
@@ -1175,25 +1646,64 @@ class IQ_Option:
         else:
             return None
 
+    def start_digital_portfolio(self):
+        """Value every open digital spot position on each quote update.
+
+        The sell-back value of get_digital_spot_profit_after_sale is
+        computed for all the positions of an active at once, with numpy,
+        whenever its quotes change; the quotes of the actives with open
+        positions are subscribed meanwhile. Needs numpy.
+
+        :returns: The :class:`DigitalPortfolio <iqoptionapi.digital.valuation.DigitalPortfolio>`,
+            read its ``values()`` and add callbacks with ``add_threshold``.
+        """
+        if self.digital_portfolio is None:
+            self.digital_portfolio = DigitalPortfolio(self.digital_quotes,
+                                                  self.__digital_quotes_subscription)
+            self.add_message_handler("position-changed", self.digital_portfolio.on_position, "portfolio")
+            self.add_message_handler("instrument-quotes-generated", self.digital_portfolio.on_quotes)
+            # the positions opened before
+            for order in list(self.api.order_async.values()):
+                if "position-changed" in order:
+                    self.digital_portfolio.on_position(self.api, order["position-changed"])
+        return self.digital_portfolio
+
+    def stop_digital_portfolio(self):
+        if self.digital_portfolio is None:
+            return False
+        self.remove_message_handler("position-changed", self.digital_portfolio.on_position, "portfolio")
+        self.remove_message_handler("instrument-quotes-generated", self.digital_portfolio.on_quotes)
+        self.digital_portfolio.shutdown(wait=False)
+        self.digital_portfolio = None
+        return True
+
+    def __digital_quotes_subscription(self, ACTIVE, period, subscribe):
+        msg = subscriptions.instrument_quotes_generated(OP_code.ACTIVES[ACTIVE], period // 60)
+        if subscribe:
+            self.subscriptions.acquire(msg)
+            self.subscriptions.flush()
+        else:
+            self.subscriptions.release(msg)
+
     def buy_digital(self, amount, instrument_id):
-        self.api.digital_option_placed_id = None
-        self.api.place_digital_option(instrument_id, amount)
-        start_t = time.time()
-        while self.api.digital_option_placed_id == None:
-            if time.time() - start_t > 30:
-                logging.error('buy_digital loss digital_option_placed_id')
-                return False, None
-        return True, self.api.digital_option_placed_id
+        digital_order_id = self.__wait_response(
+            self.api.place_digital_option(instrument_id, amount), "buy_digital", 30)
+        if digital_order_id == None:
+            logging.error('buy_digital loss digital_option_placed_id')
+            return False, None
+        return True, digital_order_id
 
     def close_digital_option(self, position_id):
         self.api.result = None
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
+        if not self.__wait_event("position-changed",
+                                 lambda: self.get_async_order(position_id)["position-changed"] != {},
+                                 "close_digital_option", self.timeout):
+            return None
         position_changed = self.get_async_order(
             position_id)["position-changed"]["msg"]
         self.api.close_digital_option(position_changed["external_id"])
-        while self.api.result == None:
-            pass
+        self.__wait_event("result", lambda: self.api.result != None,
+                          "close_digital_option", self.timeout)
         return self.api.result
 
     def check_win_digital(self, buy_order_id, polling_time):
@@ -1207,10 +1717,11 @@ class IQ_Option:
                 elif data["msg"]["position"]["close_reason"] == "expired":
                     return data["msg"]["position"]["pnl_realized"] - data["msg"]["position"]["buy_amount"]
 
-    def check_win_digital_v2(self, buy_order_id):
-
-        while self.get_async_order(buy_order_id)["position-changed"] == {}:
-            pass
+    def check_win_digital_v2(self, buy_order_id, timeout=None):
+        if not self.__wait_event("position-changed",
+                                 lambda: self.get_async_order(buy_order_id)["position-changed"] != {},
+                                 "check_win_digital_v2", timeout):
+            return False, None
         order_data = self.get_async_order(
             buy_order_id)["position-changed"]["msg"]
         if order_data != None:
@@ -1237,8 +1748,7 @@ class IQ_Option:
 
                   use_trail_stop=False, auto_margin_call=False,
                   use_token_for_commission=False):
-        self.api.buy_order_id = None
-        self.api.buy_order(
+        future = self.api.buy_order(
             instrument_type=instrument_type, instrument_id=instrument_id,
             side=side, amount=amount, leverage=leverage,
             type=type, limit_price=limit_price, stop_price=stop_price,
@@ -1248,16 +1758,17 @@ class IQ_Option:
             use_token_for_commission=use_token_for_commission
         )
 
-        while self.api.buy_order_id == None:
-            pass
-        check, data = self.get_order(self.api.buy_order_id)
-        while data["status"] == "pending_new":
-            check, data = self.get_order(self.api.buy_order_id)
+        buy_order_id = self.__wait_response(future, "buy_order")
+        if buy_order_id == None:
+            return False, None
+        check, data = self.get_order(buy_order_id)
+        while check and data["status"] == "pending_new":
+            check, data = self.get_order(buy_order_id)
             time.sleep(1)
 
         if check:
             if data["status"] != "rejected":
-                return True, self.api.buy_order_id
+                return True, buy_order_id
             else:
                 return False, data["reject_status"]
         else:
@@ -1265,14 +1776,12 @@ class IQ_Option:
             return False, None
 
     def change_auto_margin_call(self, ID_Name, ID, auto_margin_call):
-        self.api.auto_margin_call_changed_respond = None
-        self.api.change_auto_margin_call(ID_Name, ID, auto_margin_call)
-        while self.api.auto_margin_call_changed_respond == None:
-            pass
-        if self.api.auto_margin_call_changed_respond["status"] == 2000:
-            return True, self.api.auto_margin_call_changed_respond
+        respond = self.__wait_response(
+            self.api.change_auto_margin_call(ID_Name, ID, auto_margin_call), "change_auto_margin_call")
+        if respond != None and respond["status"] == 2000:
+            return True, respond
         else:
-            return False, self.api.auto_margin_call_changed_respond
+            return False, respond
 
     def change_order(self, ID_Name, order_id,
                      stop_lose_kind, stop_lose_value,
@@ -1289,20 +1798,18 @@ class IQ_Option:
             logging.error('change_order input error ID_Name')
 
         if check:
-            self.api.tpsl_changed_respond = None
-            self.api.change_order(
+            future = self.api.change_order(
                 ID_Name=ID_Name, ID=ID,
                 stop_lose_kind=stop_lose_kind, stop_lose_value=stop_lose_value,
                 take_profit_kind=take_profit_kind, take_profit_value=take_profit_value,
                 use_trail_stop=use_trail_stop)
             self.change_auto_margin_call(
                 ID_Name=ID_Name, ID=ID, auto_margin_call=auto_margin_call)
-            while self.api.tpsl_changed_respond == None:
-                pass
-            if self.api.tpsl_changed_respond["status"] == 2000:
-                return True, self.api.tpsl_changed_respond["msg"]
+            tpsl_changed_respond = self.__wait_response(future, "change_order")
+            if tpsl_changed_respond != None and tpsl_changed_respond["status"] == 2000:
+                return True, tpsl_changed_respond["msg"]
             else:
-                return False, self.api.tpsl_changed_respond
+                return False, tpsl_changed_respond
         else:
             logging.error('change_order fail to get position_id')
             return False, None
@@ -1317,112 +1824,86 @@ class IQ_Option:
         # pending_new:this order is working now
         # filled:this order is ok now
         # new
-        self.api.order_data = None
-        self.api.get_order(buy_order_id)
-        while self.api.order_data == None:
-            pass
-        if self.api.order_data["status"] == 2000:
-            return True, self.api.order_data["msg"]
+        order_data = self.__wait_response(self.api.get_order(buy_order_id), "get_order")
+        if order_data != None and order_data["status"] == 2000:
+            return True, order_data["msg"]
         else:
             return False, None
 
     def get_pending(self, instrument_type):
-        self.api.deferred_orders = None
-        self.api.get_pending(instrument_type)
-        while self.api.deferred_orders == None:
-            pass
-        if self.api.deferred_orders["status"] == 2000:
-            return True, self.api.deferred_orders["msg"]
+        deferred_orders = self.__wait_response(self.api.get_pending(instrument_type), "get_pending")
+        if deferred_orders != None and deferred_orders["status"] == 2000:
+            return True, deferred_orders["msg"]
         else:
             return False, None
 
     # this function is heavy
     def get_positions(self, instrument_type):
-        self.api.positions = None
-        self.api.get_positions(instrument_type)
-        while self.api.positions == None:
-            pass
-        if self.api.positions["status"] == 2000:
-            return True, self.api.positions["msg"]
+        positions = self.__wait_response(self.api.get_positions(instrument_type), "get_positions")
+        if positions != None and positions["status"] == 2000:
+            return True, positions["msg"]
         else:
             return False, None
 
     def get_position(self, buy_order_id):
-        self.api.position = None
         check, order_data = self.get_order(buy_order_id)
         position_id = order_data["position_id"]
-        self.api.get_position(position_id)
-        while self.api.position == None:
-            pass
-        if self.api.position["status"] == 2000:
-            return True, self.api.position["msg"]
+        position = self.__wait_response(self.api.get_position(position_id), "get_position")
+        if position != None and position["status"] == 2000:
+            return True, position["msg"]
         else:
             return False, None
 
     # this function is heavy
 
     def get_digital_position_by_position_id(self, position_id):
-        self.api.position = None
-        self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
-        return self.api.position
+        return self.__wait_response(
+            self.api.get_digital_position(position_id), "get_digital_position_by_position_id")
 
-    def get_digital_position(self, order_id):
-        self.api.position = None
-        while self.get_async_order(order_id)["position-changed"] == {}:
-            pass
+    def get_digital_position(self, order_id, timeout=None):
+        if not self.__wait_event("position-changed",
+                                 lambda: self.get_async_order(order_id)["position-changed"] != {},
+                                 "get_digital_position", timeout or self.timeout):
+            return None
         position_id = self.get_async_order(
             order_id)["position-changed"]["msg"]["external_id"]
-        self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
-        return self.api.position
+        return self.__wait_response(
+            self.api.get_digital_position(position_id), "get_digital_position")
 
     def get_position_history(self, instrument_type):
-        self.api.position_history = None
-        self.api.get_position_history(instrument_type)
-        while self.api.position_history == None:
-            pass
+        position_history = self.__wait_response(
+            self.api.get_position_history(instrument_type), "get_position_history")
 
-        if self.api.position_history["status"] == 2000:
-            return True, self.api.position_history["msg"]
+        if position_history != None and position_history["status"] == 2000:
+            return True, position_history["msg"]
         else:
             return False, None
 
     def get_position_history_v2(self, instrument_type, limit, offset, start, end):
         # instrument_type=crypto forex fx-option multi-option cfd digital-option turbo-option
-        self.api.position_history_v2 = None
-        self.api.get_position_history_v2(
-            instrument_type, limit, offset, start, end)
-        while self.api.position_history_v2 == None:
-            pass
+        position_history = self.__wait_response(self.api.get_position_history_v2(
+            instrument_type, limit, offset, start, end), "get_position_history_v2")
 
-        if self.api.position_history_v2["status"] == 2000:
-            return True, self.api.position_history_v2["msg"]
+        if position_history != None and position_history["status"] == 2000:
+            return True, position_history["msg"]
         else:
             return False, None
 
     def get_available_leverages(self, instrument_type, actives=""):
-        self.api.available_leverages = None
         if actives == "":
-            self.api.get_available_leverages(instrument_type, "")
+            future = self.api.get_available_leverages(instrument_type, "")
         else:
-            self.api.get_available_leverages(
+            future = self.api.get_available_leverages(
                 instrument_type, OP_code.ACTIVES[actives])
-        while self.api.available_leverages == None:
-            pass
-        if self.api.available_leverages["status"] == 2000:
-            return True, self.api.available_leverages["msg"]
+        available_leverages = self.__wait_response(future, "get_available_leverages")
+        if available_leverages != None and available_leverages["status"] == 2000:
+            return True, available_leverages["msg"]
         else:
             return False, None
 
     def cancel_order(self, buy_order_id):
-        self.api.order_canceled = None
-        self.api.cancel_order(buy_order_id)
-        while self.api.order_canceled == None:
-            pass
-        if self.api.order_canceled["status"] == 2000:
+        order_canceled = self.__wait_response(self.api.cancel_order(buy_order_id), "cancel_order")
+        if order_canceled != None and order_canceled["status"] == 2000:
             return True
         else:
             return False
@@ -1432,8 +1913,10 @@ class IQ_Option:
         if data["position_id"] != None:
             self.api.close_position_data = None
             self.api.close_position(data["position_id"])
-            while self.api.close_position_data == None:
-                pass
+            if not self.__wait_event("position-closed",
+                                     lambda: self.api.close_position_data != None,
+                                     "close_position", self.timeout):
+                return False
             if self.api.close_position_data["status"] == 2000:
                 return True
             else:
@@ -1442,24 +1925,23 @@ class IQ_Option:
             return False
 
     def close_position_v2(self, position_id):
-        while self.get_async_order(position_id) == None:
-            pass
         position_changed = self.get_async_order(position_id)
+        self.api.close_position_data = None
         self.api.close_position(position_changed["id"])
-        while self.api.close_position_data == None:
-            pass
+        if not self.__wait_event("position-closed",
+                                 lambda: self.api.close_position_data != None,
+                                 "close_position_v2", self.timeout):
+            return False
         if self.api.close_position_data["status"] == 2000:
             return True
         else:
             return False
 
     def get_overnight_fee(self, instrument_type, active):
-        self.api.overnight_fee = None
-        self.api.get_overnight_fee(instrument_type, OP_code.ACTIVES[active])
-        while self.api.overnight_fee == None:
-            pass
-        if self.api.overnight_fee["status"] == 2000:
-            return True, self.api.overnight_fee["msg"]
+        overnight_fee = self.__wait_response(
+            self.api.get_overnight_fee(instrument_type, OP_code.ACTIVES[active]), "get_overnight_fee")
+        if overnight_fee != None and overnight_fee["status"] == 2000:
+            return True, overnight_fee["msg"]
         else:
             return False, None
 
@@ -1472,14 +1954,15 @@ class IQ_Option:
     # -----------------------------------------------------------------
 
     def opcode_to_name(self, opcode):
-        return list(OP_code.ACTIVES.keys())[list(OP_code.ACTIVES.values()).index(opcode)]
+        return ACTIVE_REGISTRY.get_name(opcode)
 
     # name:
     # "live-deal-binary-option-placed"
     # "live-deal-digital-option"
     def subscribe_live_deal(self, name, active, _type, buffersize):
         active_id = OP_code.ACTIVES[active]
-        self.api.Subscribe_Live_Deal(name, active_id, _type)
+        self.subscriptions.acquire(subscriptions.live_deal(name, active_id, _type))
+        self.subscriptions.flush()
         """
         self.api.live_deal_data[name][active][_type]=deque(list(),buffersize)
 
@@ -1491,7 +1974,7 @@ class IQ_Option:
 
     def unscribe_live_deal(self, name, active, _type):
         active_id = OP_code.ACTIVES[active]
-        self.api.Unscribe_Live_Deal(name, active_id, _type)
+        self.subscriptions.release(subscriptions.live_deal(name, active_id, _type))
         """
 
         while len(self.api.live_deal_data[name][active][_type])!=0:
@@ -1517,35 +2000,29 @@ class IQ_Option:
             list(), buffersize)
 
     def get_user_profile_client(self, user_id):
-        self.api.user_profile_client = None
-        self.api.Get_User_Profile_Client(user_id)
-        while self.api.user_profile_client == None:
-            pass
-
-        return self.api.user_profile_client
+        return self.__wait_response(
+            self.api.Get_User_Profile_Client(user_id), "get_user_profile_client")
 
     def request_leaderboard_userinfo_deals_client(self, user_id, country_id):
-        self.api.leaderboard_userinfo_deals_client = None
-
         while True:
+            leaderboard_userinfo_deals_client = self.__wait_response(
+                self.api.Request_Leaderboard_Userinfo_Deals_Client(user_id, country_id),
+                "request_leaderboard_userinfo_deals_client")
             try:
-                if self.api.leaderboard_userinfo_deals_client["isSuccessful"] == True:
+                if leaderboard_userinfo_deals_client["isSuccessful"] == True:
                     break
             except:
                 pass
-            self.api.Request_Leaderboard_Userinfo_Deals_Client(
-                user_id, country_id)
             time.sleep(0.2)
 
-        return self.api.leaderboard_userinfo_deals_client
+        return leaderboard_userinfo_deals_client
 
     def get_users_availability(self, user_id):
-        self.api.users_availability = None
-
-        while self.api.users_availability == None:
-            self.api.Get_Users_Availability(user_id)
-            time.sleep(0.2)
-        return self.api.users_availability
+        users_availability = None
+        while users_availability == None:
+            users_availability = self.__wait_response(
+                self.api.Get_Users_Availability(user_id), "get_users_availability")
+        return users_availability
 
     def get_digital_payout(self, active, seconds=0):
         self.api.digital_payout = None
@@ -1553,10 +2030,8 @@ class IQ_Option:
 
         self.api.subscribe_digital_price_splitter(asset_id)
 
-        start = time.time()
-        while self.api.digital_payout is None:
-            if seconds and int(time.time() - start) > seconds:
-                break
+        self.api.message_events.wait_for("client-price-generated",
+                                 lambda: self.api.digital_payout is not None, seconds or None)
 
         self.api.unsubscribe_digital_price_splitter(asset_id)
 
@@ -1598,12 +2073,8 @@ class IQ_Option:
             "00T" + str(duration) + "M" + action + "SPT"
         logger = logging.getLogger(__name__)
         logger.info(instrument_id)
-        request_id = self.api.place_digital_option_v2(instrument_id, active_id, amount)
-
-        while self.api.digital_option_placed_id.get(request_id) is None:
-            pass
-
-        digital_order_id = self.api.digital_option_placed_id.get(request_id)
+        digital_order_id = self.__wait_response(
+            self.api.place_digital_option_v2(instrument_id, active_id, amount), "buy_digital_spot_v2")
         if isinstance(digital_order_id, int):
             return True, digital_order_id
         else:
@@ -1618,15 +2089,8 @@ class IQ_Option:
         :param expiration: The expiration time in seconds (typically 3, 5 or 10).
         :returns: A tuple of (result, order_id).
         """
-        self.api.buy_multi_option = {}
         self.api.buy_successful = None
         
-        request_id = str(randint(0, 10000))
-        try:
-            self.api.buy_multi_option[request_id]["id"] = None
-        except:
-            pass
-        
         # Convert active name to active_id if needed
         if isinstance(active, str):
             active_id = OP_code.ACTIVES[active]
@@ -1638,27 +2102,8 @@ class IQ_Option:
         
         value = None
         
-        self.api.buy_blitz_option(price, active_id, direction, expiration, profit_percent, value, request_id)
-        
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[request_id].keys():
-                    return False, self.api.buy_multi_option[request_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[request_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy_blitz late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[request_id]["id"]
+        future = self.api.buy_blitz_option(price, active_id, direction, expiration, profit_percent, value)
+        return self.__option_result(future, "buy_blitz")
 
     def get_blitz_payout(self, active):
         """
@@ -14,7 +14,7 @@ class Get_options(Base):
                "user_balance_id":int(global_value.balance_id)
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
 class Get_options_v2(Base):
     name = "sendMessage"
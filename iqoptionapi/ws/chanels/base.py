@@ -1,5 +1,4 @@
 """Module for base IQ Option base websocket chanel."""
-import time
 
 class Base(object):
     """Class for base IQ Option websocket chanel."""
@@ -21,5 +20,16 @@ class Base(object):
         :returns: The instance of :class:`requests.Response`.
         """
         if request_id == '':
-            request_id = int(str(time.time()).split('.')[1])
+            request_id = self.api.request_ids.allocate()
         return self.api.send_websocket_request(name, msg,request_id)
+
+    def send_request(self, name, msg, request_id=""):
+        """Send request to IQ Option server websocket and get its response future.
+
+        :param str name: The websocket chanel name.
+        :param dict msg: The websocket chanel msg.
+
+        :returns: The :class:`concurrent.futures.Future` resolved by the
+            handler of the response with the same request_id.
+        """
+        return self.api.send_request(name, msg, request_id)
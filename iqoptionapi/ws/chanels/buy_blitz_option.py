@@ -2,7 +2,6 @@
 import time
 import iqoptionapi.global_value as global_value
 from iqoptionapi.ws.chanels.base import Base
-from random import randint
 
 class BuyBlitzOption(Base):
     """Class for iqoption blitz option websocket chanel."""
@@ -10,7 +9,7 @@ class BuyBlitzOption(Base):
 
     name = "sendMessage"
 
-    def __call__(self, price, active_id, direction, expiration_size, profit_percent, value=None, request_id=None):
+    def __call__(self, price, active_id, direction, expiration_size, profit_percent, value=None, request_id=""):
         """Method to send message to buy blitz option websocket chanel.
 
         :param price: The buying price.
@@ -19,11 +18,10 @@ class BuyBlitzOption(Base):
         :param expiration_size: The expiration time in seconds (typically 3, 5 or 10).
         :param profit_percent: The profit percentage offered by the broker.
         :param value: The current asset price value (optional).
-        :param request_id: Custom request ID.
-        """
-        if request_id is None:
-            request_id = str(randint(0, 10000))
+        :param request_id: Custom request ID, allocated if empty.
 
+        :returns: The future of the "option" response.
+        """
         # Calculate expiration timestamp
         expired = int(time.time()) + expiration_size
 
@@ -48,5 +46,4 @@ class BuyBlitzOption(Base):
         if value is not None:
             data["body"]["value"] = value
 
-        self.send_websocket_request(self.name, data, request_id)
-        return request_id
+        return self.send_request(self.name, data, request_id)
@@ -10,7 +10,7 @@ class Buyv3(Base):
 
     name = "sendMessage"
 
-    def __call__(self, price, active, direction, duration, request_id):
+    def __call__(self, price, active, direction, duration, request_id=""):
 
         # thank Darth-Carrotpie's code
         # https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/6
@@ -31,14 +31,14 @@ class Buyv3(Base):
             "name": "binary-options.open-option",
             "version": "1.0"
         }
-        self.send_websocket_request(self.name, data, str(request_id))
+        return self.send_request(self.name, data, str(request_id))
 
 
 class Buyv3_by_raw_expired(Base):
 
     name = "sendMessage"
 
-    def __call__(self, price, active, direction, option, expired, request_id):
+    def __call__(self, price, active, direction, option, expired, request_id=""):
 
         # thank Darth-Carrotpie's code
         # https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/6
@@ -58,7 +58,7 @@ class Buyv3_by_raw_expired(Base):
             "name": "binary-options.open-option",
             "version": "1.0"
         }
-        self.send_websocket_request(self.name, data, str(request_id))
+        return self.send_request(self.name, data, str(request_id))
 
 
 """
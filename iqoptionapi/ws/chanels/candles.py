@@ -30,4 +30,4 @@ class GetCandles(Base):
                         }
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
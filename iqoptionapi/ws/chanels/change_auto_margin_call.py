@@ -12,6 +12,6 @@ class ChangeAutoMarginCall(Base):
                 "auto_margin_call": bool(auto_margin_call)
             }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
  
\ No newline at end of file
@@ -25,6 +25,6 @@ class Change_Tpsl(Base):
                 }
             }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
  
\ No newline at end of file
@@ -4,7 +4,6 @@ import datetime
 import time
 from iqoptionapi.ws.chanels.base import Base
 import iqoptionapi.global_value as global_value
-from random import randint
 # work for forex digit cfd(stock)
 
 
@@ -24,9 +23,7 @@ class Digital_options_place_digital_option(Base):
                 "amount": str(amount)
             }
         }
-        request_id = str(randint(0, 100000))
-        self.send_websocket_request(self.name, data, request_id)
-        return request_id
+        return self.send_request(self.name, data)
 
 
 class Digital_options_close_position(Base):
@@ -59,7 +56,4 @@ class DigitalOptionsPlaceDigitalOptionV2(Base):
             }
         }
 
-        request_id = str(randint(0, 100000))
-        self.send_websocket_request(self.name, data, request_id)
-
-        return request_id
+        return self.send_request(self.name, data)
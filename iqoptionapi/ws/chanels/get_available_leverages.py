@@ -14,5 +14,5 @@ class Get_available_leverages(Base):
                 "actives":[actives]
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
@@ -14,4 +14,4 @@ class Get_Balances(Base):
                 "version":"1.0"
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
@@ -16,4 +16,4 @@ class GetDeferredOrders(Base):
                         }
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
@@ -15,5 +15,5 @@ class Get_overnight_fee(Base):
                 "active_id":active_id
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
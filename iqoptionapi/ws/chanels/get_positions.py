@@ -19,7 +19,7 @@ class Get_positions(Base):
                 "user_balance_id":int(global_value.balance_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
 class Get_position(Base):
     name = "sendMessage"
     def __call__(self,position_id):
@@ -29,7 +29,7 @@ class Get_position(Base):
                 "position_id":position_id,
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
 
 class Get_position_history(Base):
     name = "sendMessage"
@@ -41,7 +41,7 @@ class Get_position_history(Base):
                 "user_balance_id":int(global_value.balance_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
  
 class Get_position_history_v2(Base):
     name = "sendMessage"
@@ -57,7 +57,7 @@ class Get_position_history_v2(Base):
                 "user_balance_id":int(global_value.balance_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
 
 class Get_digital_position(Base):
     name = "sendMessage"
@@ -68,4 +68,4 @@ class Get_digital_position(Base):
                 "position_id":position_id,
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
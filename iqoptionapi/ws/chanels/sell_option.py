@@ -20,4 +20,4 @@ class Sell_Option(Base):
                         }
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
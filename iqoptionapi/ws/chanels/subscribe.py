@@ -3,6 +3,7 @@
 from iqoptionapi.ws.chanels.base import Base
 import datetime
 import iqoptionapi.constants as OP_code
+from iqoptionapi.ws import subscriptions
 
 
 class Subscribe(Base):
@@ -12,18 +13,7 @@ class Subscribe(Base):
     name = "subscribeMessage"
 
     def __call__(self, active_id, size):
-       # {"name":"subscribeMessage","msg":{"name":"candle-generated","params":{"routingFilters":{"active_id":1,"size":1}}}}
-
-        data = {"name": "candle-generated",
-                "params": {
-                    "routingFilters": {
-                        "active_id": str(active_id),
-                        "size": int(size)
-                    }
-                }
-                }
-
-        self.send_websocket_request(self.name, data)
+        self.send_websocket_request(self.name, subscriptions.candle_generated(active_id, size))
 
 
 class Subscribe_candles(Base):
@@ -33,34 +23,14 @@ class Subscribe_candles(Base):
     name = "subscribeMessage"
 
     def __call__(self, active_id):
-
-        data = {"name": "candles-generated",
-                "params": {
-                    "routingFilters": {
-                        "active_id": str(active_id)
-                    }
-                }
-                }
-
-        self.send_websocket_request(self.name, data)
+        self.send_websocket_request(self.name, subscriptions.candles_generated(active_id))
 
 
 class Subscribe_Instrument_Quites_Generated(Base):
     name = "subscribeMessage"
 
     def __call__(self, ACTIVE, expiration_period):
-        data = {
-            "name": "instrument-quotes-generated",
-            "params": {
-                "routingFilters": {
-                    "active": int(OP_code.ACTIVES[ACTIVE]),
-                    "expiration_period": int(expiration_period*60),
-                    "kind": "digital-option",
-
-                },
-            },
-            "version": "1.0"
-        }
+        data = subscriptions.instrument_quotes_generated(OP_code.ACTIVES[ACTIVE], expiration_period)
         self.send_websocket_request(self.name, data)
 
     def get_digital_expiration_time(self, duration):
@@ -118,28 +88,7 @@ class Subscribe_live_deal(Base):
     name = "subscribeMessage"
 
     def __call__(self, name, active_id, _type):
-     # "live-deal-binary-option-placed"
-     # "live-deal-digital-option"
-        if name == "live-deal-binary-option-placed":
-            _type_name = "option_type"  # turbo/binary
-            _active_id = "active_id"
-        elif name == "live-deal-digital-option":
-            _type_name = "expiration_type"
-            _active_id = "instrument_active_id"
-        elif name == "live-deal":
-            _type_name = "instrument_type"
-            _active_id = "instrument_active_id"
-
-        data = {"name": name,
-                "params": {
-                    "routingFilters": {
-                        _active_id: int(active_id),
-                        _type_name: str(_type)
-                    }
-                },
-                "version": "2.0"
-                }
-        self.send_websocket_request(self.name, data)
+        self.send_websocket_request(self.name, subscriptions.live_deal(name, active_id, _type))
 
 
 class SubscribeDigitalPriceSplitter(Base):
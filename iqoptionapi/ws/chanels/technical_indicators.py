@@ -1,5 +1,4 @@
 import datetime
-import time
 from iqoptionapi.ws.chanels.base import Base
 
 
@@ -14,6 +13,4 @@ class Technical_indicators(Base):
                 "id": active
             }
         }
-        request_id = str(time.time()).split('.')[1]
-        self.send_websocket_request(self.name, data, request_id)
-        return request_id
+        return self.send_request(self.name, data)
@@ -18,7 +18,7 @@ class Get_user_profile_client(Base):
                 "version":"1.0"
                }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
 
 class Request_leaderboard_userinfo_deals_client(Base):
     """Class for IQ option candles websocket chanel."""
@@ -34,7 +34,7 @@ class Request_leaderboard_userinfo_deals_client(Base):
                 "version":"1.0"
                }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
 
 class Get_users_availability(Base):
     """Class for IQ option candles websocket chanel."""
@@ -50,4 +50,4 @@ class Get_users_availability(Base):
                 "version":"1.0"
                }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_request(self.name, data)
@@ -1,11 +1,15 @@
 """Module for IQ option websocket."""
 
-import json
 import logging
 import websocket
+from collections import defaultdict
+from functools import partial
 import iqoptionapi.constants as OP_code
 import iqoptionapi.global_value as global_value
 from threading import Thread
+from iqoptionapi.ws.dispatcher import Dispatcher
+from iqoptionapi.ws.events import WEBSOCKET_STATE
+from iqoptionapi.ws.subscriptions import STREAM_NAMES
 from iqoptionapi.ws.received.technical_indicators import technical_indicators
 from iqoptionapi.ws.received.time_sync import time_sync
 from iqoptionapi.ws.received.heartbeat import heartbeat
@@ -62,6 +66,31 @@ from iqoptionapi.ws.received.client_price_generated import client_price_generate
 from iqoptionapi.ws.received.users_availability import users_availability
 
 
+NAME_PREFIX = '{"name":"'
+NAME_PREFIX_BYTES = b'{"name":"'
+
+
+def peek_name(frame):
+    """Get the top-level message name of a raw frame without decoding it.
+
+    IQ option frames start with the "name" key; anything else returns None
+    so the caller falls back to a full decode.
+    """
+    if isinstance(frame, bytes):
+        if not frame.startswith(NAME_PREFIX_BYTES):
+            return None
+        end = frame.find(b'"', 9)
+        if end == -1 or frame.find(b"\\", 9, end) != -1:
+            return None
+        return frame[9:end].decode("utf-8")
+    if not frame.startswith(NAME_PREFIX):
+        return None
+    end = frame.find('"', 9)
+    if end == -1 or frame.find("\\", 9, end) != -1:
+        return None
+    return frame[9:end]
+
+
 class WebsocketClient(object):
     """Class for work with IQ option websocket."""
 
@@ -75,6 +104,78 @@ class WebsocketClient(object):
             self.api.wss_url, on_message=self.on_message,
             on_error=self.on_error, on_close=self.on_close,
             on_open=self.on_open)
+        self.dispatcher = self.build_dispatcher()
+        self.skipped_frames = 0
+        self.skipped_frames_by_name = defaultdict(int)
+
+    def build_dispatcher(self):
+        """Method to build the message name -> handlers dispatch table.
+
+        :returns: The instance of :class:`Dispatcher
+            <iqoptionapi.ws.dispatcher.Dispatcher>`.
+        """
+        dispatcher = Dispatcher()
+        for name, handler in (
+                ("technical-indicators", partial(technical_indicators, api_dict_clean=self.api_dict_clean)),
+                ("timeSync", time_sync),
+                ("heartbeat", heartbeat),
+                ("balances", balances),
+                ("profile", profile),
+                ("balance-changed", balance_changed),
+                ("candles", candles),
+                ("buyComplete", buy_complete),
+                ("option", option),
+                ("position-history", position_history),
+                ("listInfoData", list_info_data),
+                ("candle-generated", partial(candle_generated_realtime, dict_queue_add=self.dict_queue_add)),
+                ("candles-generated", partial(candle_generated_v2, dict_queue_add=self.dict_queue_add)),
+                ("commission-changed", commission_changed),
+                ("socket-option-opened", socket_option_opened),
+                ("api_option_init_all_result", api_option_init_all_result),
+                ("initialization-data", initialization_data),
+                ("underlying-list", underlying_list),
+                ("instruments", instruments),
+                ("financial-information", financial_information),
+                ("position-changed", position_changed),
+                ("option-opened", option_opened),
+                ("option-closed", option_closed),
+                ("top-assets-updated", top_assets_updated),
+                ("strike-list", strike_list),
+                ("api_game_betinfo_result", api_game_betinfo_result),
+                ("traders-mood-changed", traders_mood_changed),
+                # ------for forex&cfd&crypto..
+                ("order-placed-temp", order_placed_temp),
+                ("order", order),
+                ("position", position),
+                ("positions", positions),
+                ("deferred-orders", deferred_orders),
+                ("history-positions", history_positions),
+                ("available-leverages", available_leverages),
+                ("order-canceled", order_canceled),
+                ("position-closed", position_closed),
+                ("overnight-fee", overnight_fee),
+                ("api_game_getoptions_result", api_game_getoptions_result),
+                ("sold-options", sold_options),
+                ("tpsl-changed", tpsl_changed),
+                ("auto-margin-call-changed", auto_margin_call_changed),
+                ("digital-option-placed", partial(digital_option_placed, api_dict_clean=self.api_dict_clean)),
+                ("result", result),
+                ("instrument-quotes-generated", instrument_quotes_generated),
+                ("training-balance-reset", training_balance_reset),
+                ("socket-option-closed", socket_option_closed),
+                ("live-deal-binary-option-placed", live_deal_binary_option_placed),
+                ("live-deal-digital-option", live_deal_digital_option),
+                ("leaderboard-deals-client", leaderboard_deals_client),
+                ("live-deal", live_deal),
+                ("user-profile-client", user_profile_client),
+                ("leaderboard-userinfo-deals-client", leaderboard_userinfo_deals_client),
+                ("users-availability", users_availability),
+                ("client-price-generated", client_price_generated)):
+            dispatcher.register(name, handler)
+        # application handlers go after the built-in ones for the same name
+        for name, handler, microservice_name in self.api.message_handlers:
+            dispatcher.register(name, handler, microservice_name)
+        return dispatcher
 
     def dict_queue_add(self, dict, maxdict, key1, key2, key3, value):
         if key3 in dict[key1][key2]:
@@ -90,8 +191,9 @@ class WebsocketClient(object):
                     break
                 else:
                     # del mini key
-                    del dict[key1][key2][sorted(
-                        dict[key1][key2].keys(), reverse=False)[0]]
+                    del dict[key1][key2][min(dict[key1][key2])]
+        # after the write, a reader seeing the new version sees the new value
+        self.api.real_time_candles_version[(key1, key2)] += 1
 
     def api_dict_clean(self, obj):
         if len(obj) > 5000:
@@ -99,92 +201,62 @@ class WebsocketClient(object):
                 del obj[k]
                 break
 
+    def should_decode(self, frame):
+        """Method to decide from the raw frame if it is worth decoding.
+
+        Frames whose name has no registered handler, frames of a stream in
+        ``STREAM_NAMES`` this connection has no subscription for, e.g. still
+        coming after its unsubscribeMessage, or frames switched off in
+        ``api.decode_overrides``, are dropped and counted in
+        ``skipped_frames``. ``api.decode_overrides[name] = True`` forces the
+        decode even without a handler.
+        """
+        name = peek_name(frame)
+        if name is None:
+            return True
+        decode = self.api.decode_overrides.get(name)
+        if decode is None:
+            if name in STREAM_NAMES:
+                # the built-in handler of a stream is no reason to decode it
+                decode = bool(self.api.subscribed_streams.get(name))
+            else:
+                decode = self.dispatcher.has_consumer(name)
+        if not decode:
+            self.skipped_frames += 1
+            self.skipped_frames_by_name[name] += 1
+        return decode
+
     def on_message(self, wss, message):  # pylint: disable=unused-argument
         """Method to process websocket messages."""
-        global_value.ssl_Mutual_exclusion = True
         logger = logging.getLogger(__name__)
-        logger.debug(message)
-
-        message = json.loads(str(message))
-
-
-        technical_indicators(self.api, message, self.api_dict_clean)
-        time_sync(self.api, message)
-        heartbeat(self.api, message)
-        balances(self.api, message)
-        profile(self.api, message)
-        balance_changed(self.api, message)
-        candles(self.api, message)
-        buy_complete(self.api, message)
-        option(self.api, message)
-        position_history(self.api, message)
-        list_info_data(self.api, message)
-        candle_generated_realtime(self.api, message, self.dict_queue_add)
-        candle_generated_v2(self.api, message, self.dict_queue_add)
-        commission_changed(self.api, message)
-        socket_option_opened(self.api, message)
-        api_option_init_all_result(self.api, message)
-        initialization_data(self.api, message)
-        underlying_list(self.api, message)
-        instruments(self.api, message)
-        financial_information(self.api, message)
-        position_changed(self.api, message)
-        option_opened(self.api, message)
-        option_closed(self.api, message)
-        top_assets_updated(self.api, message)
-        strike_list(self.api, message)
-        api_game_betinfo_result(self.api, message)
-        traders_mood_changed(self.api, message)
-         # ------for forex&cfd&crypto..
-        order_placed_temp(self.api, message)
-        order(self.api, message)
-        position(self.api, message)
-        positions(self.api, message)
-        order_placed_temp(self.api, message)
-        deferred_orders(self.api, message)
-        history_positions(self.api, message)
-        available_leverages(self.api, message)
-        order_canceled(self.api, message)
-        position_closed(self.api, message)
-        overnight_fee(self.api, message)
-        api_game_getoptions_result(self.api, message)
-        sold_options(self.api, message)
-        tpsl_changed(self.api, message)
-        auto_margin_call_changed(self.api, message)
-        digital_option_placed(self.api, message, self.api_dict_clean)
-        result(self.api, message)
-        instrument_quotes_generated(self.api, message)
-        training_balance_reset(self.api, message)
-        socket_option_closed(self.api, message)
-        live_deal_binary_option_placed(self.api, message)
-        live_deal_digital_option(self.api, message)
-        leaderboard_deals_client(self.api, message)
-        live_deal(self.api, message)
-        user_profile_client(self.api, message)
-        leaderboard_userinfo_deals_client(self.api, message)
-        users_availability(self.api, message)
-        client_price_generated(self.api, message)
-
-        global_value.ssl_Mutual_exclusion = False
-
-    @staticmethod
-    def on_error(wss, error):  # pylint: disable=unused-argument
+        if logger.isEnabledFor(logging.DEBUG):
+            # the frame text, one per line, as codec_benchmark reads it
+            logger.debug(message.decode("utf-8") if isinstance(message, bytes) else message)
+
+        if self.should_decode(message):
+            message = self.api.codec.loads(message)
+            self.dispatcher.dispatch(self.api, message)
+            # wake the threads waiting for the state this message changed
+            self.api.message_events.notify(message.get("name"))
+
+    def on_error(self, wss, error):  # pylint: disable=unused-argument
         """Method to process websocket errors."""
         logger = logging.getLogger(__name__)
         logger.error(error)
         global_value.websocket_error_reason = str(error)
         global_value.check_websocket_if_error = True
+        self.api.message_events.notify(WEBSOCKET_STATE)
 
-    @staticmethod
-    def on_open(wss):  # pylint: disable=unused-argument
+    def on_open(self, wss):  # pylint: disable=unused-argument
         """Method to process websocket open."""
         logger = logging.getLogger(__name__)
         logger.debug("Websocket client connected.")
         global_value.check_websocket_if_connect = 1
+        self.api.message_events.notify(WEBSOCKET_STATE)
 
-    @staticmethod
-    def on_close(wss):  # pylint: disable=unused-argument
+    def on_close(self, wss, close_status_code=None, close_msg=None):  # pylint: disable=unused-argument
         """Method to process websocket close."""
         logger = logging.getLogger(__name__)
         logger.debug("Websocket connection closed.")
         global_value.check_websocket_if_connect = 0
+        self.api.message_events.notify(WEBSOCKET_STATE)
@@ -0,0 +1,104 @@
+"""Module for IQ option websocket JSON codecs.
+
+Every codec has ``loads(data)`` accepting str or bytes and ``dumps(obj)``
+returning bytes, so websocket frames go straight to the socket without an
+intermediate str copy.
+"""
+import json
+
+
+class JsonCodec(object):
+    """Class for the standard library json codec."""
+
+    name = "json"
+
+    def __init__(self):
+        self.__encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return self.__encoder.encode(obj).encode("utf-8")
+
+
+class OrjsonCodec(object):
+    """Class for the orjson codec."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.loads = orjson.loads
+        self.dumps = orjson.dumps
+
+
+class UjsonCodec(object):
+    """Class for the ujson codec."""
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self.loads = ujson.loads
+        self.__dumps = ujson.dumps
+
+    def dumps(self, obj):
+        return self.__dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+class MsgspecCodec(object):
+    """Class for the msgspec codec."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self.loads = msgspec.json.Decoder().decode
+        self.dumps = msgspec.json.Encoder().encode
+
+
+CODECS = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+# order tried by get_codec("auto"), fastest first
+AUTO_ORDER = ("orjson", "msgspec", "ujson", "json")
+
+
+def available_codecs():
+    """Return the names of the codecs importable in this environment."""
+    names = []
+    for name in AUTO_ORDER:
+        try:
+            CODECS[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(codec=None):
+    """Return a codec instance.
+
+    :param codec: (optional) None or "json" for the standard library,
+        "orjson"/"ujson"/"msgspec" for a specific backend, "auto" for the
+        fastest installed one, or an object with loads/dumps methods.
+
+    :raises ImportError: If the requested backend is not installed.
+    """
+    if codec is None:
+        return JsonCodec()
+    if not isinstance(codec, str):
+        return codec
+    if codec == "auto":
+        return CODECS[available_codecs()[0]]()
+    try:
+        codec_class = CODECS[codec]
+    except KeyError:
+        raise ValueError("unknown codec {!r}, use one of {}".format(
+            codec, ", ".join(["auto"] + list(CODECS))))
+    return codec_class()
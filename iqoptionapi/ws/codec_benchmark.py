@@ -0,0 +1,103 @@
+"""Micro-benchmark of the websocket JSON codecs.
+
+Usage::
+
+    python -m iqoptionapi.ws.codec_benchmark [frames_file] [rounds]
+
+``frames_file`` holds one recorded websocket frame per line (for example
+the output of ``logging.getLogger("iqoptionapi.ws.client")`` at DEBUG
+level). Without it a small set of frames recorded from the live stream is
+used.
+"""
+import sys
+import timeit
+
+from iqoptionapi.ws.codec import CODECS, available_codecs
+
+RECORDED_FRAMES = [
+    b'{"name":"timeSync","msg":1700000000123}',
+    b'{"name":"heartbeat","msg":1700000000456}',
+    b'{"name":"candle-generated","microserviceName":"quotes","msg":{"active_id":1,'
+    b'"size":60,"at":1700000000123456789,"from":1699999980,"to":1700000040,"id":2830000,'
+    b'"open":1.08712,"close":1.08719,"min":1.08702,"max":1.08725,"ask":1.08722,'
+    b'"bid":1.08716,"volume":0,"phase":"T"}}',
+    b'{"name":"candles-generated","microserviceName":"quotes","msg":{"active_id":76,'
+    b'"at":1700000000123456789,"ask":1.26421,"bid":1.26409,"value":1.26415,"phase":"T",'
+    b'"candles":{"1":{"from":1700000000,"to":1700000001,"id":1,"open":1.26415,"close":1.26415,'
+    b'"min":1.26415,"max":1.26415,"volume":0},"5":{"from":1699999995,"to":1700000000,"id":2,'
+    b'"open":1.26411,"close":1.26415,"min":1.2641,"max":1.26417,"volume":0},"60":{"from":'
+    b'1699999980,"to":1700000040,"id":3,"open":1.26398,"close":1.26415,"min":1.26392,"max":'
+    b'1.26421,"volume":0}}}}',
+    b'{"name":"instrument-quotes-generated","microserviceName":"quotes","msg":{"active":1,'
+    b'"kind":"digital-option","expiration":{"timestamp":1700000060,"period":60},"ask":1.08722,'
+    b'"bid":1.08716,"value":1.08719,"quotes":['
+    b'{"symbols":["doEURUSD202311142215PT1MC108500"],"price":{"ask":82.3,"bid":80.1}},'
+    b'{"symbols":["doEURUSD202311142215PT1MP108500"],"price":{"ask":17.9,"bid":15.6}},'
+    b'{"symbols":["doEURUSD202311142215PT1MC108700"],"price":{"ask":52.4,"bid":49.8}},'
+    b'{"symbols":["doEURUSD202311142215PT1MP108700"],"price":{"ask":50.2,"bid":47.7}},'
+    b'{"symbols":["doEURUSD202311142215PT1MCSPT"],"price":{"ask":51.1,"bid":48.9}},'
+    b'{"symbols":["doEURUSD202311142215PT1MPSPT"],"price":{"ask":51.0,"bid":48.8}},'
+    b'{"symbols":["doEURUSD202311142215PT1MC108900"],"price":{"ask":21.6,"bid":19.2}},'
+    b'{"symbols":["doEURUSD202311142215PT1MP108900"],"price":{"ask":null,"bid":null}}]}}',
+    b'{"name":"position-changed","microserviceName":"portfolio","msg":{"id":"a1b2c3",'
+    b'"user_id":1,"user_balance_id":2,"platform_id":9,"external_id":11223344,"active_id":1,'
+    b'"instrument_id":"doEURUSD202311142215PT1MCSPT","source":"digital-options",'
+    b'"instrument_type":"digital-option","status":"open","buy_amount":10,"sell_amount":0,'
+    b'"raw_event":{"order_ids":[55667788],"instrument_underlying":"EURUSD","buy_amount":10,'
+    b'"sell_amount":0,"count":20.4,"instrument_strike_value":1087190,"currency_rate":1,'
+    b'"extra_data":{"lower_instrument_strike":1087000,"upper_instrument_strike":1087200,'
+    b'"lower_instrument_id":"doEURUSD202311142215PT1MC108700","upper_instrument_id":'
+    b'"doEURUSD202311142215PT1MC108720"}}}}',
+    b'{"name":"traders-mood-changed","microserviceName":"traders-mood","msg":{"instrument":'
+    b'"turbo-option","asset_id":1,"value":0.61274}}',
+    b'{"name":"live-deal-binary-option-placed","microserviceName":"live-deals","msg":'
+    b'{"active_id":1,"amount_enrolled":25.0,"avatar":"","country_id":30,"created_at":'
+    b'1700000000000,"direction":"call","expiration":1700000060000,"flag":"BR","is_big":false,'
+    b'"name":"Trader","option_id":9988776655,"option_type":"turbo","user_id":123456}}',
+]
+
+OUTBOUND_MESSAGES = [
+    {"name": "sendMessage", "request_id": "17", "msg": {
+        "name": "get-candles", "version": "2.0", "body": {
+            "active_id": 1, "split_normalization": True, "size": 60,
+            "to": 1700000000, "count": 1000}}},
+    {"name": "subscribeMessage", "request_id": "18", "msg": {
+        "name": "candle-generated", "params": {
+            "routingFilters": {"active_id": "1", "size": 60}}}},
+    {"name": "heartbeat", "request_id": "19", "msg": {
+        "msg": {"heartbeatTime": 1700000000456, "userTime": 1700000000500}}},
+]
+
+
+def load_frames(path):
+    with open(path, "rb") as frames_file:
+        return [line.strip() for line in frames_file if line.strip()]
+
+
+def bench(frames, rounds):
+    """Return {codec name: (decode us/frame, encode us/message)}."""
+    results = {}
+    for name in available_codecs():
+        codec = CODECS[name]()
+        decoded = [codec.loads(frame) for frame in frames]
+        decode = timeit.timeit(
+            lambda: [codec.loads(frame) for frame in frames], number=rounds)
+        encode = timeit.timeit(
+            lambda: [codec.dumps(obj) for obj in OUTBOUND_MESSAGES + decoded], number=rounds)
+        results[name] = (decode * 1e6 / (rounds * len(frames)),
+                         encode * 1e6 / (rounds * (len(OUTBOUND_MESSAGES) + len(decoded))))
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    frames = load_frames(argv[0]) if argv else RECORDED_FRAMES
+    rounds = int(argv[1]) if len(argv) > 1 else 2000
+    print("{} frames x {} rounds".format(len(frames), rounds))
+    print("{:<10}{:>16}{:>16}".format("codec", "decode us/frame", "encode us/msg"))
+    for name, (decode, encode) in sorted(bench(frames, rounds).items(), key=lambda item: item[1][0]):
+        print("{:<10}{:>16.2f}{:>16.2f}".format(name, decode, encode))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Module for IQ option websocket message dispatcher."""
+
+
+class Dispatcher(object):
+    """Class for name-indexed dispatch of IQ option websocket messages."""
+
+    def __init__(self):
+        # name -> tuple of (microservice_name, handler). The table is
+        # replaced as a whole on every change so the websocket thread can
+        # read it without locking while other threads register handlers.
+        self.__handlers = {}
+
+    def register(self, name, handler, microservice_name=None):
+        """Method to register a handler for a websocket message name.
+
+        :param str name: The websocket message name, e.g. "candle-generated".
+        :param handler: The callable invoked as ``handler(api, message)``.
+        :param str microservice_name: (optional) Only call the handler when
+            the message ``microserviceName`` is equal to this value.
+        """
+        handlers = dict(self.__handlers)
+        handlers[name] = handlers.get(name, ()) + ((microservice_name, handler),)
+        self.__handlers = handlers
+
+    def unregister(self, name, handler, microservice_name=None):
+        """Method to remove a handler registered with :meth:`register`.
+
+        :returns: True if the handler was registered, False otherwise.
+        """
+        entries = self.__handlers.get(name, ())
+        remaining = tuple(entry for entry in entries
+                          if entry != (microservice_name, handler))
+        if len(remaining) == len(entries):
+            return False
+        handlers = dict(self.__handlers)
+        if remaining:
+            handlers[name] = remaining
+        else:
+            del handlers[name]
+        self.__handlers = handlers
+        return True
+
+    def has_consumer(self, name):
+        """Method to check if any handler is registered for a message name."""
+        return name in self.__handlers
+
+    @property
+    def names(self):
+        """Property to get the message names with registered handlers."""
+        return list(self.__handlers)
+
+    def dispatch(self, api, message):
+        """Method to run the handlers registered for a websocket message.
+
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param dict message: The decoded websocket message.
+        """
+        entries = self.__handlers.get(message.get("name"))
+        if not entries:
+            return
+        for microservice_name, handler in entries:
+            if microservice_name is None or microservice_name == message.get("microserviceName"):
+                handler(api, message)
@@ -0,0 +1,55 @@
+"""Module for IQ option websocket message events."""
+import threading
+
+# topic notified by WebsocketClient on open, close and error
+WEBSOCKET_STATE = "websocket"
+
+
+class MessageEvents(object):
+    """Class for sleeping until a websocket message updated the api state.
+
+    A topic is the name of a websocket message. The websocket client
+    notifies it after the handlers of the message ran, a waiter re-checks
+    its predicate on every notification instead of polling in a loop.
+    Every topic has its own condition, so a busy stream only wakes the
+    threads waiting for it.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__conditions = {}
+
+    def __condition(self, topic):
+        condition = self.__conditions.get(topic)
+        if condition is None:
+            with self.__lock:
+                condition = self.__conditions.setdefault(topic, threading.Condition())
+        return condition
+
+    def notify(self, topic):
+        """Method to wake the threads waiting for a topic.
+
+        :param str topic: The websocket message name.
+        """
+        condition = self.__conditions.get(topic)
+        if condition is not None:
+            with condition:
+                condition.notify_all()
+
+    def wait_for(self, topic, predicate, timeout=None):
+        """Method to sleep until ``predicate()`` is true.
+
+        Must not be called from the websocket thread, that thread sends the
+        notifications.
+
+        :param str topic: The websocket message name that changes the
+            state checked by ``predicate``.
+        :param predicate: The callable without arguments, re-checked after
+            every ``topic`` message.
+        :param timeout: (optional) The seconds to wait, None for no limit.
+
+        :returns: The last result of ``predicate``, false on timeout.
+        """
+        condition = self.__condition(topic)
+        with condition:
+            return condition.wait_for(predicate, timeout)
@@ -0,0 +1,153 @@
+"""Module for IQ option websocket requests waiting for a response."""
+import itertools
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+
+class RequestIdAllocator(object):
+    """Class for collision-free websocket request ids of one connection."""
+
+    def __init__(self, start=1):
+        self.__counter = itertools.count(start)
+
+    def allocate(self):
+        """Method to get the next request id.
+
+        :returns: The request id as str, unique for this allocator.
+        """
+        # next() of itertools.count is atomic under the GIL
+        return str(next(self.__counter))
+
+
+class InflightRequests(object):
+    """Class for the table of in-flight websocket requests keyed by request_id.
+
+    A sender registers a :class:`concurrent.futures.Future` before the
+    request goes out and the handler of the response resolves it with the
+    request_id echoed by the server.
+
+    With ``max_in_flight`` set, :meth:`register` blocks while that many
+    requests are outstanding. Requests older than ``expire_after`` seconds
+    are cancelled to free their slot, so a lost response can not stall the
+    senders for good.
+    """
+
+    def __init__(self, max_in_flight=None, expire_after=120):
+        """
+        :param int max_in_flight: (optional) The maximum number of
+            outstanding requests, None for no limit.
+        :param expire_after: (optional) The age in seconds after which an
+            outstanding request is cancelled when a sender needs its slot.
+        """
+        self.max_in_flight = max_in_flight
+        self.expire_after = expire_after
+        self.__condition = threading.Condition()
+        self.__futures = {}
+
+    def register(self, request_id, timeout=None):
+        """Method to add a request to the table.
+
+        Must not be called from the websocket thread when ``max_in_flight``
+        is set, the responses freeing the slots are read by that thread.
+
+        :param request_id: The websocket request id.
+        :param timeout: (optional) The seconds to wait for a free slot.
+
+        :returns: The :class:`Future` resolved with the response, with the
+            ``request_id`` and ``created`` (time.monotonic) attributes set.
+
+        :raises concurrent.futures.TimeoutError: If no slot freed in time.
+        """
+        future = Future()
+        future.request_id = str(request_id)
+        with self.__condition:
+            if self.max_in_flight:
+                self.__wait_slot(timeout)
+            future.created = time.monotonic()
+            self.__futures[future.request_id] = future
+        return future
+
+    def __wait_slot(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(self.__futures) >= self.max_in_flight:
+            now = time.monotonic()
+            self.__expire(now - self.expire_after)
+            if len(self.__futures) < self.max_in_flight:
+                break
+            if deadline is not None and now >= deadline:
+                raise TimeoutError("{} websocket requests in flight".format(len(self.__futures)))
+            # wake up now and then to expire requests whose response was lost
+            wait = 1.0 if deadline is None else min(1.0, deadline - now)
+            self.__condition.wait(wait)
+
+    def __expire(self, created_before):
+        for request_id, future in list(self.__futures.items()):
+            if future.created < created_before:
+                del self.__futures[request_id]
+                future.cancel()
+
+    def resolve(self, request_id, result):
+        """Method to complete the future of a request.
+
+        :param request_id: The request_id of the response message.
+        :param result: The value the future is resolved with.
+
+        :returns: True if a request was waiting for this response.
+        """
+        if request_id is None:
+            return False
+        with self.__condition:
+            future = self.__futures.pop(str(request_id), None)
+            if future is None:
+                return False
+            self.__condition.notify()
+        # returns False, and leaves the future alone, if it was cancelled
+        if future.set_running_or_notify_cancel():
+            future.set_result(result)
+        return True
+
+    def discard(self, request_id):
+        """Method to forget a request, e.g. after its waiter timed out."""
+        with self.__condition:
+            future = self.__futures.pop(str(request_id), None)
+            self.__condition.notify()
+        if future is not None:
+            future.cancel()
+
+    def cancel_all(self):
+        """Method to cancel every in-flight request, e.g. on disconnect."""
+        with self.__condition:
+            futures = list(self.__futures.values())
+            self.__futures.clear()
+            self.__condition.notify_all()
+        for future in futures:
+            future.cancel()
+
+    @property
+    def count(self):
+        """Property to get the number of outstanding requests."""
+        return len(self.__futures)
+
+    def ages(self):
+        """Method to get the age in seconds of every outstanding request.
+
+        :returns: The dict of request_id -> age.
+        """
+        now = time.monotonic()
+        with self.__condition:
+            return {request_id: now - future.created
+                    for request_id, future in self.__futures.items()}
+
+    def oldest_age(self):
+        """Method to get the age in seconds of the oldest outstanding request.
+
+        :returns: The age, 0 if nothing is in flight.
+        """
+        return max(self.ages().values(), default=0)
+
+    def __len__(self):
+        return len(self.__futures)
+
+    def __contains__(self, request_id):
+        return str(request_id) in self.__futures
@@ -0,0 +1,129 @@
+"""Module for IQ Option reference data websocket object."""
+import threading
+import time
+
+from iqoptionapi.ws.objects.base import Base
+
+# commission-changed instrument_type -> key of api_option_init_all_result
+COMMISSION_TYPES = {
+    "turbo-option": "turbo",
+    "binary-option": "binary",
+}
+
+
+class ReferenceData(Base):
+    """Class for IQ Option reference data websocket object.
+
+    Holds the ``api_option_init_all_result`` and ``initialization-data``
+    payloads with the time they were received, and the tables derived from
+    them (profits, details) until the payload changes. ``commission-changed``
+    messages replace the cached payload with a copy carrying the new
+    commission, so the profits stay current without a new round trip and
+    the payloads already returned never change.
+    """
+
+    def __init__(self):
+        super(ReferenceData, self).__init__()
+        self.__name = "reference-data"
+        self.__lock = threading.Lock()
+        self.__init_all = None
+        self.__init_all_at = 0
+        self.__initialization_data = None
+        self.__initialization_data_at = 0
+        # name -> (init_all payload, table built from it)
+        self.__tables = {}
+
+    def set_init_all(self, init_all):
+        """Method to store an api_option_init_all_result payload."""
+        with self.__lock:
+            self.__init_all = init_all
+            self.__init_all_at = time.time()
+            self.__tables = {}
+
+    def get_init_all(self, ttl):
+        """Method to get the api_option_init_all_result payload.
+
+        :param ttl: The maximum age in seconds.
+
+        :returns: The payload, None if there is none or it is older than ttl.
+        """
+        if self.__init_all is None or time.time() - self.__init_all_at > ttl:
+            return None
+        return self.__init_all
+
+    def set_initialization_data(self, initialization_data):
+        """Method to store an initialization-data payload."""
+        self.__initialization_data = initialization_data
+        self.__initialization_data_at = time.time()
+
+    def get_initialization_data(self, ttl):
+        """Method to get the initialization-data payload.
+
+        :param ttl: The maximum age in seconds.
+
+        :returns: The payload, None if there is none or it is older than ttl.
+        """
+        if self.__initialization_data is None or time.time() - self.__initialization_data_at > ttl:
+            return None
+        return self.__initialization_data
+
+    def table(self, name, build, init_all):
+        """Method to get a table derived from an init_all payload.
+
+        :param str name: The table name.
+        :param build: The callable invoked as ``build(init_all)`` when the
+            table is missing for the payload.
+        :param init_all: The payload, e.g. the one :meth:`get_init_all`
+            returned.
+
+        :returns: The table, None without a payload. The table of the
+            cached payload is shared by every caller until the payload
+            changes; callers must not modify it.
+        """
+        if init_all is None:
+            return None
+        cached = self.__tables.get(name)
+        if cached is not None and cached[0] is init_all:
+            return cached[1]
+        with self.__lock:
+            cached = self.__tables.get(name)
+            if cached is not None and cached[0] is init_all:
+                return cached[1]
+            table = build(init_all)
+            if init_all is self.__init_all:
+                tables = dict(self.__tables)
+                tables[name] = (init_all, table)
+                self.__tables = tables
+        return table
+
+    def commission_changed(self, instrument_type, active_id, commission):
+        """Method to apply a commission-changed message to the cached payload.
+
+        :returns: True if the payload held the active, False otherwise.
+        """
+        option_type = COMMISSION_TYPES.get(instrument_type)
+        with self.__lock:
+            if option_type is None or self.__init_all is None:
+                return False
+            try:
+                active = self.__init_all["result"][option_type]["actives"][str(active_id)]
+            except KeyError:
+                return False
+            # copy the path to the commission, callers may hold the old payload
+            init_all = dict(self.__init_all)
+            result = init_all["result"] = dict(init_all["result"])
+            options = result[option_type] = dict(result[option_type])
+            actives = options["actives"] = dict(options["actives"])
+            active = actives[str(active_id)] = dict(active)
+            option = active["option"] = dict(active["option"])
+            option["profit"] = dict(option["profit"], commission=commission)
+            self.__init_all = init_all
+            self.__tables = {}
+        return True
+
+    def invalidate(self):
+        """Method to drop the cached payloads, the next read fetches them again."""
+        with self.__lock:
+            self.__init_all = None
+            self.__initialization_data = None
+            self.__tables = {}
@@ -32,6 +32,11 @@ class TimeSync(Base):
         """Method to set server timestamp."""
         self.__server_timestamp = timestamp
 
+    @property
+    def synced(self):
+        """Property to check, without waiting, if a server timestamp is set."""
+        return self.__server_timestamp is not None
+
     @property
     def server_datetime(self):
         """Property to get server datetime.
@@ -2,4 +2,5 @@
 
 def api_game_getoptions_result(api, message):
     if message["name"] == "api_game_getoptions_result":
-        api.api_game_getoptions_result = message
\ No newline at end of file
+        api.api_game_getoptions_result = message
+        api.inflight.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def balances(api, message):
     if message["name"] == "balances":
-        api.balances_raw = message
\ No newline at end of file
+        api.balances_raw = message
+        api.inflight.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -1,9 +1,8 @@
-import iqoptionapi.constants as OP_code
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
 
 def candle_generated_v2(api, message, dict_queue_add):
     if message["name"] == "candles-generated":
-        Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(message["msg"]["active_id"])]
+        Active_name = ACTIVE_REGISTRY.get_name(message["msg"]["active_id"])
         active = str(Active_name)
         for k, v in message["msg"]["candles"].items():
             v["active_id"] = message["msg"]["active_id"]
@@ -16,6 +15,9 @@ def candle_generated_v2(api, message, dict_queue_add):
             from_ = int(v["from"])
             maxdict = api.real_time_candles_maxdict_table[Active_name][size]
             msg = v
-            dict_queue_add(api.real_time_candles, maxdict, active, size, from_, msg)
+            if api.candle_store is not None:
+                api.candle_store.add(active, size, msg, maxdict or None)
+            else:
+                dict_queue_add(api.real_time_candles, maxdict, active, size, from_, msg)
 
         api.candle_generated_all_size_check[active] = True
\ No newline at end of file
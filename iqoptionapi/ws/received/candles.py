@@ -4,5 +4,6 @@ def candles(api, message):
     if message['name'] == 'candles':
         try:
             api.candles.candles_data = message["msg"]["candles"]
+            api.inflight.resolve(message.get("request_id"), message["msg"]["candles"])
         except:
             pass
\ No newline at end of file
@@ -10,4 +10,6 @@ def digital_option_placed(api, message, api_dict_clean):
             api.digital_option_placed_id[message["request_id"]] = {
                 "code": "error_place_digital_order",
                 "message": message["msg"]["message"]
-            }
\ No newline at end of file
+            }
+        api.inflight.resolve(message.get("request_id"),
+                             api.digital_option_placed_id[message["request_id"]])
@@ -2,4 +2,5 @@
 
 def history_positions(api, message):
     if message["name"] == "history-positions":
-        api.position_history_v2 = message
\ No newline at end of file
+        api.position_history_v2 = message
+        api.inflight.resolve(message.get("request_id"), message)
\ No newline at end of file
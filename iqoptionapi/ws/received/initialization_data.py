@@ -2,4 +2,6 @@
 
 def initialization_data(api, message):
     if message["name"] == "initialization-data":
-        api.api_option_init_all_result_v2 = message["msg"]
\ No newline at end of file
+        api.api_option_init_all_result_v2 = message["msg"]
+        api.reference_data.set_initialization_data(message["msg"])
+        api.inflight.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
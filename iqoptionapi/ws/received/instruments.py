@@ -2,4 +2,5 @@
 
 def instruments(api, message):
     if message["name"] == "instruments":
-            api.instruments = message["msg"]
\ No newline at end of file
+            api.instruments = message["msg"]
+            api.inflight.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
@@ -1,13 +1,12 @@
 """Module for IQ option websocket."""
-import iqoptionapi.constants as OP_code
+from iqoptionapi.active_registry import ACTIVE_REGISTRY
 from threading import Thread
 
 def live_deal_binary_option_placed(api, message):
     if message["name"] == "live-deal-binary-option-placed":
         # name = message["name"]
         active_id = message["msg"]["active_id"]
-        active = list(OP_code.ACTIVES.keys())[
-            list(OP_code.ACTIVES.values()).index(active_id)]
+        active = ACTIVE_REGISTRY.get_name(active_id)
         _type = message["msg"]["option_type"]
         try:
             # self.api.live_deal_data[name][active][_type].appendleft(
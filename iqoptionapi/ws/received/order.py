@@ -3,3 +3,4 @@
 def order(api, message):
     if message["name"] == "order":
         api.order_data = message
+        api.inflight.resolve(message.get("request_id"), message)
@@ -3,3 +3,4 @@
 def order_placed_temp(api, message):
     if message["name"] == "order-placed-temp":
         api.buy_order_id = message["msg"]["id"]
+        api.inflight.resolve(message.get("request_id"), message["msg"]["id"])
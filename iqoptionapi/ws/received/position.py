@@ -3,3 +3,4 @@
 def position(api, message):
     if message["name"] == "position":
         api.position = message
+        api.inflight.resolve(message.get("request_id"), message)
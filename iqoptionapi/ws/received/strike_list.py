@@ -2,4 +2,5 @@
 
 def strike_list(api, message):
     if message["name"] == "strike-list":
-        api.strike_list = message
\ No newline at end of file
+        api.strike_list = message
+        api.inflight.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def training_balance_reset(api, message):
     if message["name"] == "training-balance-reset":
-        api.training_balance_reset_request = message["msg"]["isSuccessful"]
\ No newline at end of file
+        api.training_balance_reset_request = message["msg"]["isSuccessful"]
+        api.inflight.resolve(message.get("request_id"), message["msg"]["isSuccessful"])
\ No newline at end of file
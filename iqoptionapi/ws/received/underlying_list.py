@@ -3,3 +3,4 @@
 def underlying_list(api, message):
     if message["name"] == "underlying-list":
         api.underlying_list_data = message["msg"]
+        api.inflight.resolve(message.get("request_id"), message["msg"])
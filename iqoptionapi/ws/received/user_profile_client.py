@@ -2,4 +2,5 @@
 
 def user_profile_client(api, message):
     if message["name"] == "user-profile-client":
-        api.user_profile_client = message["msg"]
\ No newline at end of file
+        api.user_profile_client = message["msg"]
+        api.inflight.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def users_availability(api, message):
     if message["name"] == "users-availability":
-        api.users_availability = message["msg"]
\ No newline at end of file
+        api.users_availability = message["msg"]
+        api.inflight.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""Module for IQ option websocket stream subscriptions."""
+import logging
+import threading
+
+# the stream msgs below, whose frames only come after their subscribeMessage
+STREAM_NAMES = frozenset((
+    "candle-generated",
+    "candles-generated",
+    "traders-mood-changed",
+    "instrument-quotes-generated",
+    "live-deal-binary-option-placed",
+    "live-deal-digital-option",
+    "live-deal",
+))
+
+
+def candle_generated(active_id, size):
+    return {"name": "candle-generated",
+            "params": {
+                "routingFilters": {
+                    "active_id": str(active_id),
+                    "size": int(size)
+                }
+            }
+            }
+
+
+def candles_generated(active_id):
+    return {"name": "candles-generated",
+            "params": {
+                "routingFilters": {
+                    "active_id": str(active_id)
+                }
+            }
+            }
+
+
+def traders_mood_changed(active_id, instrument="turbo-option"):
+    return {"name": "traders-mood-changed",
+            "params": {
+                "routingFilters": {
+                    "instrument": instrument,
+                    "asset_id": active_id
+                }
+            }
+            }
+
+
+def instrument_quotes_generated(active_id, expiration_period):
+    return {"name": "instrument-quotes-generated",
+            "params": {
+                "routingFilters": {
+                    "active": int(active_id),
+                    "expiration_period": int(expiration_period * 60),
+                    "kind": "digital-option",
+                },
+            },
+            "version": "1.0"
+            }
+
+
+def live_deal(name, active_id, _type):
+    # "live-deal-binary-option-placed"/"live-deal-digital-option"/"live-deal"
+    if name == "live-deal-binary-option-placed":
+        _type_name = "option_type"  # turbo/binary
+        _active_id = "active_id"
+    elif name == "live-deal-digital-option":
+        _type_name = "expiration_type"
+        _active_id = "instrument_active_id"
+    else:
+        _type_name = "instrument_type"
+        _active_id = "instrument_active_id"
+    return {"name": str(name),
+            "params": {
+                "routingFilters": {
+                    _active_id: int(active_id),
+                    _type_name: str(_type)
+                }
+            },
+            "version": "2.0"
+            }
+
+
+class SubscriptionManager(object):
+    """Class for the reference counted stream subscriptions of a client.
+
+    A stream is a subscribeMessage msg, identified by its name, version
+    and routing filters. Every consumer :meth:`acquire` s it and
+    :meth:`release` s it when done; the subscribeMessage is sent when the
+    first consumer arrives and the unsubscribeMessage when the last one
+    leaves, so consumers sharing a stream do not cancel each other.
+
+    Changes are sent by :meth:`flush`, which only sends the net difference
+    to what the server has: releases are flushed after ``flush_delay``
+    seconds, so a stream released and acquired again meanwhile costs no
+    frame, and a burst of acquires followed by one flush goes out in one
+    batch. The manager outlives the connection; :meth:`resubscribe` sends
+    every stream again on a new one.
+    """
+
+    def __init__(self, flush_delay=0.5):
+        """
+        :param flush_delay: (optional) The seconds releases wait before
+            their unsubscribeMessage is sent.
+        """
+        self.flush_delay = flush_delay
+        self.api = None
+        self.__lock = threading.Lock()
+        # key -> [msg, consumers]
+        self.__streams = {}
+        # keys subscribed on the current connection
+        self.__subscribed = set()
+        self.__timer = None
+        self.sent_frames = 0
+
+    @staticmethod
+    def key(msg):
+        """Method to get the identity of a stream msg."""
+        filters = msg.get("params", {}).get("routingFilters", {})
+        return msg["name"], msg.get("version"), tuple(sorted(filters.items()))
+
+    def acquire(self, msg):
+        """Method to add a consumer of a stream.
+
+        The subscribeMessage waits for the next :meth:`flush`, call it when
+        the stream is needed right away.
+
+        :param dict msg: The subscribeMessage msg, e.g. of
+            :func:`candle_generated`.
+
+        :returns: The number of consumers of the stream.
+        """
+        key = self.key(msg)
+        with self.__lock:
+            stream = self.__streams.setdefault(key, [msg, 0])
+            stream[1] += 1
+            return stream[1]
+
+    def release(self, msg):
+        """Method to remove a consumer of a stream.
+
+        :returns: The number of consumers left, None if there was none.
+        """
+        key = self.key(msg)
+        with self.__lock:
+            stream = self.__streams.get(key)
+            if stream is None:
+                return None
+            stream[1] -= 1
+            if stream[1] > 0:
+                return stream[1]
+            del self.__streams[key]
+            if key in self.__subscribed and self.__timer is None:
+                self.__timer = threading.Timer(self.flush_delay, self.flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+            return 0
+
+    def count(self, msg):
+        stream = self.__streams.get(self.key(msg))
+        return 0 if stream is None else stream[1]
+
+    def streams(self):
+        """Method to get the ``(msg, consumers)`` of every stream."""
+        with self.__lock:
+            return [tuple(stream) for stream in self.__streams.values()]
+
+    def flush(self):
+        """Method to send the subscribe and unsubscribe frames of the pending changes."""
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            api = self.api
+            if api is None:
+                return
+            unsubscribe = [key for key in self.__subscribed if key not in self.__streams]
+            subscribe = [(key, stream[0]) for key, stream in self.__streams.items()
+                         if key not in self.__subscribed]
+            self.__subscribed.difference_update(unsubscribe)
+            self.__subscribed.update(key for key, _ in subscribe)
+            # the msgs of released streams are gone, rebuild them from the key
+            frames = [("unsubscribeMessage", self.__message(key)) for key in unsubscribe]
+            frames += [("subscribeMessage", msg) for _, msg in subscribe]
+        for name, msg in frames:
+            try:
+                api.send_websocket_request(name, msg)
+                self.sent_frames += 1
+            except Exception as e:
+                logging.error('**error** ' + name + ' ' + msg["name"] + ' ' + str(e))
+
+    @staticmethod
+    def __message(key):
+        name, version, filters = key
+        msg = {"name": name, "params": {"routingFilters": dict(filters)}}
+        if version is not None:
+            msg["version"] = version
+        return msg
+
+    def resubscribe(self, api):
+        """Method to subscribe every stream on a new connection.
+
+        :param api: The :class:`IQOptionAPI <iqoptionapi.api.IQOptionAPI>`
+            of the connection.
+        """
+        with self.__lock:
+            self.api = api
+            self.__subscribed = set()
+        self.flush()
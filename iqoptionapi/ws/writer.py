@@ -0,0 +1,184 @@
+"""Module for IQ option websocket writer thread."""
+import itertools
+import logging
+import queue
+import threading
+import time
+
+# outbound lanes, a frame is written only when no frame of a lower lane waits
+PRIORITY_CONTROL = 0
+PRIORITY_ORDER = 1
+PRIORITY_NORMAL = 2
+PRIORITY_BULK = 3
+
+LANES = {
+    PRIORITY_CONTROL: "control",
+    PRIORITY_ORDER: "order",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_BULK: "bulk",
+}
+
+# websocket request name -> lane
+NAME_PRIORITY = {
+    "heartbeat": PRIORITY_CONTROL,
+    "ssid": PRIORITY_CONTROL,
+    "buyback": PRIORITY_ORDER,
+    "subscribeMessage": PRIORITY_BULK,
+    "unsubscribeMessage": PRIORITY_BULK,
+}
+
+# msg name of a "sendMessage" request -> lane
+MESSAGE_PRIORITY = {
+    "binary-options.open-option": PRIORITY_ORDER,
+    "digital-options.place-digital-option": PRIORITY_ORDER,
+    "digital-options.close-position": PRIORITY_ORDER,
+    "digital-options.close-position-batch": PRIORITY_ORDER,
+    "place-order-temp": PRIORITY_ORDER,
+    "sell-options": PRIORITY_ORDER,
+    "close-position": PRIORITY_ORDER,
+    "cancel-order": PRIORITY_ORDER,
+    "change-tpsl": PRIORITY_ORDER,
+    "change-auto-margin-call": PRIORITY_ORDER,
+    "get-candles": PRIORITY_BULK,
+    "get-position-history": PRIORITY_BULK,
+    "portfolio.get-history-positions": PRIORITY_BULK,
+    "request-leaderboard-deals-client": PRIORITY_BULK,
+    "request-leaderboard-userinfo-deals-client": PRIORITY_BULK,
+}
+
+_STOP = object()
+
+
+def get_priority(name, msg):
+    """Return the lane of a websocket request.
+
+    :param str name: The websocket request name.
+    :param msg: The websocket request msg.
+    """
+    priority = NAME_PRIORITY.get(name)
+    if priority is not None:
+        return priority
+    if isinstance(msg, dict):
+        return MESSAGE_PRIORITY.get(msg.get("name"), PRIORITY_NORMAL)
+    return PRIORITY_NORMAL
+
+
+class WebsocketWriter(object):
+    """Class for the thread that owns the writes of one websocket.
+
+    Senders only put the encoded frame in a queue and return, the frames
+    are written one at a time by the writer thread, so senders never wait
+    for the receive thread and two writes can not interleave on the socket.
+
+    The queue is ordered by lane (see ``LANES``) and FIFO within a lane, so
+    heartbeats and orders overtake a burst of subscriptions.
+    """
+
+    def __init__(self, websocket):
+        """
+        :param websocket: The instance of :class:`WebSocketApp
+            <websocket.WebSocketApp>` the frames are written to.
+        """
+        self.websocket = websocket
+        self.__queue = queue.PriorityQueue()
+        self.__sequence = itertools.count()
+        self.__lock = threading.Lock()
+        self.__lanes = {priority: {"depth": 0, "sent": 0, "total_latency": 0.0,
+                                   "max_latency": 0.0, "last_latency": 0.0}
+                        for priority in LANES}
+        self.__thread = threading.Thread(target=self.__run, name="iqoption-ws-writer")
+        self.__thread.daemon = True
+        self.sent = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def start(self):
+        """Method to start the writer thread."""
+        self.__thread.start()
+
+    def stop(self, timeout=5):
+        """Method to stop the writer thread, frames still queued are dropped.
+
+        :param timeout: (optional) The seconds to wait for the thread.
+        """
+        self.__queue.put((-1, next(self.__sequence), _STOP, None, None))
+        if self.__thread.is_alive() and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+
+    def put(self, data, on_error=None, priority=PRIORITY_NORMAL):
+        """Method to queue a frame for sending.
+
+        :param bytes data: The encoded websocket frame.
+        :param on_error: (optional) The callable invoked as
+            ``on_error(exception)`` on the writer thread if the write fails.
+        :param int priority: (optional) The lane, one of the ``PRIORITY_*``
+            constants.
+        """
+        with self.__lock:
+            self.__lanes[priority]["depth"] += 1
+        self.__queue.put((priority, next(self.__sequence), data, on_error, time.monotonic()))
+
+    @property
+    def depth(self):
+        """Property to get the number of frames waiting to be sent."""
+        return self.__queue.qsize()
+
+    def stats(self):
+        """Method to get the writer statistics.
+
+        :returns: The dict with ``depth``, ``sent``, ``errors`` and the
+            ``avg_latency``/``max_latency``/``last_latency`` in seconds from
+            :meth:`put` until the frame was written, and under ``lanes`` the
+            same figures per lane name.
+        """
+        with self.__lock:
+            lanes = {LANES[priority]: {
+                "depth": lane["depth"],
+                "sent": lane["sent"],
+                "avg_latency": lane["total_latency"] / lane["sent"] if lane["sent"] else 0.0,
+                "max_latency": lane["max_latency"],
+                "last_latency": lane["last_latency"],
+            } for priority, lane in self.__lanes.items()}
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "errors": self.errors,
+            "avg_latency": self.total_latency / self.sent if self.sent else 0.0,
+            "max_latency": self.max_latency,
+            "last_latency": self.last_latency,
+            "lanes": lanes,
+        }
+
+    def __run(self):
+        logger = logging.getLogger(__name__)
+        while True:
+            priority, _, data, on_error, queued = self.__queue.get()
+            if data is _STOP:
+                break
+            try:
+                self.websocket.send(data)
+            except Exception as e:
+                with self.__lock:
+                    self.__lanes[priority]["depth"] -= 1
+                self.errors += 1
+                logger.error(e)
+                if on_error is not None:
+                    on_error(e)
+                continue
+            latency = time.monotonic() - queued
+            with self.__lock:
+                lane = self.__lanes[priority]
+                lane["depth"] -= 1
+                lane["sent"] += 1
+                lane["total_latency"] += latency
+                lane["last_latency"] = latency
+                if latency > lane["max_latency"]:
+                    lane["max_latency"] = latency
+            self.sent += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+            logger.debug(data)
@@ -9,6 +9,12 @@ setup(
     url="https://github.com/cassDS/iqoptionapi",
     packages=find_packages(),
     install_requires=["pylint", "requests", "websocket-client==1.8.0"],
+    extras_require={
+        "orjson": ["orjson"],
+        "ujson": ["ujson"],
+        "msgspec": ["msgspec"],
+        "numpy": ["numpy"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License"